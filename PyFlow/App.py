@@ -47,6 +47,7 @@ from PyFlow.UI.Utils.stylesheet import editableStyleSheet
 from PyFlow.UI.ContextMenuGenerator import ContextMenuGenerator
 from PyFlow.UI.Widgets.PreferencesWindow import PreferencesWindow
 from PyFlow.ToolManagement.EnvironmentManager import environmentManager, DirectEnvironment
+from PyFlow.Packages.PyFlowBase.FunctionLibraries.BiitToolNode import prelaunchEnvironments
 
 try:
 	from PyQtAds import QtAds
@@ -74,6 +75,7 @@ from PyFlow.Core.OmeroService import OmeroService
 import PyFlow.UI.resources
 
 EDITOR_TARGET_FPS = 30
+EDITOR_IDLE_FPS = 2 # The tick rate when no node needs to be ticked, nothing is animated and no asyncio task is running
 
 
 logger = logging.getLogger()
@@ -114,6 +116,7 @@ class PyFlow(QMainWindow):
 		self.setFocusPolicy(QtCore.Qt.StrongFocus)
 		self.currentSoftware = ""
 		self.edHistory = EditorHistory(self)
+		self.keptOutOfDateNodes = set() # the uuids of the unexecuted nodes whose reusable data the user chose to keep (see manageUnexecutedNodesData)
 		self.edHistory.statePushed.connect(self.historyStatePushed)
 		versionInfo = self.getVersionInfo()
 		self.setWindowTitle(self.winTitle(versionInfo))
@@ -162,6 +165,8 @@ class PyFlow(QMainWindow):
 
 		self.preferencesWindow = PreferencesWindow(self)
 		self.preferencesWindow.settingsUpdated.connect(OmeroService().reset)
+		self.preferencesWindow.settingsUpdated.connect(self.configureEnvironmentPool)
+		self.configureEnvironmentPool()
 
 		self.setMouseTracking(True)
 
@@ -412,6 +417,19 @@ class PyFlow(QMainWindow):
 		self.graphManager.get().selectGraphByName(data["activeGraph"])
 		self.updateLabel()
 		PathsRegistry().rebuild()
+		if ConfigManager().getPrefsValue("PREFS", "General/PrelaunchEnvironments") != "false":
+			prelaunchEnvironments(self.graphManager.get().getAllNodes())
+
+	# Idle environments are exited after IdleEnvironmentsTimeout minutes, or when all environments use more than EnvironmentsMemoryLimit GB (0 means no limit)
+	def configureEnvironmentPool(self):
+		def getPrefsNumber(key, default):
+			try:
+				return float(ConfigManager().getPrefsValue("PREFS", key))
+			except (TypeError, ValueError):
+				return default
+		idleTimeout = getPrefsNumber("General/IdleEnvironmentsTimeout", 15)
+		memoryLimit = getPrefsNumber("General/EnvironmentsMemoryLimit", 0)
+		environmentManager.configurePool(maxIdleTime=idleTimeout * 60 if idleTimeout > 0 else None, maxIdleEnvironments=environmentManager.maxIdleEnvironments, maxMemory=int(memoryLimit * 1024**3) if memoryLimit > 0 else None)
 
 	@property
 	def currentFileName(self):
@@ -453,15 +471,34 @@ class PyFlow(QMainWindow):
 				node.clear()
 		return answer
 	
+	# The out-of-date data of the unexecuted nodes must be deleted, except for the nodes caching their rows (see RowCache):
+	# their data can be kept, the unchanged rows will be reused when they are executed and the outputs of the other rows will be sent to the trash.
+	# The user is asked once for each of these nodes (again if the node is executed then becomes out-of-date again).
 	def manageUnexecutedNodesData(self):
 		unexecutedNodesWhichHaveData = [node for node in self.graphManager.get().getAllNodes() if hasattr(node, 'executed') and (not node.executed) and hasattr(node, 'hasGeneratedData') and node.hasGeneratedData()]
-		if len(unexecutedNodesWhichHaveData) > 0:
-			nodeNames = ', '.join([n.name for n in unexecutedNodesWhichHaveData])
-			message = f'The out-of-date data of one or more nodes ({nodeNames}) must be deleted before continuing.\n\nWould you like to send the out-of-date data to the trash and continue?\n\n(If this data is important to you, cancel and export the workflow with its data before retrying).'
-			answer = QMessageBox.warning(self, "Delete out-of-date data?", message, QMessageBox.Cancel | QMessageBox.Yes)
-			if answer == QMessageBox.Cancel: return False
-			for node in unexecutedNodesWhichHaveData:
-				node.clear()
+		self.keptOutOfDateNodes &= set([node.uid for node in unexecutedNodesWhichHaveData])
+		cachingNodes = [node for node in unexecutedNodesWhichHaveData if hasattr(node, 'usesRowCache') and node.usesRowCache() and node.uid not in self.keptOutOfDateNodes]
+		otherNodes = [node for node in unexecutedNodesWhichHaveData if not (hasattr(node, 'usesRowCache') and node.usesRowCache())]
+		if len(cachingNodes) == 0 and len(otherNodes) == 0: return True
+		message = ''
+		if len(otherNodes) > 0:
+			message += f'The out-of-date data of one or more nodes ({", ".join([n.name for n in otherNodes])}) must be deleted before continuing.\n\n'
+		if len(cachingNodes) > 0:
+			message += f'The out-of-date data of one or more nodes ({", ".join([n.name for n in cachingNodes])}) can be kept: the unchanged rows will be reused when these nodes are executed, and the outputs of the other rows will then be sent to the trash.\n\n'
+		message += '(If this data is important to you, cancel and export the workflow with its data before retrying).'
+		messageBox = QMessageBox(QMessageBox.Warning, "Delete out-of-date data?", message, QMessageBox.Cancel, self)
+		trashButton = messageBox.addButton('Send all out-of-date data to the trash' if len(cachingNodes) > 0 else 'Send the out-of-date data to the trash', QMessageBox.DestructiveRole)
+		keepButton = messageBox.addButton('Keep the reusable data' if len(otherNodes) == 0 else 'Keep the reusable data, trash the rest', QMessageBox.AcceptRole) if len(cachingNodes) > 0 else None
+		messageBox.exec_()
+		if messageBox.clickedButton() == trashButton:
+			nodesToClear = otherNodes + cachingNodes
+		elif keepButton is not None and messageBox.clickedButton() == keepButton:
+			nodesToClear = otherNodes
+			self.keptOutOfDateNodes |= set([node.uid for node in cachingNodes])
+		else:
+			return False
+		for node in nodesToClear:
+			node.clear()
 		return True
 	
 	def save(self, save_as=False, deleteData=True):
@@ -545,15 +582,20 @@ class PyFlow(QMainWindow):
 
 	def startMainLoop(self):
 		self.tick_timer.timeout.connect(self.mainLoop)
-		self.tick_timer.start(1000 / EDITOR_TARGET_FPS)
+		self.tick_timer.start(int(1000 / EDITOR_TARGET_FPS))
 
 	def stopMainLoop(self):
 		self.tick_timer.stop()
 		if self.tick_timer.isSignalConnected(QMetaMethod.fromSignal(self.tick_timer.timeout)):
 			self.tick_timer.timeout.disconnect()
 
+	# Tick at the target rate from now on (mainLoop() idles down again when nothing needs it)
+	def wakeMainLoop(self):
+		if self.tick_timer.isActive() and self.tick_timer.interval() != int(1000 / EDITOR_TARGET_FPS):
+			self.tick_timer.setInterval(int(1000 / EDITOR_TARGET_FPS))
+
 	def mainLoop(self):
-		asyncio.get_event_loop().run_until_complete(self._tick_asyncio())
+		asyncioTasksRunning = self.runAsyncioCallbacks()
 		
 		deltaTime = currentProcessorTime() - self._lastClock
 		ds = deltaTime * 1000.0
@@ -561,17 +603,30 @@ class PyFlow(QMainWindow):
 			self.fps = int(1000.0 / ds)
 
 		# Tick all graphs
-		# each graph will tick owning raw nodes
-		# each raw node will tick its ui wrapper if it exists
-		self.graphManager.get().Tick(deltaTime)
+		# each graph will tick its nodes which need it (see NodeBase.needsTick)
+		# each raw node will tick its ui wrapper if it is connected
+		graphManager = self.graphManager.get()
+		graphManager.Tick(deltaTime)
 
 		# Tick canvas. Update ui only stuff such animation etc.
 		self.canvasWidget.Tick(deltaTime)
 
 		self._lastClock = currentProcessorTime()
-		
-	async def _tick_asyncio(self):
-		await asyncio.sleep(0.00001)
+
+		# Idle down when nothing needs to be ticked, so that an idle editor does not keep a core busy
+		active = asyncioTasksRunning or graphManager.hasTickingNodes() or self.canvasWidget.isAnimating()
+		interval = int(1000 / (EDITOR_TARGET_FPS if active else EDITOR_IDLE_FPS))
+		if self.tick_timer.interval() != interval:
+			self.tick_timer.setInterval(interval)
+	
+	# Run the asyncio callbacks which are ready (the tasks created by nodes, see subProcess), without blocking the Qt event loop
+	# Returns False when there is no pending task
+	def runAsyncioCallbacks(self):
+		loop = asyncio.get_event_loop()
+		if len(asyncio.all_tasks(loop)) == 0: return False
+		loop.call_soon(loop.stop)
+		loop.run_forever()
+		return True
 
 	def createPopupMenu(self):
 		pass
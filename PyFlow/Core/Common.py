@@ -273,12 +273,17 @@ def cycleCheck(src, dst):
     """
     if src.direction == PinDirection.Input:
         src, dst = dst, src
-    start = src
-    if src in dst.affects:
-        return True
-    for i in dst.affects:
-        if cycleCheck(start, i):
+    # Iterative walk with a visited set: in diamond shaped graphs, each pin is only checked once
+    visited = {dst}
+    stack = [dst]
+    while stack:
+        pin = stack.pop()
+        if src in pin.affects:
             return True
+        for i in pin.affects:
+            if i not in visited:
+                visited.add(i)
+                stack.append(i)
     return False
 
 
@@ -305,6 +310,27 @@ def arePinsConnected(src, dst):
     return False
 
 
+_topologyGeneration = 0
+
+
+def getTopologyGeneration():
+    """Returns the generation of the connections between pins
+
+    The generation is incremented each time two pins are connected or disconnected,
+    it is used to invalidate the evaluation orders cached by :class:`~PyFlow.Core.EvaluationEngine.DefaultEvaluationEngine_Impl`
+
+    :rtype: int
+    """
+    return _topologyGeneration
+
+
+def invalidateTopology():
+    """Increments the generation of the connections between pins, see :func:`getTopologyGeneration`
+    """
+    global _topologyGeneration
+    _topologyGeneration += 1
+
+
 def getConnectedPins(pin):
     """Find all connected Pins to input Pin
 
@@ -571,6 +597,7 @@ def connectPins(src, dst):
     src.aboutToConnect(dst)
 
     pinAffects(src, dst)
+    invalidateTopology()
     # src.setDirty()
 
     dst.setData(src.currentData())
@@ -662,6 +689,7 @@ def disconnectPins(src, dst):
             src, dst = dst, src
         src.affects.remove(dst)
         dst.affected_by.remove(src)
+        invalidateTopology()
         src.pinDisconnected(dst)
         dst.pinDisconnected(src)
         dst.setData(None)
@@ -681,11 +709,19 @@ def push(start_from):
     :type start_from: :py:class:`~PyFlow.Core.PinBase.PinBase`
     """
     #print("push", start_from.name, start_from.owningNode().name)
-    if not len(start_from.affects) == 0:
-        start_from.setDirty()
-        for i in start_from.affects:
-            i.setDirty()
-            push(i)
+    if len(start_from.affects) == 0:
+        return
+    start_from.setDirty()
+    # Iterative walk with a visited set: in diamond shaped graphs, each pin is only set dirty once
+    visited = {start_from}
+    stack = list(start_from.affects)
+    while stack:
+        pin = stack.pop()
+        if pin in visited:
+            continue
+        visited.add(pin)
+        pin.setDirty()
+        stack.extend(pin.affects)
 
 
 def extractDigitsFromEndOfString(string):
@@ -59,26 +59,46 @@ class DefaultEvaluationEngine_Impl(IEvaluationEngine):
 
         return pin.currentData()
 
+    # The evaluation orders are cached until pins are connected or disconnected (see Common.getTopologyGeneration)
+    _evaluationOrders = {}
+    _evaluationOrdersGeneration = -1
+
     @staticmethod
     def getEvaluationOrderIterative(node, forward=False):
-        visited = set()
-        stack = [node]
+        """Returns the nodes which must be computed before node (or the nodes which depend on node when forward is True),
+        in topological order, without node itself
+        """
+        generation = getTopologyGeneration()
+        if DefaultEvaluationEngine_Impl._evaluationOrdersGeneration != generation:
+            DefaultEvaluationEngine_Impl._evaluationOrders = {}
+            DefaultEvaluationEngine_Impl._evaluationOrdersGeneration = generation
+        evaluationOrders = DefaultEvaluationEngine_Impl._evaluationOrders
+        order = evaluationOrders.get((node, forward))
+        if order is None:
+            order = DefaultEvaluationEngine_Impl.computeEvaluationOrder(node, forward)
+            evaluationOrders[(node, forward)] = order
+        return list(order)
+
+    @staticmethod
+    def computeEvaluationOrder(node, forward=False):
+        getNextNodes = DefaultEvaluationEngine_Impl.getForwardNextLayerNodes if forward else DefaultEvaluationEngine_Impl.getNextLayerNodes
+        # Iterative depth first search: the nodes are appended once all their next nodes were appended
+        visited = {node}
         order = []
+        stack = [(node, iter(getNextNodes(node)))]
         while len(stack):
-            node = stack[-1]
-            stack.pop()
-
-            if node not in visited:
-                order.insert(0, node)
-                visited.add(node)
-            if not forward:
-                lhsNodes = DefaultEvaluationEngine_Impl().getNextLayerNodes(node)
-            else:
-                lhsNodes = DefaultEvaluationEngine_Impl().getForwardNextLayerNodes(node)
-            for n in lhsNodes:
+            current, nextNodes = stack[-1]
+            for n in nextNodes:
                 if n not in visited:
-                    stack.append(n)
+                    visited.add(n)
+                    stack.append((n, iter(getNextNodes(n))))
+                    break
+            else:
+                stack.pop()
+                order.append(current)
         order.pop()
+        if forward:
+            order.reverse()
         return order
 
     @staticmethod
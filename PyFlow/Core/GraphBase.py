@@ -94,6 +94,10 @@ class GraphBase(ISerializable):
         self.parentGraph = parentGraph
 
         self._nodes = {}
+        # The nodes which need to be ticked (see NodeBase.needsTick), the other nodes are not visited by Tick
+        self._tickingNodes = set()
+        # Sent with hasTickingNodes() when it changes (the compound node owning this graph is ticked while its nodes need it)
+        self.tickingNodesChanged = Signal(bool)
         self._vars = {}
         self.uid = uuid.uuid4() if uid is None else uid
 
@@ -259,9 +263,9 @@ class GraphBase(ISerializable):
         for node in nodes:
             node.setupConnections()
 
-        # Now that the graph is built, the nodes can be computed
-        for node in nodes:
-            node.processNode()
+        # The nodes are not computed here: they are computed when they are needed
+        # (when the node is selected, when its output is requested by a downstream node, or when it is executed),
+        # so that loading a workflow does not process the DataFrames of all nodes (listing folders, querying servers, etc.)
         
         # executedNodes = [n for n in nodes if hasattr(n, 'executed') and n.executed]
         # for node in executedNodes:
@@ -287,6 +291,9 @@ class GraphBase(ISerializable):
         for node in list(self._nodes.values()):
             node.kill()
         self._nodes.clear()
+        if self.hasTickingNodes():
+            self._tickingNodes.clear()
+            self.tickingNodesChanged.send(False)
 
         for var in list(self._vars.values()):
             self.killVariable(var)
@@ -318,9 +325,34 @@ class GraphBase(ISerializable):
         :param deltaTime: Elapsed time since last tick
         :type deltaTime: float
         """
-        for node in self._nodes.values():
+        for node in list(self._tickingNodes):
             node.Tick(deltaTime)
 
+    def updateTickingNode(self, node, ticking=None):
+        """Registers or unregisters node in the nodes ticked by this graph
+
+        :param node: The node to update
+        :type node: :class:`~PyFlow.Core.NodeBase.NodeBase`
+        :param ticking: Whether the node must be ticked, defaults to node.needsTick()
+        :type ticking: bool or None
+        """
+        if ticking is None:
+            ticking = node.uid in self._nodes and node.needsTick()
+        hadTickingNodes = self.hasTickingNodes()
+        if ticking:
+            self._tickingNodes.add(node)
+        else:
+            self._tickingNodes.discard(node)
+        if self.hasTickingNodes() != hadTickingNodes:
+            self.tickingNodesChanged.send(self.hasTickingNodes())
+
+    def hasTickingNodes(self):
+        """Whether some nodes of this graph need to be ticked
+
+        :rtype: bool
+        """
+        return len(self._tickingNodes) > 0
+
     @property
     def pins(self):
         result = {}
@@ -499,6 +531,7 @@ class GraphBase(ISerializable):
 
         self._nodes[node.uid] = node
         node.postCreate(jsonTemplate)
+        self.updateTickingNode(node)
         PathsRegistry().rebuild()
         return True
 
@@ -149,6 +149,15 @@ class GraphManager(object):
         for graph in self._graphs.values():
             graph.Tick(deltaTime)
 
+    def hasTickingNodes(self):
+        """Whether some nodes need to be ticked (see :meth:`~PyFlow.Core.NodeBase.NodeBase.needsTick`)
+
+        When there are none, the editor can tick less often
+
+        :rtype: bool
+        """
+        return any([graph.hasTickingNodes() for graph in self._graphs.values()])
+
     def findVariableRefs(self, variable):
         """Returns a list of variable accessors spawned across all graphs
 
@@ -353,12 +353,50 @@ class NodeBase(INode):
         for pin in self.outputs.values():
             pin.kill()
         self.graph().getNodes().pop(self.uid)
+        self.graph().updateTickingNode(self, False)
 
         PathsRegistry().rebuild()
 
     def Tick(self, delta):
         self.tick.send(delta)
 
+    def needsTick(self):
+        """Whether this node must be ticked by its graph: its class implements Tick, or something is connected to its tick signal
+
+        The classes which only need to be ticked in some states (a running timer, a pending delay, etc.) override it,
+        and call :meth:`updateTicking` when that state changes
+
+        :rtype: bool
+        """
+        return type(self).Tick is not NodeBase.Tick or self.hasTickReceivers()
+
+    def hasTickReceivers(self):
+        """Whether something is connected to the tick signal (see :meth:`connectTick`)
+
+        :rtype: bool
+        """
+        return len(self.tick.receivers) > 0
+
+    def updateTicking(self):
+        """Registers or unregisters this node in the nodes ticked by its graph, according to :meth:`needsTick`
+        """
+        if self.graph is not None and self.graph() is not None:
+            self.graph().updateTickingNode(self)
+
+    def connectTick(self, receiver):
+        """Connects receiver to the tick signal, and registers this node in the nodes ticked by its graph
+
+        Connecting to :attr:`tick` directly would not make the graph tick this node
+        """
+        self.tick.connect(receiver)
+        self.updateTicking()
+
+    def disconnectTick(self, receiver):
+        """Disconnects receiver from the tick signal, the node is not ticked anymore if nothing else needs it
+        """
+        self.tick.disconnect(receiver)
+        self.updateTicking()
+
     @classmethod
     def title(cls):
         name = cls.__name__
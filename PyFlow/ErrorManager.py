@@ -19,7 +19,7 @@ class ErrorManager:
 
         dataFrames = '\n\nDataFrames:\n\n'
         for node in nodes:
-                if not hasattr(node, 'processedDataFrame'): continue
+                if getattr(node, 'processedDataFrame', None) is None: continue
                 df = node.processedDataFrame
                 dataFrames += f'\n\n{node.name} Processed DataFrame:\n\n' + df[:100].to_csv()
 
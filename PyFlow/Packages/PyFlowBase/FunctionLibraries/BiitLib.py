@@ -4,7 +4,8 @@ from importlib import import_module
 
 from PyFlow import getImportPath
 from PyFlow.Core import FunctionLibraryBase
-from PyFlow.Packages.PyFlowBase.FunctionLibraries.BiitToolNode import createNode
+from PyFlow.ToolManagement.ToolManifest import ToolManifest
+from PyFlow.Packages.PyFlowBase.FunctionLibraries.BiitToolNode import createNode, createLazyNode
 
 class BiitLib(FunctionLibraryBase):
     """doc string for BiitLib"""
@@ -15,15 +16,26 @@ toolsPath = Path('PyFlow/Tools/')
 def getTools(toolsPath):
     return sorted(list(Path(toolsPath).glob('*/*.py')))
 
+# The tools are described by a manifest extracted from their source code, their modules are only imported when they are used
+# (see ToolManifest and createLazyNode) ; the tools which cannot be parsed are imported directly
 def loadTools(toolsPath):
     tools = []
+    manifest = ToolManifest(Path(toolsPath) / 'tool_manifest.json')
     for toolPath in getTools(toolsPath):
         moduleImportPath = getImportPath(toolPath)
-        module = import_module(moduleImportPath)
-        tool = createNode(toolPath, moduleImportPath, module)
+        try:
+            toolInfo = manifest.getToolInfo(toolPath)
+        except (SyntaxError, UnicodeDecodeError, OSError):
+            toolInfo = False
+        if toolInfo is None: continue
+        if toolInfo:
+            tool = createLazyNode(toolPath, moduleImportPath, toolInfo)
+        else:
+            tool = createNode(toolPath, moduleImportPath, import_module(moduleImportPath))
         if tool is not None:
             BiitLib.classes[toolPath.name] = tool
             tools.append(tool)
+    manifest.save()
     return tools
 
 loadTools(toolsPath)
@@ -1,18 +1,32 @@
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import copy
 import json
+import hashlib
+import queue
+import threading
 import re
 import pandas
 import logging
+import contextlib
 
-from PyFlow import PARAMETERS_PATH, OUTPUT_DATAFRAME_PATH
+from PyFlow import PARAMETERS_PATH
 from PyFlow.invoke_in_main import inthread, inmain
 from PyFlow.Core import NodeBase
 from PyFlow.Core.EvaluationEngine import EvaluationEngine
 from PyFlow.Core.NodeBase import NodePinsSuggestionsHelper
 from PyFlow.Core.GraphManager import GraphManagerSingleton
 from PyFlow.Core.Common import StructureType, PinOptions
-from PyFlow.ToolManagement.ToolBase import DictToObject
-from PyFlow.ToolManagement.EnvironmentManager import environmentManager, Environment, attachLogHandler
+from PyFlow.ToolManagement.ToolBase import DictToObject, ColumnarArgs, FusedArgs
+from PyFlow.ToolManagement.EnvironmentManager import environmentManager, Environment, ClientEnvironment, attachLogHandler
+from PyFlow.ToolManagement.RowCache import RowCache
+from PyFlow.ToolManagement.RowStream import RowStream
+from PyFlow.ToolManagement.Timings import Timings
+from PyFlow.ToolManagement.Profiles import Profile, capture as captureProfile
+from PyFlow.ToolManagement.ToolManifest import LazyTool, definesMethod
+from PyFlow.ToolManagement.OutputTemplate import OutputTemplate, getOutputTemplate
+from PyFlow.ToolManagement.DataFrameIO import saveDataFrame, loadDataFrame, getDataFramePath
 from PyFlow.ThumbnailManagement.ThumbnailGenerator import ThumbnailGenerator
 from send2trash import send2trash
 from blinker import Signal
@@ -28,6 +42,7 @@ from blinker import Signal
 # - parameters are changed and node is selected ( dataBeenSet -> table view computes node)
 # - user executes ( RunTool.execute(node) )
 # - user export workflow
+# Nodes are not computed when the workflow is loaded (see GraphBase.populateFromJson()), executed nodes load their saved output DataFrame when they are first computed
 
 # Parameters are initialized when node is computed
 
@@ -42,6 +57,8 @@ class BiitToolNode(NodeBase):
 
 	nInstanciatedNodes = 0
 	environment: Environment = None
+	maxRowsInFlight = 16 # The maximum number of rows sent to a worker and not yet processed (see ClientEnvironment.executeBatch)
+	maxStreamedRows = 64 # The maximum number of rows processed and not yet taken by the next node when rows are pipelined (see RowStream)
 
 	def __init__(self, name):
 		super().__init__(name)
@@ -59,6 +76,21 @@ class BiitToolNode(NodeBase):
 		self.outArray.disableOptions(PinOptions.ChangeTypeOnConnection)
 		self.resetParameters = None
 		self.inputDataFrame = None # this is the merged data frames (the result of self.mergeDataFrames(inputs dataframe)), before being processed by self.tool.processDataFrame()
+		self.processedDataFrame = None # the result of self.tool.processDataFrame(self.inputDataFrame), set when the node is computed
+		self.savedOutputDataFramePath = None # the output DataFrame of the last execution, loaded when it is first needed (see loadSavedOutputDataFrame())
+		self.nWorkers = getattr(self.Tool, 'nWorkers', 1) # The number of rows processed in parallel (each by a ModuleCaller process of the tool environment)
+		self.inputStream = None # the rows of the previous node, when the executions are pipelined (see streamRowsFrom())
+		self.outputStream = None # the rows sent to the next node, when the executions are pipelined
+		self.deferredOutput = None # the output set while the rows were pipelined, propagated to the next nodes once the pipeline stopped
+		self.fusedNodes = [] # the next nodes executed with this one, row by row in memory (see fuseNodes())
+		self.fusedSteps = None
+		self.skipIntermediateFiles = False
+		self.outputsInMemory = False # the outputs of the last fused execution were only passed in memory to the next fused nodes: the node stays unexecuted (see executeFused())
+		self.timings = None # the telemetry of the current execution (see Timings)
+		self.computeMeasurement = None # the resources used by the last compute, recorded when the node is executed
+		self.profileNextExecution = False # profile the next execution, on the host and in the tool environment (see Profile)
+		self.profile = None # the profile of the current execution
+		self.computeProfile = None # the profile of the last compute, added to the profile of the next execution
 		self.initializeParameters()
 		self.lib = 'BiitLib'
 		self.__class__.nInstanciatedNodes += 1
@@ -75,29 +107,41 @@ class BiitToolNode(NodeBase):
 		return GraphManagerSingleton().get().getWorkflowPath() / 'Metadata' / self.name
 	
 	# affectOthers is always true, except when loading node in BiitToolNode.postCreate()
+	# While the rows are pipelined, the next node may still be processing the streamed rows: the next nodes are set unexecuted once it stopped (see closeStreams)
 	def setOutputAndClean(self, data, affectOthers=True):
 		self.dirty = False
 		if not hasattr(self, 'outArray'): return
+		if self.outputStream is not None and affectOthers:
+			self.deferredOutput = data
+			self.outArray.setData(data, False)
+			self.outArray.setClean()
+			return
 		# Set next nodes to dirty before computing one of them ; otherwise they might consider them having clean data and provide it to next node
 		self.outArray.setDirty()
-		for op in self.getNextPins():
-			op.owningNode().setExecuted(executed=False, propagate=True, setDirty=True)
+		self.setNextNodesUnexecuted(setDirty=True)
 		self.outArray.setData(data, affectOthers)
 		self.outArray.setClean()
 
 	def setExecuted(self, executed=True, propagate=True, setDirty=True):
 		if not executed and setDirty:
 			self.dirty = True
+			self.savedOutputDataFramePath = None
 			self.inputDataFrame = None
 			self.processedDataFrame = None
 			if hasattr(self, 'outArray'):
 				self.outArray.setDirty()
 		self.executed = executed
+		if executed:
+			self.outputsInMemory = False
 		# Propagate to following nodes is execution was unset
 		if propagate and not executed:
-			nextNodes = EvaluationEngine()._impl.getForwardNextLayerNodes(self)
-			for node in [node for node in nextNodes if node != self]:
-				node.setExecuted(False, propagate=True, setDirty=setDirty)
+			self.setNextNodesUnexecuted(setDirty)
+	
+	# Set all the downstream nodes unexecuted: they are visited once (in topological order), even when several paths lead to them
+	def setNextNodesUnexecuted(self, setDirty=True):
+		for node in EvaluationEngine()._impl.getEvaluationOrderIterative(self, forward=True):
+			if callable(getattr(node, 'setExecuted', None)):
+				node.setExecuted(False, propagate=False, setDirty=setDirty)
 	
 	def setupConnections(self):
 		self.inArray.dataBeenSet.connect(self.setNodeDirty)
@@ -126,28 +170,21 @@ class BiitToolNode(NodeBase):
 		if 'executed' in jsonTemplate:
 			self.executed = jsonTemplate['executed']
 
+		if 'nWorkers' in jsonTemplate:
+			self.nWorkers = jsonTemplate['nWorkers']
+
+		if 'profileNextExecution' in jsonTemplate:
+			self.profileNextExecution = jsonTemplate['profileNextExecution']
+
 		if 'parameters' in jsonTemplate:
-			# Hanlde old fils where parameters had only inputs
-			if 'inputs' not in jsonTemplate['parameters'] and 'outputs' not in jsonTemplate['parameters']:
-				jsonTemplate['parameters'] = dict(inputs=jsonTemplate['parameters'], outputs={})
-			
-			for io in ['inputs', 'outputs']:
-				
-				# Instead of overwriting parameters by doing self.parameters = jsonTemplate['parameters']
-				# set the values one by one to avoid troubles with the out-of-date workflows which do not have all the parameters for the node
-				for parameterName, serializedParameter in jsonTemplate['parameters'][io].items():
-					parameters = self.parameters[io]
-					if parameterName not in parameters:
-						print(f'Warning: parameter "{parameterName}" does not exist in node "{self.name}". This means the saved file is out of date and does not correspond to the new inputs outputs definition.')
-						continue
-					parameter = parameters[parameterName]
-					for key, value in serializedParameter.items():
-						parameter[key] = value if key != 'value' or (parameter["dataType"] != "Path" or value is None) else Path(value)
+			self.setSerializedParameters(jsonTemplate['parameters'])
 
 		if 'outputDataFramePath' in jsonTemplate and jsonTemplate['outputDataFramePath'] is not None:
 			outputFolder = self.getOutputMetadataFolderPath()
 			if Path(outputFolder / jsonTemplate['outputDataFramePath']).exists():
-				self.setOutputAndClean(pandas.read_csv(outputFolder / jsonTemplate['outputDataFramePath'], index_col=0), False)
+				# The output DataFrame is only loaded when it is needed (see compute())
+				self.savedOutputDataFramePath = outputFolder / jsonTemplate['outputDataFramePath']
+				self.outArray.setDirty()
 				if 'executed' in jsonTemplate:
 					self.setExecuted(True)
 			else:
@@ -157,6 +194,25 @@ class BiitToolNode(NodeBase):
 		if not self.graph().populating:
 			self.setupConnections()
 
+	# Set the parameters from their serialized values (when the node is loaded, and when a parameter change is undone, see EditorHistory)
+	def setSerializedParameters(self, serializedParameters):
+		# Hanlde old fils where parameters had only inputs
+		if 'inputs' not in serializedParameters and 'outputs' not in serializedParameters:
+			serializedParameters = dict(inputs=serializedParameters, outputs={})
+		
+		for io in ['inputs', 'outputs']:
+			
+			# Instead of overwriting parameters by doing self.parameters = serializedParameters
+			# set the values one by one to avoid troubles with the out-of-date workflows which do not have all the parameters for the node
+			for parameterName, serializedParameter in serializedParameters[io].items():
+				parameters = self.parameters[io]
+				if parameterName not in parameters:
+					print(f'Warning: parameter "{parameterName}" does not exist in node "{self.name}". This means the saved file is out of date and does not correspond to the new inputs outputs definition.')
+					continue
+				parameter = parameters[parameterName]
+				for key, value in serializedParameter.items():
+					parameter[key] = copy.deepcopy(value) if key != 'value' or (parameter["dataType"] != "Path" or value is None) else Path(value)
+
 	# update the parameters['inputs'] from data (but do not overwrite parameters['inputs'] which are already column names):
 	# for all inputs which are auto, set the corresponding parameter to the column name
 	def setParametersFromDataframe(self, data):
@@ -232,7 +288,10 @@ class BiitToolNode(NodeBase):
 	def serialize(self):
 		template = super().serialize()
 		template['executed'] = self.executed
-		parameters = self.parameters.copy()
+		template['nWorkers'] = self.nWorkers
+		template['profileNextExecution'] = self.profileNextExecution
+		# Copy the parameters so that the serialized data (which is kept by EditorHistory) does not change with the node
+		parameters = copy.deepcopy(self.parameters)
 		for io in ['inputs', 'outputs']:
 			for name, parameter in parameters[io].items():
 				if parameter['dataType'] == 'Path' and isinstance(parameter['value'], Path):
@@ -240,12 +299,12 @@ class BiitToolNode(NodeBase):
 		template['parameters'] = parameters
 		
 		# template['folderDataFramePath'] = self.folderDataFramePath
-		outputFolder = self.getOutputMetadataFolderPath()
-		if Path(outputFolder / OUTPUT_DATAFRAME_PATH).exists():
+		outputDataFramePath = getDataFramePath(self.getOutputMetadataFolderPath())
+		if outputDataFramePath is not None:
 			if self.executed:
-				template['outputDataFramePath'] = OUTPUT_DATAFRAME_PATH
+				template['outputDataFramePath'] = outputDataFramePath.name
 			else:
-				Path(outputFolder / OUTPUT_DATAFRAME_PATH).unlink()
+				outputDataFramePath.unlink()
 		return template
 	
 	def hasGeneratedData(self):
@@ -275,61 +334,22 @@ class BiitToolNode(NodeBase):
 	def getSuffixes(self, filename):
 		return filename[filename.index('.'):] if '.' in filename else ''
 
-	# Check for {inputName}|.stem|.name.|.parent.name|.ext|.exts and replace by the real input value|file stem|file name|parent folder name|extension|extensions
-	def replaceInputArgs(self, outputValue, inputGetter):
-		inputGetterStr = lambda name: str(inputGetter(name))
-		for name in re.findall(r'\{([a-zA-Z0-9_-]+)\}', outputValue):
-			input = inputGetterStr(name)
-			if input is not None:
-				outputValue = outputValue.replace(f'{{{name}}}', str(input))
-		for name in re.findall(r'\{([a-zA-Z0-9_-]+).stem\}', outputValue):
-			input = inputGetterStr(name)
-			if input is not None:
-				outputValue = outputValue.replace(f'{{{name}.stem}}', self.getStem(input))
-		for name in re.findall(r'\{([a-zA-Z0-9_-]+).name\}', outputValue):
-			input = inputGetterStr(name)
-			if input is not None:
-				outputValue = outputValue.replace(f'{{{name}.name}}', str(Path(input).name))
-		for name in re.findall(r'\{([a-zA-Z0-9_-]+).parent.name\}', outputValue):
-			input = inputGetterStr(name)
-			if input is not None:
-				outputValue = outputValue.replace(f'{{{name}.parent.name}}', str(Path(input).parent.name))
-		for name in re.findall(r'\{([a-zA-Z0-9_-]+).ext\}', outputValue):
-			input = inputGetterStr(name)
-			if input is not None:
-				outputValue = outputValue.replace(f'{{{name}.ext}}', Path(input).suffix)
-		for name in re.findall(r'\{([a-zA-Z0-9_-]+).exts\}', outputValue):
-			input = inputGetterStr(name)
-			if input is not None:
-				outputValue = outputValue.replace(f'{{{name}.exts}}', ''.join(Path(input).suffixes))
-		return outputValue
-
-	def replaceOutputKeywords(self, value, outputName, output, row, index):
-		finalValue = str(value)
-		
-		# Check that [workflow_folder] and [node_folder] are used at the beginning of the finalValue (if used at all)
-		for name in ['[workflow_folder]', '[node_folder]']:
-			if name in finalValue and not finalValue.startswith(name):
+	# The values of the input parameter for all rows of data, as strings: a string if the parameter is a value, a Series if it is a column
+	def getParameterStrings(self, name, data):
+		if name not in self.parameters['inputs']: return str(None)
+		parameter = self.parameters['inputs'][name]
+		if parameter['type'] == 'value': return str(parameter['value'])
+		return data[parameter['columnName']].astype(str) if parameter['columnName'] in data.columns else str(None)
+
+	# Evaluate the output template on all rows of data, see OutputTemplate
+	def evaluateOutputTemplate(self, value, outputName, output, data):
+		template = str(value)
+		# Check that [workflow_folder] and [node_folder] are used at the beginning of the template (if used at all)
+		for name in OutputTemplate.folders:
+			if name in template and not template.startswith(name):
 				raise Exception(f'Error: the special string "{name}" can only be used at the beginning of the output {outputName}.')
-		
-		# Check for {inputName}|.stem|.name.|.parent.name|.ext|.exts and replace by the real input value|file stem|file name|parent folder name|extension|extensions
-		finalValue = self.replaceInputArgs(finalValue, (lambda name, row=row: self.getParameter(name, row)) )
-		
-		# Check for (columnName) and replace by the row value at this column
-		for columnName in re.findall(r'\(([a-zA-Z0-9_-]+)\)', finalValue):
-			if columnName in row:
-				finalValue = finalValue.replace(f'({columnName})', str(row[columnName]))
-
-		# If finalValue is relative but does not contain [workflow_folder] nor [node_folder]: make it relative to the node_folder
-		if ('[workflow_folder]' not in finalValue) and ('[node_folder]' not in finalValue) and (not Path(finalValue).is_absolute()):
-			finalValue = '[node_folder]/' + finalValue
-		
-		finalValue = finalValue.replace('[workflow_folder]', str(self.getWorkflowDataPath()))
-		finalValue = finalValue.replace('[node_folder]', str(self.getWorkflowDataPath() / self.name))
-		finalValue = finalValue.replace('[index]', str(index))
-		if output.get('extension') is not None:
-			finalValue = finalValue.replace('[ext]', output.get('extension'))
-		return finalValue
+		workflowDataPath = self.getWorkflowDataPath()
+		return getOutputTemplate(template).evaluate(data, lambda name: self.getParameterStrings(name, data), str(workflowDataPath), str(workflowDataPath / self.name), output.get('extension'))
 
 	def prefixExtensionsWithIndex(self, s):
 		pattern = r"(\{\w+\.(exts|ext)\})$"
@@ -338,28 +358,25 @@ class BiitToolNode(NodeBase):
 
 	def setOutputColumns(self, data):
 		if data is None: return
+		# When data is empty, the output columns are set on a single row (index 0)
+		rows = data if not data.empty else pandas.DataFrame(index=[0])
 		for outputName, output in self.parameters['outputs'].items():
 			if output['dataType'] != 'Path': continue
 			columnName = self.getColumnName(outputName)
-			series = pandas.Series(data={}, index=data.index, dtype=str)
-			irs = data.iterrows() if not data.empty else [(0, None)]
-			for index, row in irs:
-
-				if output.get('value') is None:
-					extension = output.get('extension', '') or ''
-					series.at[index] = self.getWorkflowDataPath() / self.name / f'{outputName}_{index}{extension}'
-				else:
-					series.at[index] = self.replaceOutputKeywords(output['value'], outputName, output, row, index)
-				
-			# Remove duplicates by adding [index] before the file extension
-			irs = data.iterrows() if not data.empty else [(0, None)]
-			for index, row in irs:
-				value = series.at[index]
-				# If the value appears more than once in the row: suffix it with index
-				if series.value_counts()[value] > 1:
-					data.at[index, columnName] = self.replaceOutputKeywords(self.prefixExtensionsWithIndex(output['value']), outputName, output, row, index)
-				else:
-					data.at[index, columnName] = value
+			if output.get('value') is None:
+				extension = output.get('extension', '') or ''
+				nodeDataPath = self.getWorkflowDataPath() / self.name
+				values = pandas.Series([nodeDataPath / f'{outputName}_{index}{extension}' for index in rows.index], index=rows.index, dtype=object)
+			else:
+				values = self.evaluateOutputTemplate(output['value'], outputName, output, rows)
+				# Remove duplicates by adding [index] before the file extension
+				duplicated = values.duplicated(keep=False)
+				if duplicated.any():
+					values.loc[duplicated] = self.evaluateOutputTemplate(self.prefixExtensionsWithIndex(output['value']), outputName, output, rows[duplicated]).values
+			if data.empty:
+				data.at[0, columnName] = values.iloc[0]
+			else:
+				data[columnName] = values
 
 	def mergeDataFrames(self, dataFrames):
 		if len(dataFrames)==0: return pandas.DataFrame()
@@ -380,7 +397,7 @@ class BiitToolNode(NodeBase):
 		if self.inputDataFrame is not None: return self.inputDataFrame
 		dataFrames = self.getInputDataFrames()
 		hasMergeDataFrames = callable(getattr(self.tool, 'mergeDataFrames', None))
-		self.inputDataFrame = self.tool.mergeDataFrames(dataFrames, self.getArgs(dataFrame=None, objectify=True, raiseRequiredException=False)) if hasMergeDataFrames else self.mergeDataFrames(dataFrames)
+		self.inputDataFrame = self.tool.mergeDataFrames(dataFrames, self.getArgs(dataFrame=None, raiseRequiredException=False)) if hasMergeDataFrames else self.mergeDataFrames(dataFrames)
 		self.setParametersFromDataframe(self.inputDataFrame)
 		return self.inputDataFrame
 
@@ -388,28 +405,42 @@ class BiitToolNode(NodeBase):
 		if hasattr(self.tool, 'outputMessage'):
 			self.outputMessage = self.tool.outputMessage
 
+	# Load the output DataFrame of the last execution, without changing the state of the following nodes
+	def loadSavedOutputDataFrame(self):
+		path, self.savedOutputDataFramePath = self.savedOutputDataFramePath, None
+		data = loadDataFrame(path)
+		self.dirty = False
+		self.outArray.setData(data, False)
+		self.outArray.setClean()
+		return data
+
 	def compute(self, *args, **kwargs):
 		if not self.dirty: return
+		if self.savedOutputDataFramePath is not None:
+			return self.loadSavedOutputDataFrame()
 		print(f'------------compute: {self.name}')
-		self.inputDataFrame = self.getInputDataFrame()
-		self.processedDataFrame = self.tool.processDataFrame(self.inputDataFrame, self.getArgs(self.inputDataFrame, objectify=True, raiseRequiredException=False)) if callable(getattr(self.tool, 'processDataFrame', None)) else self.inputDataFrame.copy()
-		if self.processedDataFrame.empty:
-			self.processedDataFrame = self.createDataFrameFromParameters()
-		self.setOutputColumns(self.processedDataFrame)
-		self.setOutputMessage()
-		self.setOutputAndClean(self.processedDataFrame)
-		self.regenerateThumbnails(self.processedDataFrame)
+		with Timings.capture() as self.computeMeasurement, captureProfile(self.profileNextExecution) as self.computeProfile:
+			self.inputDataFrame = self.getInputDataFrame()
+			self.processedDataFrame = self.tool.processDataFrame(self.inputDataFrame, self.getArgs(self.inputDataFrame, raiseRequiredException=False)) if callable(getattr(self.tool, 'processDataFrame', None)) else self.inputDataFrame.copy()
+			if self.processedDataFrame.empty:
+				self.processedDataFrame = self.createDataFrameFromParameters()
+			self.setOutputColumns(self.processedDataFrame)
+			self.setOutputMessage()
+			self.setOutputAndClean(self.processedDataFrame)
+			self.regenerateThumbnails(self.processedDataFrame)
 		return self.processedDataFrame
 
-	def setOutputArgsFromDataFrame(self, args, outputData, index):
+	def setOutputArgsFromDataFrame(self, columns, outputData, indices):
 		if outputData is None: return
 		for outputName, output in self.parameters['outputs'].items():
-			if self.getColumnName(outputName) not in outputData.columns: continue # sometimes the output column is not defined, as in LabelStatistics ; since it is only used for the image format, and compute() is not called
-			outputPath = outputData.at[index, self.getColumnName(outputName)]
+			columnName = self.getColumnName(outputName)
+			if columnName not in outputData.columns: continue # sometimes the output column is not defined, as in LabelStatistics ; since it is only used for the image format, and compute() is not called
+			outputPaths = outputData.loc[indices, columnName].tolist()
 			if output['dataType'] == 'Path':
-				outputPath = Path(outputPath)
-				outputPath.parent.mkdir(exist_ok=True, parents=True)    
-			args[outputName] = outputPath
+				outputPaths = [Path(outputPath) for outputPath in outputPaths]
+				for parent in set([outputPath.parent for outputPath in outputPaths]):
+					parent.mkdir(exist_ok=True, parents=True)
+			columns[outputName] = outputPaths
 	
 	def getParameter(self, name, row):
 		if name not in self.parameters['inputs']: return None
@@ -426,42 +457,49 @@ class BiitToolNode(NodeBase):
 	def getWorkflowToolsPath(self):
 		return self.getWorkflowPath() / 'Tools'
 	
-	def setArg(self, args, parameterName, parameter, parameterValue, index):
-		arg = parameterValue
-		if parameter['dataType'] == 'Path' and arg is not None:
-			arg = str(parameterValue)
-			arg = arg.replace('[index]', str(index)) if index is not None else arg
-			arg = arg.replace('[node_folder]', str(self.getWorkflowDataPath() / self.name))
-			arg = arg.replace('[workflow_folder]', str(self.getWorkflowDataPath()))
-			arg = Path(arg)
-		args[parameterName] = arg
-		return
+	def getPathArg(self, value, index, nodeFolder, workflowFolder):
+		if value is None: return None
+		arg = str(value)
+		arg = arg.replace('[index]', str(index)) if index is not None else arg
+		arg = arg.replace('[node_folder]', nodeFolder)
+		arg = arg.replace('[workflow_folder]', workflowFolder)
+		return Path(arg)
 	
-	def parameterIsUndefinedAndRequired(self, parameterName, inputs, row=None):
-		return any([toolInput.get('required') and self.getParameter(parameterName, row) is None for toolInput in inputs if toolInput['name'] == parameterName])
-	
-	def getArgs(self, dataFrame: pandas.DataFrame, objectify=False, raiseRequiredException=True):
-		argsList = []
-		if dataFrame is None or len(dataFrame) == 0:
-			args = {}
-			for parameterName, parameter in self.parameters['inputs'].items():
-				if self.parameterIsUndefinedAndRequired(parameterName, self.tool.inputs) and raiseRequiredException:
-					raise Exception(f'The parameter {parameterName} is undefined, but required.')
-				self.setArg(args, parameterName, parameter, parameter['value'], None)
-			self.setOutputArgsFromDataFrame(args, dataFrame, 0)
-			argsList.append(args)
-		else:
-			for index, row in dataFrame.iterrows():
-				args = {}
-				for parameterName, parameter in self.parameters['inputs'].items():
-					if self.parameterIsUndefinedAndRequired(parameterName, self.tool.inputs, row) and raiseRequiredException:
-						raise Exception(f'The parameter {parameterName} is undefined, but required.')
-					self.setArg(args, parameterName, parameter, self.getParameter(parameterName, row), index)
-				self.setOutputArgsFromDataFrame(args, dataFrame, index)
-				if getattr(self.tool, 'setRowInArgs', False):
-					args['idf_row'] = row
-				argsList.append(args)
-		return [DictToObject(args) for args in argsList] if objectify else argsList
+	# The arguments of all rows, stored by parameter (see ColumnarArgs): the parameters which are the same for all rows are stored once,
+	# the others (the parameters read from a column, the paths containing [index], and the outputs) are stored as lists of values
+	def getArgs(self, dataFrame: pandas.DataFrame, raiseRequiredException=True):
+		requiredInputs = set([toolInput['name'] for toolInput in self.tool.inputs if toolInput.get('required')])
+		workflowFolder = str(self.getWorkflowDataPath())
+		nodeFolder = str(self.getWorkflowDataPath() / self.name)
+		isEmpty = dataFrame is None or len(dataFrame) == 0
+		# When there is no row, the args are computed once from the parameter values (without [index])
+		indices = [None] if isEmpty else list(dataFrame.index)
+		constants, columns = {}, {}
+		for parameterName, parameter in self.parameters['inputs'].items():
+			isColumn = not isEmpty and parameter['type'] != 'value'
+			if isColumn:
+				values = dataFrame[parameter['columnName']].tolist() if parameter['columnName'] in dataFrame.columns else [None] * len(indices)
+				isUndefined = any([value is None for value in values])
+			else:
+				value = parameter['value']
+				isUndefined = parameter['type'] != 'value' or value is None
+			if isUndefined and parameterName in requiredInputs and raiseRequiredException:
+				raise Exception(f'The parameter {parameterName} is undefined, but required.')
+			if parameter['dataType'] == 'Path':
+				if not isColumn and not isEmpty and '[index]' in str(value):
+					isColumn = True
+					values = [value] * len(indices)
+				if isColumn:
+					values = [self.getPathArg(value, index, nodeFolder, workflowFolder) for value, index in zip(values, indices)]
+				else:
+					value = self.getPathArg(value, None, nodeFolder, workflowFolder)
+			if isColumn:
+				columns[parameterName] = values
+			else:
+				constants[parameterName] = value
+		self.setOutputArgsFromDataFrame(columns, dataFrame, [0] if isEmpty else indices)
+		rowDataFrame = dataFrame if getattr(self.tool, 'setRowInArgs', False) and not isEmpty else None
+		return ColumnarArgs(constants, columns, len(indices), rowDataFrame)
 
 	@classmethod
 	def logLine(cls, line):
@@ -478,41 +516,415 @@ class BiitToolNode(NodeBase):
 			print(f"Exception in thread: {e}")
 		return
 	
-	def execute(self):
+	def launchEnvironment(self):
 		additionalInstallCommands = getattr(self.tool, 'additionalInstallCommands', None)
 		additionalActivateCommands = getattr(self.tool, 'additionalActivateCommands', None)
-		self.__class__.environment = environmentManager.createAndLaunch(self.Tool.environment, self.Tool.dependencies, additionalInstallCommands=additionalInstallCommands, additionalActivateCommands=additionalActivateCommands, mainEnvironment='bioimageit')
+		with self.measure('launchEnvironment', environment=self.Tool.environment):
+			self.__class__.environment = environmentManager.createAndLaunch(self.Tool.environment, self.Tool.dependencies, additionalInstallCommands=additionalInstallCommands, additionalActivateCommands=additionalActivateCommands, mainEnvironment='bioimageit')
+		# The node class uses the environment until its last node is deleted (see nodeDeteleted), other node classes can share it
+		environmentManager.acquire(self.__class__.environment, self.__class__)
 		if self.__class__.environment.process is not None:
 			inthread(self.logOutput, self.__class__.environment.process, self.__class__.environment.stopEvent)
-		argsList = self.getArgs(self.processedDataFrame, objectify=False, raiseRequiredException=True)
-		outputFolderPath = self.getOutputDataFolderPath()
-		dataFrames = None
-		if self.Tool.environment != 'bioimageit':
-			dataFrames = self.__class__.environment.execute('PyFlow.ToolManagement.ToolBase', 'processAllData', [self.Tool.moduleImportPath, argsList, outputFolderPath, self.getWorkflowToolsPath()])
-		elif self.tool is not None and hasattr(self.tool, 'processAllData') and callable(self.tool.processAllData):
-			dataFrames = self.tool.processAllData(DictToObject(argsList))
-		if dataFrames is None:
-			dataFrames = [None] * len(argsList)
-		for i, args in enumerate(argsList):
-			# The following log will also update the progress bar
-			self.__class__.log.send(f'Process row [[{i+1}/{len(argsList)}]]')
+
+	# Record the resources used by an event of the current execution (see Timings)
+	def measure(self, event, monitor=None, **fields):
+		return self.timings.measure(event, monitor, **fields) if self.timings is not None else contextlib.nullcontext()
+
+	# The onMeasured callback of the environment calls
+	def getCallRecorder(self, **fields):
+		if self.timings is None: return None
+		timings = self.timings
+		return lambda measurement: timings.recordCall(measurement, **fields)
+
+	# Start recording the telemetry of the execution, with the last compute which prepared it
+	def startTimings(self):
+		self.timings = Timings(self.getOutputMetadataFolderPath())
+		if self.computeMeasurement is not None and len(self.computeMeasurement) > 0:
+			self.timings.record('compute', **self.computeMeasurement)
+		self.computeMeasurement = None
+
+	# The onProfiled callback of the environment calls
+	def getProfileRecorder(self):
+		return self.profile.getRecorder('tool') if self.profile is not None else None
+
+	# Profile the execution when profileNextExecution is set: the host side (the execution and the last compute), and the calls to the tool environment
+	# The profile is saved in the metadata folder of the node once the execution is finished, then profileNextExecution is unset
+	@contextlib.contextmanager
+	def profileExecution(self):
+		if not self.profileNextExecution or self.profile is not None:
+			yield
+			return
+		self.profile = Profile(self.getOutputMetadataFolderPath(), self.name)
+		self.profile.add('host', self.computeProfile)
+		self.computeProfile = None
+		try:
+			with self.profile.capture('host'):
+				yield
+		finally:
+			paths = self.profile.save()
+			self.profile = None
+			self.profileNextExecution = False
+			if len(paths) > 0:
+				self.__class__.log.send(f'The profile of {self.name} was saved in {paths[0].parent}')
+
+	def execute(self):
+		self.startTimings()
+		with self.profileExecution(), self.measure('execute', rows=len(self.processedDataFrame) if self.processedDataFrame is not None else None):
+			if len(self.fusedNodes) > 0:
+				return self.executeFused()
+			self.launchEnvironment()
+			argsList = self.getArgs(self.processedDataFrame, raiseRequiredException=True)
+			outputFolderPath = self.getOutputDataFolderPath()
+			dataFrames = None
 			if self.Tool.environment != 'bioimageit':
-				dataFrames[i] = self.__class__.environment.execute('PyFlow.ToolManagement.ToolBase', 'processData', [self.Tool.moduleImportPath, args, outputFolderPath, self.getWorkflowToolsPath()])
-			elif self.tool is not None and hasattr(self.tool, 'processData') and callable(self.tool.processData):
-				dataFrames[i] = self.tool.processData(DictToObject(args))
-			if self.__class__.environment.stopEvent.is_set(): return False
-		self.setOutputMessage()
-		dataFrames = [df for df in dataFrames if df is not None]
-		if len(dataFrames)>0:
-			dataFrame = pandas.concat(dataFrames)
-			self.setOutputAndClean(dataFrame)
-		self.finishExecution(argsList)
+				dataFrames = self.__class__.environment.execute('PyFlow.ToolManagement.ToolBase', 'processAllData', [self.Tool.moduleImportPath, argsList, outputFolderPath, self.getWorkflowToolsPath()], onMeasured=self.getCallRecorder(), onProfiled=self.getProfileRecorder())
+			elif self.tool is not None and hasattr(self.tool, 'processAllData') and callable(self.tool.processAllData):
+				with self.measure('processAllData'):
+					dataFrames = self.tool.processAllData(argsList)
+			if dataFrames is None:
+				dataFrames = [None] * len(argsList)
+			if not self.processRows(argsList, dataFrames, outputFolderPath):
+				return self.executeAfterInputNode() if self.inputStream is not None and self.inputStream.invalid else False
+			self.setOutputMessage()
+			dataFrames = [df for df in dataFrames if df is not None]
+			if len(dataFrames)>0:
+				dataFrame = pandas.concat(dataFrames)
+				self.setOutputAndClean(dataFrame)
+			self.finishExecution(argsList)
+			return True
+	
+	# Whether the node can be fused with the nodes using the same environment (see ExecutionScheduler.getPipelines):
+	# the tool processes its rows one by one, its class defines the in-memory variant of processData (see ToolTemplate.processDataInMemory),
+	# and its rows do not return DataFrames (the fused rows only return their in-memory outputs, see ToolTemplate.returnsDataFrames)
+	@classmethod
+	def canFuseRows(cls):
+		return definesMethod(cls.Tool, 'processDataInMemory') and not callable(getattr(cls.Tool, 'processAllData', None)) and not getattr(cls.Tool, 'returnsDataFrames', False)
+
+	# Fuse the next nodes (each one having the previous one as single input) with this one: they will be executed with this node, row by row
+	# Returns the number of nodes which could be fused: the rows of a node must be the rows of the previous one once computed
+	# skipIntermediateFiles: do not write the outputs which are only used in memory by the fused nodes
+	# fuseNodes([]) unfuses the nodes
+	def fuseNodes(self, nodes, skipIntermediateFiles=False):
+		self.fusedNodes = []
+		self.fusedSteps = None
+		self.skipIntermediateFiles = skipIntermediateFiles
+		if len(nodes) == 0: return 0
+		self.compute()
+		previousNode = self
+		for node in nodes:
+			node.compute()
+			data, previousData = node.processedDataFrame, previousNode.processedDataFrame
+			if previousData is None or data is None or data.empty or not data.index.equals(previousData.index): break
+			self.fusedNodes.append(node)
+			previousNode = node
+		return len(self.fusedNodes)
+
+	# The description of each fused node for ToolBase.processFusedData: the inputs read from the outputs of a previous node are passed in memory
+	def getFusedSteps(self):
+		nodes = [self] + self.fusedNodes
+		otherNodes = [node for node in GraphManagerSingleton().get().getAllNodes() if isinstance(node, BiitToolNode) and node not in nodes]
+		# The output columns used by the nodes which are not fused must be written, as well as all the outputs of the nodes connected to a node which is not fused
+		usedColumns = set([parameter['columnName'] for node in otherNodes for parameter in node.parameters['inputs'].values() if parameter['type'] != 'value'])
+		connectedNodes = set([previousNode for node in otherNodes for previousNode in node.getPreviousNodes() or []])
+		outputColumns = {}
+		steps = []
+		for n, node in enumerate(nodes):
+			inputs = { name: outputColumns[parameter['columnName']] for name, parameter in node.parameters['inputs'].items() if parameter['type'] != 'value' and parameter['columnName'] in outputColumns }
+			steps.append(dict(moduleImportPath=node.Tool.moduleImportPath, nodeOutputPath=node.getOutputDataFolderPath(), inputs=inputs, savedOutputs=[]))
+			for outputName, output in node.parameters['outputs'].items():
+				if output['dataType'] == 'Path':
+					outputColumns[node.getColumnName(outputName)] = (n, outputName)
+		usedInMemory = set([(stepIndex, outputName) for step in steps for stepIndex, outputName in step['inputs'].values()])
+		for n, node in enumerate(nodes):
+			for outputName in node.parameters['outputs']:
+				isIntermediate = (n, outputName) in usedInMemory and node.getColumnName(outputName) not in usedColumns and node not in connectedNodes
+				if not (self.skipIntermediateFiles and isIntermediate):
+					steps[n]['savedOutputs'].append(outputName)
+		return steps
+
+	# Execute the fused nodes with a single call per row in the environment (ToolBase.processFusedData), then finish the execution of each node
+	# The nodes whose outputs were not all written (see skipIntermediateFiles) stay unexecuted: their output DataFrame would point to missing files,
+	# they will be executed again when needed (their thumbnails are not generated)
+	def executeFused(self):
+		nodes = [self] + self.fusedNodes
+		self.launchEnvironment()
+		argsLists = [node.getArgs(node.processedDataFrame, raiseRequiredException=True) for node in nodes]
+		argsList = FusedArgs(argsLists)
+		self.fusedSteps = self.getFusedSteps()
+		dataFrames = [None] * len(argsList)
+		if not self.processRows(argsList, dataFrames, self.getOutputDataFolderPath()): return False
+		for node, nodeArgsList, step in zip(nodes, argsLists, self.fusedSteps):
+			node.setOutputMessage()
+			node.outputsInMemory = len(step['savedOutputs']) < len(node.parameters['outputs'])
+			if node.outputsInMemory:
+				self.__class__.log.send(f'The outputs of {node.name} were only passed in memory to the next fused nodes, {node.name} stays unexecuted')
+				continue
+			node.finishExecution(nodeArgsList)
+		return True
+
+	# The ToolBase function called for each row and its arguments (the row args are at index 1)
+	def getRowCall(self, outputFolderPath):
+		if len(self.fusedNodes) > 0:
+			return 'processFusedData', [self.fusedSteps, None, self.getWorkflowToolsPath()]
+		return 'processData', [self.Tool.moduleImportPath, None, outputFolderPath, self.getWorkflowToolsPath()]
+
+	# The rows of the input node changed its output DataFrame, so the rows streamed to this node were wrong:
+	# wait until the input node is executed, then compute and execute this node normally (the next nodes of the pipeline do the same)
+	def executeAfterInputNode(self):
+		self.__class__.log.send(f'The rows of {self.name} cannot be pipelined, wait for the previous node to finish')
+		if self.outputStream is not None:
+			self.outputStream.invalidate()
+		# Let the input node know that the streamed rows are not processed anymore, then wait until it is executed
+		self.inputStream.stop()
+		self.inputStream.wait()
+		self.inputStream = None
+		if not all([getattr(node, 'executed', False) for node in self.getPreviousNodes() or []]): return False
+		self.compute()
+		return self.execute()
+
+	# Whether the node can produce rows for the next node as they are processed (see ExecutionScheduler.executePipeline)
+	@classmethod
+	def canStreamRows(cls):
+		return callable(getattr(cls.Tool, 'processData', None)) and not callable(getattr(cls.Tool, 'processAllData', None))
+
+	# Whether the node can process the rows of its input node as they are produced: it must not need the whole input DataFrame
+	@classmethod
+	def canProcessStreamedRows(cls):
+		return cls.canStreamRows() and not getattr(cls.Tool, 'multipleInputs', False) and not any([callable(getattr(cls.Tool, name, None)) for name in ['processDataFrame', 'mergeDataFrames']])
+
+	# Compute both nodes and connect them with a RowStream if row i of this node is row i of the input node
+	# Returns False if the rows cannot be streamed, then this node must be executed once the input node is executed
+	def streamRowsFrom(self, inputNode):
+		if not inputNode.canStreamRows() or not self.canProcessStreamedRows(): return False
+		inputNode.compute()
+		self.compute()
+		inputData, data = inputNode.processedDataFrame, self.processedDataFrame
+		if inputData is None or data is None or data.empty or not data.index.equals(inputData.index): return False
+		self.inputStream = inputNode.outputStream = RowStream(len(data), self.maxStreamedRows)
+		return True
+
+	# Called once the node is executed (or failed): the next node gets its remaining rows, the input node does not wait for this one anymore
+	# If the output changed while the rows were pipelined, wait until the next node stopped processing the streamed rows, then set the next nodes unexecuted
+	def closeStreams(self):
+		if self.outputStream is not None:
+			if self.deferredOutput is not None:
+				outputStream, self.outputStream = self.outputStream, None
+				outputStream.invalidate()
+				outputStream.stopped.wait()
+				data, self.deferredOutput = self.deferredOutput, None
+				self.setOutputAndClean(data)
+				self.outputStream = outputStream
+			self.outputStream.close()
+		if self.inputStream is not None:
+			self.inputStream.stop()
+		self.inputStream = self.outputStream = None
+
+	def reserveStreamedRow(self):
+		if self.outputStream is not None:
+			self.outputStream.reserve()
+
+	# Send the processed row to the next node, unless it returned a DataFrame (then the output DataFrame will change)
+	def streamRow(self, i, result):
+		if self.outputStream is None: return
+		if result is None:
+			self.outputStream.put(i)
+		else:
+			self.outputStream.invalidate()
+
+	def canProcessRowsInParallel(self):
+		return self.Tool.environment != 'bioimageit' and callable(getattr(self.Tool, 'processData', None))
+
+	def getNumberOfWorkers(self, nRows):
+		if not self.canProcessRowsInParallel() or not isinstance(self.__class__.environment, ClientEnvironment): return 1
+		return max(1, min(int(self.nWorkers or 1), nRows, os.cpu_count() or 1))
+
+	def processRow(self, environment, args, outputFolderPath, index=None):
+		if self.Tool.environment != 'bioimageit' or len(self.fusedNodes) > 0:
+			function, callArgs = self.getRowCall(outputFolderPath)
+			callArgs[1] = args
+			return environment.execute('PyFlow.ToolManagement.ToolBase', function, callArgs, onMeasured=self.getCallRecorder(row=index), onProfiled=self.getProfileRecorder())
+		elif self.tool is not None and hasattr(self.tool, 'processData') and callable(self.tool.processData):
+			with self.measure('processData', row=index):
+				return self.tool.processData(DictToObject(args))
+		return None
+
+	# Rows are cached when the tool processes them one by one (processData) and does not disable it with cacheRows = False
+	# The rows of fused nodes are not cached, their outputs may not be written
+	def usesRowCache(self):
+		return len(self.fusedNodes) == 0 and callable(getattr(self.Tool, 'processData', None)) and not callable(getattr(self.Tool, 'processAllData', None)) and getattr(self.Tool, 'cacheRows', True)
+
+	# The tool identity: its import path, its version if any, and the hash of its source file (so that editing the tool invalidates the cache)
+	@classmethod
+	def getToolId(cls):
+		if getattr(cls, 'toolSourceHash', None) is None:
+			try:
+				with open(cls.toolPath, 'rb') as f:
+					cls.toolSourceHash = hashlib.sha1(f.read()).hexdigest()
+			except (TypeError, OSError):
+				cls.toolSourceHash = ''
+		return dict(moduleImportPath=cls.Tool.moduleImportPath, version=getattr(cls.Tool, 'version', None), source=cls.toolSourceHash)
+
+	def getRowOutputPaths(self, args):
+		return [args[outputName] for outputName, output in self.parameters['outputs'].items() if output['dataType'] == 'Path' and args.get(outputName) is not None]
+
+	def getRowCacheKey(self, rowCache, args):
+		inputFileNames = [input['name'] for input in self.Tool.inputs if input['type'] == 'Path']
+		return rowCache.getKey(self.getToolId(), args, inputFileNames)
+
+	# Reuse the results of the rows which were already processed with the same tool, arguments and input files
+	# Returns the cache (None if the tool does not use it), the keys of the rows, and the indices of the rows which must be processed
+	# The rows streamed from the input node are looked up as they arrive, since their input files do not exist yet (see reuseCachedRow())
+	def reuseCachedRows(self, argsList, dataFrames):
+		rows = self.inputStream if self.inputStream is not None else list(range(len(argsList)))
+		if not self.usesRowCache(): return None, {}, rows
+		rowCache = RowCache(self.getOutputMetadataFolderPath())
+		if self.inputStream is not None: return rowCache, {}, rows
+		keys = { i: self.getRowCacheKey(rowCache, argsList.getRow(i)) for i in rows }
+		rows = []
+		for i, key in keys.items():
+			found, result = rowCache.get(key)
+			if found:
+				dataFrames[i] = result
+			else:
+				rows.append(i)
+		if len(rows) < len(argsList):
+			self.__class__.log.send(f'Reuse the results of {len(argsList)-len(rows)} rows which were already processed')
+		return rowCache, keys, rows
+
+	# Process the rows one by one, or in parallel when self.nWorkers > 1 (each worker is a ModuleCaller process of the tool environment)
+	# Rows which were already processed with the same inputs are not processed again (see RowCache)
+	# dataFrames[i] is set to the result of row i, whatever the order in which rows finish
+	# When the executions are pipelined, the rows are taken from self.inputStream and sent to self.outputStream as they are processed
+	# Returns False if the execution was canceled, or if some streamed rows were not received
+	def processRows(self, argsList, dataFrames, outputFolderPath):
+		environment = self.__class__.environment
+		rowCache, keys, rows = self.reuseCachedRows(argsList, dataFrames)
+		nDone = len(argsList) - len(rows)
+		reusedRows = set()
+		nFinished = 0
+		# The streamed rows are looked up in the cache by the worker threads
+		cacheLock = threading.Lock()
+
+		def reuseCachedRow(i):
+			with cacheLock:
+				keys[i] = self.getRowCacheKey(rowCache, argsList.getRow(i))
+				found, result = rowCache.get(keys[i])
+			if found:
+				dataFrames[i] = result
+				reusedRows.add(i)
+			return found
+
+		def rowFinished(n, i):
+			nonlocal nFinished
+			nFinished += 1
+			if rowCache is not None and i not in reusedRows:
+				with cacheLock:
+					rowCache.set(keys[i], self.getRowOutputPaths(argsList.getRow(i)), dataFrames[i])
+			self.streamRow(i, dataFrames[i])
+			# The following log will also update the progress bar
+			self.__class__.log.send(f'Process row [[{nDone+n+1}/{len(argsList)}]]: {self.name}')
+		
+		try:
+			# The rows reused from the cache are sent to the next node first
+			if self.outputStream is not None and self.inputStream is None:
+				for i in sorted(set(range(len(argsList))) - set(rows)):
+					self.reserveStreamedRow()
+					self.streamRow(i, dataFrames[i])
+			reuseRow = reuseCachedRow if self.inputStream is not None and rowCache is not None else None
+			if not self.processPendingRows(environment, argsList, rows, dataFrames, outputFolderPath, rowFinished, reuseRow): return False
+			if nDone + nFinished < len(argsList): return False
+			if rowCache is not None:
+				rowCache.prune()
+		finally:
+			if rowCache is not None:
+				rowCache.save()
+		return True
+
+	# Process the rows argsList.getRow(i) for i in rows, and call rowFinished(n, i) once the nth row (row i) is processed
+	# rows is a list, or the RowStream of the input node
+	# reuseRow(i) returns True if the row was already processed (its result is then in dataFrames[i])
+	def processPendingRows(self, environment, argsList, rows, dataFrames, outputFolderPath, rowFinished, reuseRow=None):
+		if not self.canProcessRowsInParallel() or not isinstance(environment, ClientEnvironment):
+			for n, i in enumerate(rows):
+				self.reserveStreamedRow()
+				if reuseRow is None or not reuseRow(i):
+					dataFrames[i] = self.processRow(environment, argsList.getRow(i), outputFolderPath, i)
+				rowFinished(n, i)
+				if environment.stopEvent.is_set(): return False
+			return True
+		
+		nWorkers = self.getNumberOfWorkers(len(rows))
+		workers = [environment]
+		if nWorkers > 1:
+			additionalActivateCommands = getattr(self.tool, 'additionalActivateCommands', None)
+			workers = environmentManager.launchWorkers(self.Tool.environment, nWorkers, additionalActivateCommands=additionalActivateCommands, logOutput=self.logOutput)
+			self.__class__.log.send(f'Process {len(rows)} rows with {len(workers)} workers')
+		return self.processRowBatches(environment, workers, argsList, rows, dataFrames, outputFolderPath, rowFinished, reuseRow)
+
+	# Stream the rows to the workers with executeBatch: each worker pulls the next rows from a shared queue as it finishes the previous ones
+	# The rows of a RowStream are sent by chunks, as the input node produces them
+	# The results are handled (rowFinished) in this thread, as they arrive
+	def processRowBatches(self, environment, workers, argsList, rows, dataFrames, outputFolderPath, rowFinished, reuseRow=None):
+		pendingRows = queue.Queue()
+		if not isinstance(rows, RowStream):
+			for i in rows:
+				pendingRows.put(i)
+		finishedRows = queue.Queue()
+		stopEvent = threading.Event()
+
+		def getNextRow():
+			if stopEvent.is_set(): return None
+			try:
+				i = pendingRows.get_nowait()
+			except queue.Empty:
+				return None
+			self.reserveStreamedRow()
+			return i, argsList.getRow(i)
+
+		function, args = self.getRowCall(outputFolderPath)
+		onMeasured = self.getCallRecorder()
+		onProfiled = self.getProfileRecorder()
+
+		def processBatch(worker):
+			def executeBatch(nextRows):
+				worker.executeBatch('PyFlow.ToolManagement.ToolBase', function, args, nextRows, rowArgIndex=1, maxInFlight=self.maxRowsInFlight, rowFinished=lambda i, result: finishedRows.put((i, result)), onMeasured=onMeasured, onProfiled=onProfiled)
+			if not isinstance(rows, RowStream):
+				return executeBatch(iter(getNextRow, None))
+			while not stopEvent.is_set() and len(chunk := rows.take(self.maxRowsInFlight, stopEvent)) > 0:
+				pendingChunk = []
+				for i in chunk:
+					self.reserveStreamedRow()
+					if reuseRow is not None and reuseRow(i):
+						finishedRows.put((i, dataFrames[i]))
+					else:
+						pendingChunk.append((i, argsList.getRow(i)))
+				if len(pendingChunk) > 0:
+					executeBatch(pendingChunk)
+
+		executor = ThreadPoolExecutor(max_workers=len(workers))
+		try:
+			futures = [executor.submit(processBatch, worker) for worker in workers]
+			for n in range(len(rows)):
+				while True:
+					try:
+						i, dataFrames[i] = finishedRows.get(timeout=0.1)
+						break
+					except queue.Empty:
+						# Raise the exceptions of the workers, stop if they are all finished (their connections were closed)
+						for future in [future for future in futures if future.done()]:
+							future.result()
+						if environment.stopEvent.is_set() or all([future.done() for future in futures]) and finishedRows.empty(): return False
+				rowFinished(n, i)
+				if environment.stopEvent.is_set(): return False
+		finally:
+			stopEvent.set()
+			executor.shutdown(wait=True, cancel_futures=True)
 		return True
 	
 	def saveArgsList(self, argsList, outputFolder):
 		if argsList is None: return
 		with open(outputFolder / PARAMETERS_PATH, 'w') as f:
-			json.dump(argsList, f, default=lambda value: value.to_json(default_handler=str) if callable(getattr(value, 'to_json', None)) else str(value))
+			json.dump(argsList.toList(), f, default=lambda value: value.to_json(default_handler=str) if callable(getattr(value, 'to_json', None)) else str(value))
 
 	def finishExecution(self, argsList):
 		outputFolder = self.getOutputMetadataFolderPath()
@@ -522,7 +934,7 @@ class BiitToolNode(NodeBase):
 		self.regenerateThumbnails(outputData)
 
 		if isinstance(outputData, pandas.DataFrame):
-			outputData.to_csv(outputFolder / OUTPUT_DATAFRAME_PATH)
+			saveDataFrame(outputData, outputFolder)
 		
 		self.saveArgsList(argsList, outputFolder)
 		self.setExecuted(True)
@@ -553,7 +965,14 @@ class BiitToolNode(NodeBase):
 		if cls.environment is None or cls.environment.name == 'bioimageit': return
 		cls.nInstanciatedNodes = max(cls.nInstanciatedNodes-1, 0)
 		if cls.nInstanciatedNodes == 0:
-			cls.exitTool()
+			# Keep the environment warm in the environment manager pool once no node class uses it, it will be exited once evicted
+			environmentManager.release(cls.environment, cls)
+
+	# Launch the tool environment in advance (in a new thread), if it is installed
+	@classmethod
+	def prelaunchEnvironment(cls):
+		if cls.Tool.environment == 'bioimageit': return
+		environmentManager.prelaunch(cls.Tool.environment, cls.Tool.dependencies, additionalActivateCommands=getattr(cls.Tool, 'additionalActivateCommands', None), mainEnvironment='bioimageit', logOutput=cls.logOutput)
 
 	@classmethod
 	def exitTool(cls):
@@ -575,6 +994,17 @@ class BiitToolNode(NodeBase):
 	def category(cls):
 		return '|'.join(cls.Tool.categories)
 	
+# Launch the environments of the nodes which are not executed yet, so that they are ready when the nodes are executed
+# The environments of the first nodes are launched first, one class per environment, and at most environmentManager.maxIdleEnvironments of them
+def prelaunchEnvironments(nodes):
+	nodeClasses = {}
+	for node in nodes:
+		if isinstance(node, BiitToolNode) and not node.executed and node.Tool.environment != 'bioimageit':
+			nodeClasses.setdefault(node.Tool.environment, node.__class__)
+	maxEnvironments = environmentManager.maxIdleEnvironments
+	for nodeClass in list(nodeClasses.values())[:maxEnvironments]:
+		nodeClass.prelaunchEnvironment()
+
 def createNode(modulePath, moduleImportPath, module):
 	# Hide the version number for now, but it would be nice to add it later when there are multiple versions of the tool
 	# toolId = f'{tool.info.id}_v{tool.info.version}'
@@ -588,7 +1018,17 @@ def createNode(modulePath, moduleImportPath, module):
 		if not hasattr(module.Tool, attr):
 			raise Exception(f'Tool {moduleImportPath} has no attribute {attr}.')
 	# Creates a new class type named {modulePath.stem} which inherits BiitToolNode and have a Tool attribute
-	toolClass = type(modulePath.stem, (BiitToolNode, ), dict(Tool=module.Tool))
+	toolClass = type(modulePath.stem, (BiitToolNode, ), dict(Tool=module.Tool, toolPath=modulePath))
+	return toolClass
+
+# Same as createNode, but the tool module is only imported when the node is instantiated (or when the tool attributes which are not in the manifest are needed)
+# toolInfo is the description of the tool extracted from its source code (see ToolManifest)
+def createLazyNode(modulePath, moduleImportPath, toolInfo):
+	tool = LazyTool(moduleImportPath, toolInfo, dict(environment='bioimageit', dependencies=dict()))
+	for attr in ['name', 'description']:
+		if not hasattr(tool, attr):
+			raise Exception(f'Tool {moduleImportPath} has no attribute {attr}.')
+	toolClass = type(modulePath.stem, (BiitToolNode, ), dict(Tool=tool, toolPath=modulePath))
 	return toolClass
 
 attachLogHandler(BiitToolNode.logLine)
\ No newline at end of file
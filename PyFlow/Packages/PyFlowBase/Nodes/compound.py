@@ -53,7 +53,18 @@ class compound(NodeBase):
     @rawGraph.setter
     def rawGraph(self, newGraph):
         assert newGraph is not None
+        if self._rawGraph is not None:
+            self._rawGraph.tickingNodesChanged.disconnect(self.onRawGraphTickingNodesChanged)
         self._rawGraph = newGraph
+        newGraph.tickingNodesChanged.connect(self.onRawGraphTickingNodesChanged)
+        self.updateTicking()
+
+    # The compound node is only ticked while some nodes of its graph need it
+    def needsTick(self):
+        return (self.rawGraph is not None and self.rawGraph.hasTickingNodes()) or self.hasTickReceivers()
+
+    def onRawGraphTickingNodesChanged(self, ticking):
+        self.updateTicking()
 
     def syncPins(self):
         # look for graph nodes pins was added
@@ -55,9 +55,14 @@ class delay(NodeBase):
     def description():
         return "Delayed call"
 
+    # The delay is only ticked while a call is pending
+    def needsTick(self):
+        return self.process or self.hasTickReceivers()
+
     def callAndReset(self):
         self.process = False
         self._total = 0.0
+        self.updateTicking()
         self.out0.call()
 
     def Tick(self, delta):
@@ -70,3 +75,4 @@ class delay(NodeBase):
         self._currentDelay = self.delay.getData()
         if not self.process:
             self.process = True
+            self.updateTicking()
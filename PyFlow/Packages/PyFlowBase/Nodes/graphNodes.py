@@ -20,6 +20,17 @@ from PyFlow.Core.Common import *
 import json
 
 
+# Creates or removes the companion pins of the compound node owning the graph of node
+# (the compound node is not ticked anymore when nothing in its graph needs it, so it can't sync them on Tick)
+def syncCompoundPins(node):
+    if node.graph is None or node.graph() is None:
+        return
+    graph = node.graph()
+    for compoundNode in graph.graphManager.getAllNodes(classNameFilters=["compound"]):
+        if compoundNode.rawGraph is graph:
+            compoundNode.syncPins()
+
+
 class graphInputs(NodeBase):
     """Represents a group of input pins on compound node
     """
@@ -64,8 +75,13 @@ class graphInputs(NodeBase):
         p.enableOptions(PinOptions.RenamingEnabled | PinOptions.Dynamic)
         if dataType == "AnyPin":
             p.enableOptions(PinOptions.AllowAny | PinOptions.DictElementSupported)
+        p.killed.connect(self.onPinKilled)
+        syncCompoundPins(self)
         return p
 
+    def onPinKilled(self, pin):
+        syncCompoundPins(self)
+
     def compute(self, *args, **kwargs):
         for o in self.outputs.values():
             for i in o.affected_by:
@@ -147,8 +163,13 @@ class graphOutputs(NodeBase):
         p.enableOptions(PinOptions.RenamingEnabled | PinOptions.Dynamic)
         if dataType == "AnyPin":
             p.enableOptions(PinOptions.AllowAny | PinOptions.DictElementSupported)
+        p.killed.connect(self.onPinKilled)
+        syncCompoundPins(self)
         return p
 
+    def onPinKilled(self, pin):
+        syncCompoundPins(self)
+
     def compute(self, *args, **kwargs):
         compoundNode = None
         for i in self.inputs.values():
@@ -59,12 +59,18 @@ class retriggerableDelay(NodeBase):
             if self._total >= self._currentDelay:
                 self.callAndReset()
 
+    # The delay is only ticked while a call is pending
+    def needsTick(self):
+        return self.process or self.hasTickReceivers()
+
     def callAndReset(self):
         self.out0.call()
         self.process = False
         self._total = 0.0
+        self.updateTicking()
 
     def compute(self, *args, **kwargs):
         self._total = 0.0
         self.process = True
         self._currentDelay = self.delay.getData()
+        self.updateTicking()
@@ -53,13 +53,19 @@ class timer(NodeBase):
         helper.addOutputStruct(StructureType.Single)
         return helper
 
+    # The timer is only ticked while it is running
+    def needsTick(self):
+        return self.bWorking or self.hasTickReceivers()
+
     def stop(self, *args, **kwargs):
         self.bWorking = False
         self.accum = 0.0
+        self.updateTicking()
 
     def start(self, *args, **kwargs):
         self.accum = 0.0
         self.bWorking = True
+        self.updateTicking()
 
     @staticmethod
     def category():
@@ -68,6 +68,40 @@ class GeneralPreferences(CategoryWidgetBase):
 
         self.historyDepth.editingFinished.connect(setHistoryCapacity)
         commonCategory.addWidget("History depth", self.historyDepth)
+
+        # Execution
+        self.maxActiveEnvironments = QSpinBox()
+        self.maxActiveEnvironments.setRange(1, 64)
+        self.maxActiveEnvironments.setToolTip("Maximum number of nodes executed at the same time (independent branches of the workflow are executed concurrently, each node in its own environment).")
+        commonCategory.addWidget("Parallel nodes", self.maxActiveEnvironments)
+
+        self.pipelineRows = QCheckBox()
+        self.pipelineRows.setToolTip("Process the rows of a node as soon as the previous node produced them, instead of waiting for the whole previous node (only for nodes which process their rows one by one, requires several parallel nodes).")
+        commonCategory.addWidget("Pipeline rows", self.pipelineRows)
+
+        self.fuseNodes = QCheckBox()
+        self.fuseNodes.setToolTip("Execute the chains of nodes using the same environment with a single call per row, passing the intermediate images in memory (only for tools which support it).")
+        commonCategory.addWidget("Fuse nodes", self.fuseNodes)
+
+        self.skipIntermediateFiles = QCheckBox()
+        self.skipIntermediateFiles.setToolTip("Do not write the outputs of fused nodes which are only used in memory by the next fused nodes. Those nodes stay unexecuted, they are executed again when their outputs are needed.")
+        commonCategory.addWidget("Skip intermediate files", self.skipIntermediateFiles)
+
+        self.prelaunchEnvironments = QCheckBox()
+        self.prelaunchEnvironments.setToolTip("Launch the environments of the nodes to execute as soon as a workflow is opened.")
+        commonCategory.addWidget("Prelaunch environments", self.prelaunchEnvironments)
+
+        self.idleEnvironmentsTimeout = QSpinBox()
+        self.idleEnvironmentsTimeout.setRange(0, 24 * 60)
+        self.idleEnvironmentsTimeout.setSuffix(" min")
+        self.idleEnvironmentsTimeout.setToolTip("Environments which are not used anymore are kept launched during this time (0 means until they are evicted to free memory).")
+        commonCategory.addWidget("Idle environments timeout", self.idleEnvironmentsTimeout)
+
+        self.environmentsMemoryLimit = QSpinBox()
+        self.environmentsMemoryLimit.setRange(0, 1024)
+        self.environmentsMemoryLimit.setSuffix(" GB")
+        self.environmentsMemoryLimit.setToolTip("Idle environments are exited when all environments use more memory than this limit (0 means no limit).")
+        commonCategory.addWidget("Environments memory limit", self.environmentsMemoryLimit)
         
         # Update
         self.versionSelector = QComboBox()
@@ -116,6 +150,13 @@ class GeneralPreferences(CategoryWidgetBase):
     def initDefaults(self, settings):
         settings.setValue("EditorCmd", "code @FILE")
         settings.setValue("HistoryDepth", 50)
+        settings.setValue("MaxActiveEnvironments", 1)
+        settings.setValue("PipelineRows", False)
+        settings.setValue("FuseNodes", False)
+        settings.setValue("SkipIntermediateFiles", False)
+        settings.setValue("PrelaunchEnvironments", True)
+        settings.setValue("IdleEnvironmentsTimeout", 15)
+        settings.setValue("EnvironmentsMemoryLimit", 0)
         
         settings.setValue("BioImageITVersion", self.autoUpdateString)
 
@@ -133,6 +174,13 @@ class GeneralPreferences(CategoryWidgetBase):
         settings.setValue("ImageViewerCmd", self.leImageViewer.text())
         settings.setValue("ImageViewerAlwaysInstallDependencies", 'Yes' if self.alwaysInstallNapariDependencies.checkState() == QtCore.Qt.CheckState.Checked else 'No' if self.alwaysInstallNapariDependencies.checkState() == QtCore.Qt.CheckState.Unchecked else 'Unknown')
         settings.setValue("HistoryDepth", self.historyDepth.value())
+        settings.setValue("MaxActiveEnvironments", self.maxActiveEnvironments.value())
+        settings.setValue("PipelineRows", self.pipelineRows.isChecked())
+        settings.setValue("FuseNodes", self.fuseNodes.isChecked())
+        settings.setValue("SkipIntermediateFiles", self.skipIntermediateFiles.isChecked())
+        settings.setValue("PrelaunchEnvironments", self.prelaunchEnvironments.isChecked())
+        settings.setValue("IdleEnvironmentsTimeout", self.idleEnvironmentsTimeout.value())
+        settings.setValue("EnvironmentsMemoryLimit", self.environmentsMemoryLimit.value())
 
         settings.setValue("BioImageITVersion", self.versionSelector.currentText())
 
@@ -162,6 +210,13 @@ class GeneralPreferences(CategoryWidgetBase):
 
         try:
             self.historyDepth.setValue(int(settings.value("HistoryDepth")))
+            self.maxActiveEnvironments.setValue(int(settings.value("MaxActiveEnvironments") or 1))
+            self.pipelineRows.setChecked(settings.value("PipelineRows") == "true")
+            self.fuseNodes.setChecked(settings.value("FuseNodes") == "true")
+            self.skipIntermediateFiles.setChecked(settings.value("SkipIntermediateFiles") == "true")
+            self.prelaunchEnvironments.setChecked(settings.value("PrelaunchEnvironments") != "false")
+            self.idleEnvironmentsTimeout.setValue(int(settings.value("IdleEnvironmentsTimeout") or 0))
+            self.environmentsMemoryLimit.setValue(int(settings.value("EnvironmentsMemoryLimit") or 0))
 
             self.updateVersionSelector(settings.value("BioImageITVersion"))
 
@@ -1,8 +1,9 @@
+from collections import OrderedDict
 from PySide6.QtCore import QPersistentModelIndex
 import pandas as pd
 from pathlib import Path
-from qtpy.QtGui import QPixmap
-from qtpy.QtCore import QAbstractTableModel, Qt, QModelIndex
+from qtpy.QtGui import QPixmap, QImage, QColor
+from qtpy.QtCore import QAbstractTableModel, Qt, QModelIndex, QObject, QRunnable, QThreadPool, Signal
 from PyFlow.Core.GraphManager import GraphManagerSingleton
 from PyFlow.ThumbnailManagement.ThumbnailGenerator import ThumbnailGenerator
 
@@ -24,25 +25,169 @@ from PyFlow.ThumbnailManagement.ThumbnailGenerator import ThumbnailGenerator
 #     def displayText(self, value, locale):
 #         return str(value)
 
+class PixmapLoader(QRunnable):
+    """Decode a thumbnail in the thread pool of the PixmapCache"""
+
+    def __init__(self, cache, path: str):
+        super().__init__()
+        self.cache = cache
+        self.path = path
+
+    def run(self):
+        # QImage (unlike QPixmap) can be used outside the main thread
+        self.cache.imageLoaded.emit(self.path, QImage(self.path))
+
+class PixmapCache(QObject):
+    """LRU cache of the thumbnail pixmaps shared by all the models, bounded by the size of the pixmaps (maxBytes)
+
+    The thumbnails are decoded in a QThreadPool: getPixmap() returns None until the thumbnail is decoded, then loaded is emitted with its path
+    """
+
+    loaded = Signal(str)
+    imageLoaded = Signal(str, QImage)
+    maxBytes = 128 * 1024 * 1024
+    instance = None
+
+    def __init__(self):
+        super().__init__()
+        self.pixmaps: OrderedDict[str, QPixmap] = OrderedDict()
+        self.nBytes = 0
+        self.pending = set()
+        self.failed = set()
+        self.threadPool = QThreadPool(self)
+        self.imageLoaded.connect(self.onImageLoaded)
+
+    @classmethod
+    def get(cls):
+        if cls.instance is None:
+            cls.instance = PixmapCache()
+        return cls.instance
+
+    @staticmethod
+    def getSize(pixmap: QPixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    # Returns the pixmap if it is decoded, otherwise starts decoding it and returns None
+    def getPixmap(self, path: str):
+        if path in self.pixmaps:
+            self.pixmaps.move_to_end(path)
+            return self.pixmaps[path]
+        if path not in self.pending and path not in self.failed:
+            self.pending.add(path)
+            self.threadPool.start(PixmapLoader(self, path))
+        return None
+
+    def hasFailed(self, path: str):
+        return path in self.failed
+
+    def onImageLoaded(self, path: str, image: QImage):
+        self.pending.discard(path)
+        if image.isNull():
+            self.failed.add(path)
+        else:
+            pixmap = QPixmap.fromImage(image)
+            self.remove(path)
+            self.pixmaps[path] = pixmap
+            self.nBytes += self.getSize(pixmap)
+            while self.nBytes > self.maxBytes and len(self.pixmaps) > 1:
+                _, evicted = self.pixmaps.popitem(last=False)
+                self.nBytes -= self.getSize(evicted)
+        self.loaded.emit(path)
+
+    # Forget the pixmap (when the thumbnail file is regenerated)
+    def remove(self, path: str):
+        self.failed.discard(path)
+        if path in self.pixmaps:
+            self.nBytes -= self.getSize(self.pixmaps.pop(path))
+
 class PandasModel(QAbstractTableModel):
-    """A model to interface a Qt view with pandas dataframe """
+    """A model to interface a Qt view with pandas dataframe 
+    
+    The data displayed in each column (texts, thumbnails) is computed for the whole column when it is first displayed,
+    and the thumbnails are decoded asynchronously by the PixmapCache (a placeholder is displayed meanwhile)
+    """
     
     # RowsThreshold = 100
+    placeholder = None
 
     def __init__(self, dataframe: pd.DataFrame=None, parent=None):
         QAbstractTableModel.__init__(self, parent)
         self._rowCount = 0
-        self.pixmaps = {}
-        self.setDataFrame(dataframe)
         self.graphManager = GraphManagerSingleton().get()
+        self.setDataFrame(dataframe)
+        PixmapCache.get().loaded.connect(self.onPixmapLoaded)
+
+    # Stop listening to the PixmapCache (shared by all models) once the model is replaced
+    def close(self):
+        PixmapCache.get().loaded.disconnect(self.onPixmapLoaded)
     
     def setDataFrame(self, dataFrame: pd.DataFrame = None):
         self._dataframe = dataFrame if dataFrame is not None else pd.DataFrame()
         self.beginResetModel()
         self._rowCount = 0
+        self.columns = {}
+        self.thumbnailCells = {}
+        self.imageCells = {}
         self.endResetModel()
         return
     
+    @classmethod
+    def getPlaceholder(cls):
+        if cls.placeholder is None:
+            cls.placeholder = QPixmap(128, 128)
+            cls.placeholder.fill(QColor(128, 128, 128, 40))
+        return cls.placeholder
+
+    # Compute the texts and thumbnails of all the cells of the column
+    def getColumn(self, columnIndex: int):
+        if columnIndex in self.columns: return self.columns[columnIndex]
+        values = self._dataframe.iloc[:, columnIndex]
+        isPath = values.map(lambda value: isinstance(value, (Path, str)))
+        paths = values[isPath].astype(str)
+        workflowPath = Path(self.graphManager.workflowPath) if self.graphManager.workflowPath is not None else None
+        uniquePaths = paths.unique()
+        names = { path: Path(path).name for path in uniquePaths }
+        inWorkflow = { path: workflowPath is not None and workflowPath in Path(path).parents for path in uniquePaths }
+        strings = [str(value) for value in values]
+        texts = [names[string] if isPathValue and inWorkflow[string] else string for string, isPathValue in zip(strings, isPath)]
+        imagePaths = [path for path in uniquePaths if path.lower().endswith(tuple(ThumbnailGenerator.imageSuffixes))]
+        thumbnailPaths = ThumbnailGenerator.get().getThumbnailPaths(imagePaths)
+        thumbnails = [str(thumbnailPaths[string]) if isPathValue and string in thumbnailPaths else None for string, isPathValue in zip(strings, isPath)]
+        isImagePath = set(imagePaths)
+        for row, (string, isPathValue, thumbnail) in enumerate(zip(strings, isPath, thumbnails)):
+            if isPathValue and string in isImagePath:
+                self.imageCells.setdefault(string, []).append((row, columnIndex))
+            if thumbnail is not None:
+                self.thumbnailCells.setdefault(thumbnail, []).append((row, columnIndex))
+        self.columns[columnIndex] = dict(strings=strings, texts=texts, names=[names.get(string) for string in strings], thumbnails=thumbnails)
+        return self.columns[columnIndex]
+
+    # Some thumbnails were generated (a chunk of the images of a node, see ThumbnailGenerator.finished): only update the cells of the computed columns which display those images
+    # The chunks of other workflows are ignored, those of other nodes only update the cells displaying the same images ; the columns which are not computed yet read the thumbnails from the index
+    def updateThumbnails(self, results):
+        workflowPath = self.graphManager.workflowPath
+        if workflowPath is None or results.get('workflowPath') is None or Path(results['workflowPath']).resolve() != Path(workflowPath).resolve(): return
+        for path in results['paths']:
+            if isinstance(path, Exception): continue
+            imagePath, thumbnail = str(path[0]), str(path[1])
+            PixmapCache.get().remove(thumbnail)
+            for row, columnIndex in self.imageCells.get(imagePath, []):
+                thumbnails = self.columns[columnIndex]['thumbnails']
+                if thumbnails[row] != thumbnail:
+                    if thumbnails[row] is not None:
+                        self.thumbnailCells[thumbnails[row]].remove((row, columnIndex))
+                    thumbnails[row] = thumbnail
+                    self.thumbnailCells.setdefault(thumbnail, []).append((row, columnIndex))
+                if row < self._rowCount:
+                    index = self.index(row, columnIndex)
+                    self.dataChanged.emit(index, index)
+
+    def onPixmapLoaded(self, path: str):
+        for row, column in self.thumbnailCells.get(path, []):
+            if row < self._rowCount:
+                index = self.index(row, column)
+                self.dataChanged.emit(index, index)
+
     def canFetchMore(self, parent=QModelIndex()) -> bool:
         # return False if parent.isValid() or len(self._dataframe) < PandasModel.RowsThreshold else self._rowCount < len(self._dataframe)
         return False if parent.isValid() else self._rowCount < len(self._dataframe)
@@ -85,42 +230,29 @@ class PandasModel(QAbstractTableModel):
         if not index.isValid():
             return None
         
-        value = self._dataframe.iloc[index.row(), index.column()]
-        
-        # if role == QtCore.Qt.DisplayRole:
-        #     return value
+        column = self.getColumn(index.column())
+        thumbnail = column['thumbnails'][index.row()]
         
-        path = ThumbnailGenerator.get().getThumbnailPath(value)
-        
-        if path is not None and path.exists() and path.is_file() and path.suffix in ['.png', '.jpg', '.jpeg', '.bmp', '.dib', '.gif', '.tiff', '.tif']:
-    
-            pixmap = self.pixmaps[str(path)] if str(path) in self.pixmaps else QPixmap(path)
-            self.pixmaps[str(path)] = pixmap
-            if role == Qt.DecorationRole:
-                return pixmap
+        if thumbnail is not None and not PixmapCache.get().hasFailed(thumbnail):
 
-            if role == Qt.SizeHintRole:
-                return pixmap.size()
+            if role == Qt.DecorationRole or role == Qt.SizeHintRole:
+                pixmap = PixmapCache.get().getPixmap(thumbnail) or self.getPlaceholder()
+                return pixmap if role == Qt.DecorationRole else pixmap.size()
             
             if role == Qt.DisplayRole:
-                return Path(value).name
+                return column['names'][index.row()]
             
             if role == Qt.UserRole:
-                return Path(value).resolve()
+                return Path(self._dataframe.iloc[index.row(), index.column()]).resolve()
             
             # if role == Qt.TextAlignmentRole:
             #     return Qt.AlignBottom
 
-        elif path is not None and path.exists() and path.is_file():
-            if role == Qt.UserRole:
-                return Path(value).resolve()
         elif role == Qt.DisplayRole:
-            if ( isinstance(value, Path) or isinstance(value, str) ) and Path(self.graphManager.workflowPath) in Path(value).parents:
-                return Path(value).name
-            return str(value)
+            return column['texts'][index.row()]
         
         if role == Qt.ToolTipRole:
-            return str(value)
+            return column['strings'][index.row()]
 
         if role == Qt.TextAlignmentRole:
             return Qt.AlignRight
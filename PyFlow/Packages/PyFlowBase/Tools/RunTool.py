@@ -33,6 +33,8 @@ from qtpy.QtWidgets import *
 
 from PyFlow import PARAMETERS_PATH
 from PyFlow.ToolManagement.EnvironmentManager import ExecutionException
+from PyFlow.ToolManagement.ExecutionScheduler import ExecutionScheduler
+from PyFlow.ConfigManager import ConfigManager
 from PyFlow.ErrorManager import ErrorManager
 from PyFlow.UI.Tool.Tool import ShelfTool
 from PyFlow.UI.Widgets import BlueprintCanvas
@@ -76,62 +78,78 @@ class ProgressDialog(QWidget):
         self.setWindowTitle('Execution progression')
         self.setWindowModality(QtCore.Qt.ApplicationModal)
 
-        self.nodeName = None
-        self.currentNode = 0    # The number of the node being processed
-        self.currentRow = 0     # The number of the dataFrame row being processed for this node
-        self.currentStep = 0    # The number of the step being executed for this tool
+        # The progress state is only modified in the main thread (see log): the nodes can be executed in parallel (see ExecutionScheduler)
+        self.nodeName = None    # The last node which started
         self.nNodes = 0         # The number of nodes to process
-        self.nRows = 0          # The number of dataFrame rows to process for this node
-        self.nSteps = 0         # The number of steps for this tool
+        self.nodeProgress = {}  # Node name -> progress of the nodes which started (see getNodeProgress)
 
     def progress(self, label, value):
         self.label.setText(label)
         self.pbar.setValue(value)
 
     def resetProgressPercentage(self):
-        self.currentNode = 0
-        self.currentRow = 0
-        self.currentStep = 0
+        self.nodeName = None
         self.nNodes = None
-        self.nRows = None
-        self.nSteps = None
+        self.nodeProgress = {}
+
+    # n: the number of the node, row: the number of processed dataFrame rows, step: the number of executed steps of the tool for the current row
+    @staticmethod
+    def getNodeProgress(n):
+        return dict(n=n, row=0, nRows=None, step=0, nSteps=None, finished=False)
+
+    # The fraction of the node which was processed
+    @staticmethod
+    def getNodeFraction(progress):
+        if progress['finished']: return 1
+        if progress['nRows'] is None or progress['nRows'] == 0: return 0
+        fraction = progress['row'] / progress['nRows']
+        if progress['nSteps'] is None or progress['nSteps'] == 0: return fraction
+        return fraction + progress['step'] / progress['nSteps'] / progress['nRows']
 
     def getProgressPercentage(self):
         if self.nNodes is None or self.nNodes == 0: return 0
         nodePercentage = 100.0 / (self.nNodes+1)
-        percentage = self.currentNode * nodePercentage
-        if self.nRows is None: return percentage
-        percentage += self.currentRow * nodePercentage / self.nRows
-        if self.nSteps is None: return percentage
-        rowPercentage = nodePercentage / self.nRows
-        percentage += self.currentStep * rowPercentage / self.nSteps
-        return percentage
-    
-    def logProgress(self, message=None, percentage=None):
-        percentage = self.getProgressPercentage() if percentage is None else percentage
-        message = f'Running node {self.nodeName} ({self.currentNode+1} / {self.nNodes})' if message is None else message
-        inmain(lambda: self.progress(message, int(percentage)))
+        return min(100, sum([self.getNodeFraction(progress) for progress in self.nodeProgress.values()]) * nodePercentage)
+    
+    def logProgress(self, nodeName=None):
+        nodeName = nodeName or self.nodeName
+        if nodeName not in self.nodeProgress: return
+        self.progress(f'Running node {nodeName} ({self.nodeProgress[nodeName]["n"]+1} / {self.nNodes})', int(self.getProgressPercentage()))
     
     def parseInts(self, tuple):
         return [int(v) for v in tuple]
     
+    def nodeFinished(self, nodeName):
+        if nodeName not in self.nodeProgress: return
+        self.nodeProgress[nodeName]['finished'] = True
+        self.logProgress(nodeName)
+
     def log(self, message):
+        inmain(lambda: self.logInMain(message))
+
+    def logInMain(self, message):
         if message == self.allNodesProcessedMessage:
-            inmain(lambda: self.progress(message, int(100)))
+            self.progress(message, int(100))
         # Find progess prints: string in the format [[current/total]] where current is the current node, row or process step ; and total the total number of nodes, rows or process steps.
         progressPrints = re.findall(r'\[\[(\d+)\/(\d+)\]\]', message)
         if len(progressPrints) > 0:
             # Remove the [[ and ]] sequences from message
             message = re.sub(r'\[\[|\]\]', '', message)
+            current, total = self.parseInts(progressPrints[0])
+            # The node and row messages end with the node name, the step messages are printed by the tools: they are attributed to the last node which started
+            nodeName = message.split(': ')[-1] if message.startswith('Process node') or message.startswith('Process row') else self.nodeName
             if message.startswith('Process node'):
-                self.nodeName = message.split(': ')[-1]
-                self.currentNode, self.nNodes = self.parseInts(progressPrints[0])
-            elif message.startswith('Process row'):
-                self.currentRow, self.nRows = self.parseInts(progressPrints[0])
-            else:
-                self.currentStep, self.nSteps = self.parseInts(progressPrints[0])
-            self.logProgress()
-        inmain(lambda: self.logView.append(message))
+                self.nodeName = nodeName
+                self.nNodes = total
+                self.nodeProgress[nodeName] = self.getNodeProgress(current)
+            elif nodeName in self.nodeProgress:
+                progress = self.nodeProgress[nodeName]
+                if message.startswith('Process row'):
+                    progress['row'], progress['nRows'], progress['step'] = current, total, 0
+                else:
+                    progress['step'], progress['nSteps'] = current, total
+            self.logProgress(nodeName)
+        self.logView.append(message)
     
     def setCancelButtonToOk(self):
         self.cancelButton.setText('Close')
@@ -156,7 +174,7 @@ class RunTool(ShelfTool):
 
         self.executing = False
         self.logTool = None
-        self.currentNode = None
+        self.scheduler = None
         self.__class__.progressDialog = ProgressDialog(self)
         BiitToolNode.log.connect(self.log)
 
@@ -177,13 +195,11 @@ class RunTool(ShelfTool):
         RunTool.uuidToNodes = { str(node.uid): node for node in nodes}
         return RunTool.uuidToNodes
     
-    @staticmethod
-    def isBiitLib(node):
-        return node.lib == 'BiitLib'
-    
-    @staticmethod
-    def wasExecuted(node):
-        return getattr(node, 'executed', False)
+    # The readiness helpers are shared with the ExecutionScheduler
+    isBiitLib = staticmethod(ExecutionScheduler.isBiitLib)
+    wasExecuted = staticmethod(ExecutionScheduler.wasExecuted)
+    getInputNodes = staticmethod(ExecutionScheduler.getInputNodes)
+    inputsWereExecuted = staticmethod(ExecutionScheduler.inputsWereExecuted)
     
     @staticmethod
     def isPlanned(node):
@@ -196,14 +212,6 @@ class RunTool(ShelfTool):
     def getNodesToExecute(self, nodes):
         return [ node for node in nodes if RunTool.mustExecute(node) ]
 
-    @staticmethod
-    def getInputNodes(node):
-        return [outputPin.owningNode() for inputPin in node.inputs.values() for outputPin in inputPin.affected_by]
-    
-    @staticmethod
-    def inputsWereExecuted(node):
-        return len(node.inputs) == 0 or all([not RunTool.isBiitLib(n) or RunTool.wasExecuted(n) for n in RunTool.getInputNodes(node)])
-    
     @staticmethod
     def inputsArePlannedOrExecuted(node):
         return len(node.inputs) == 0 or all([not RunTool.isBiitLib(n) or (RunTool.isPlanned(n) or RunTool.wasExecuted(n)) for n in RunTool.getInputNodes(node)])
@@ -316,23 +324,49 @@ class RunTool(ShelfTool):
         self.executionThread = inthread(self.executeNodes, plannedNodes)
         # self.executeNodes(plannedNodes, logTool, progress)
 
+    @staticmethod
+    def getMaxActiveEnvironments():
+        maxActiveEnvironments = ConfigManager().getPrefsValue("PREFS", "General/MaxActiveEnvironments")
+        try:
+            return max(1, int(maxActiveEnvironments))
+        except (TypeError, ValueError):
+            return 1
+
+    @staticmethod
+    def getPipelineRows():
+        return ConfigManager().getPrefsValue("PREFS", "General/PipelineRows") == "true"
+
+    @staticmethod
+    def getFuseNodes():
+        return ConfigManager().getPrefsValue("PREFS", "General/FuseNodes") == "true"
+
+    @staticmethod
+    def getSkipIntermediateFiles():
+        return ConfigManager().getPrefsValue("PREFS", "General/SkipIntermediateFiles") == "true"
+
+    def executeNode(self, node, n, nNodes):
+        self.log(f'\n==============================')
+        self.log(f'==============================')
+        self.log(f'Process node [[{n}/{nNodes}]]: {node.name}')
+        try:
+            return self.execute(node)
+        finally:
+            if RunTool.wasExecuted(node):
+                inmain(lambda: self.progressDialog.nodeFinished(node.name))
+
     def executeNodes(self, plannedNodes):
         inmain(lambda: self.progressDialog.setCancelButtonToCancel())
 
         self.executing = True
+        self.scheduler = ExecutionScheduler(plannedNodes, self.executeNode, self.getMaxActiveEnvironments(), self.log, self.getPipelineRows(), self.getFuseNodes(), self.getSkipIntermediateFiles())
         try:
-            for n, node in enumerate(plannedNodes):
-                self.log(f'\n==============================')
-                self.log(f'==============================')
-                self.log(f'Process node [[{n}/{len(plannedNodes)}]]: {node.name}')
-                self.currentNode = node
-                self.execute(node)
-                if self.cancelExecution.is_set():
-                    self.log(self.progressDialog.executionCanceled)
-                    inmain(lambda: self.progressDialog.setCancelButtonToOk())
-                    self.executing = False
-                    self.cancelExecution.clear()
-                    return
+            self.scheduler.run()
+            if self.cancelExecution.is_set():
+                self.log(self.progressDialog.executionCanceled)
+                inmain(lambda: self.progressDialog.setCancelButtonToOk())
+                self.executing = False
+                self.cancelExecution.clear()
+                return
             self.log(self.progressDialog.allNodesProcessedMessage)
             inmain(self.saveGraph)
             # inmain(lambda: self.progressDialog.hide())
@@ -358,8 +392,8 @@ class RunTool(ShelfTool):
             self.progressDialog.hide()
         else:
             self.cancelExecution.set()
-            if self.currentNode is not None and hasattr(self.currentNode, 'exitTool'):
-                self.currentNode.exitTool()
+            if self.scheduler is not None:
+                self.scheduler.cancel()
     
     def saveGraph(self):
         self.pyFlowInstance.save(deleteData=False)
@@ -181,7 +181,11 @@ class TableTool(DockTool):
 	def setData(self, data=None):
 		if self.content is None: return
 		if (data is not None) and not isinstance(data, pandas.DataFrame): return
-		self.content.setModel(PandasModel(data))
+		previousModel = self.content.model()
+		self.content.setModel(PandasModel(data, self.content))
+		if isinstance(previousModel, PandasModel):
+			previousModel.close()
+			previousModel.deleteLater()
 		# self.content.setItemDelegate(ImageDelegate(self))
 		self.content.resizeRowsToContents()
 		self.content.model().rowsInserted.connect(lambda: self.content.resizeRowsToContents())
@@ -191,9 +195,8 @@ class TableTool(DockTool):
 		self.content.resizeRowsToContents()
 
 	def updateThumbnails(self, results):
-		print('updateThumbnails')
-		if self.content is None or self.content.model is None: return
-		self.content.model().layoutChanged.emit()
+		if self.content is None or not isinstance(self.content.model(), PandasModel): return
+		self.content.model().updateThumbnails(results)
 	
 	def clear(self):
 		self.setData()
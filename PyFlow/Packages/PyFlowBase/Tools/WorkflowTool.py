@@ -19,7 +19,7 @@ from blinker import Signal
 from send2trash import send2trash
 from qtpy import QtCore, QtWidgets
 from PyFlow import getSourcesPath
-from PyFlow import PARAMETERS_PATH, OUTPUT_DATAFRAME_PATH
+from PyFlow import PARAMETERS_PATH, OUTPUT_DATAFRAME_PATH, OUTPUT_DATAFRAME_PARQUET_PATH
 from PyFlow.ConfigManager import ConfigManager
 from PyFlow.UI.Tool.Tool import DockTool
 from PyFlow.Packages.PyFlowBase.UI.UIWelcomeDialog import WelcomeDialog
@@ -321,13 +321,13 @@ class WorkflowTool(DockTool):
             for name in ['Tools', 'Scripts']:
                 if (path / name).exists():
                     shutil.copytree(path / name, workflowFolder / name, ignore=shutil.ignore_patterns('*.pyc', '__pycache__'))
-            # Copy parameters.json and output_data_frame.csv files (PARAMETERS_PATH, OUTPUT_DATAFRAME_PATH) in the "Data / nodeName" folders, but not the other data files
+            # Copy parameters.json and output_data_frame.parquet|csv files (PARAMETERS_PATH, OUTPUT_DATAFRAME_PARQUET_PATH, OUTPUT_DATAFRAME_PATH) in the "Data / nodeName" folders, but not the other data files
             if (path / 'Metadata').exists():
                 metadataFolder = workflowFolder / 'Metadata'
                 metadataFolder.mkdir()
                 for folder in sorted(list((path / 'Metadata').iterdir())):
                     (metadataFolder / folder.name).mkdir()
-                    for fileName in [PARAMETERS_PATH, OUTPUT_DATAFRAME_PATH]:
+                    for fileName in [PARAMETERS_PATH, OUTPUT_DATAFRAME_PARQUET_PATH, OUTPUT_DATAFRAME_PATH]:
                         if (folder / fileName).exists():
                             shutil.copyfile(folder / fileName, metadataFolder / folder.name / fileName)
             shutil.copyfile(path / WorkflowTool.graphFileName, workflowFolder / WorkflowTool.graphFileName)
@@ -12,10 +12,11 @@
 ## See the License for the specific language governing permissions and
 ## limitations under the License.
 
+import os
 import pandas
 import logging
 from qtpy import QtGui
-from qtpy.QtWidgets import QWidget, QComboBox, QHBoxLayout, QLabel
+from qtpy.QtWidgets import QWidget, QComboBox, QHBoxLayout, QLabel, QSpinBox, QCheckBox
 from PyFlow.UI.Canvas.UINodeBase import UINodeBase
 from PyFlow.UI.Canvas.UICommon import NodeDefaults
 from PyFlow.Core.Common import *
@@ -246,4 +247,31 @@ class UIBiitToolNode(UINodeBase):
                 outputsCategory.addWidget(outputName, w)
 
         if outputsCategory.Layout.count() > 0:
-            propertiesWidget.addWidget(outputsCategory)
\ No newline at end of file
+            propertiesWidget.addWidget(outputsCategory)
+
+    def updateNWorkers(self, value):
+        if self._rawNode.nWorkers == value: return
+        self._rawNode.nWorkers = value
+        EditorHistory().saveState("Update number of workers", modify=True)
+
+    def updateProfileNextExecution(self, value):
+        if self._rawNode.profileNextExecution == value: return
+        self._rawNode.profileNextExecution = value
+        EditorHistory().saveState("Update profile next execution", modify=True)
+
+    def createExecutionCollapsibleFormWidget(self, propertiesWidget):
+        executionCategory = CollapsibleFormWidget(headName="Execution")
+        if self._rawNode.canProcessRowsInParallel():
+            nWorkers = QSpinBox()
+            nWorkers.setRange(1, os.cpu_count() or 1)
+            nWorkers.setValue(self._rawNode.nWorkers)
+            nWorkers.setToolTip('Number of rows processed in parallel, each one in a separate process of the tool environment.')
+            nWorkers.valueChanged.connect(self.updateNWorkers)
+            executionCategory.addWidget('Parallel workers', nWorkers)
+        profile = QCheckBox()
+        profile.setChecked(self._rawNode.profileNextExecution)
+        profile.setToolTip('Profile the next execution of the node with cProfile, on the BioImageIT side and in the tool environment.\nThe profiles are saved in the metadata folder of the node (.pstats files, and profile.speedscope.json which can be opened on https://www.speedscope.app).')
+        profile.toggled.connect(self.updateProfileNextExecution)
+        executionCategory.addWidget('Profile next execution', profile)
+        propertiesWidget.addWidget(executionCategory)
+        executionCategory.setCollapsed(True)
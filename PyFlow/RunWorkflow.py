@@ -0,0 +1,87 @@
+import sys
+import argparse
+import traceback
+from pathlib import Path
+from PyFlow.WorkflowManager import WorkflowManager
+from PyFlow.ToolManagement.EnvironmentManager import environmentManager, ExecutionException
+from PyFlow.Packages.PyFlowBase.FunctionLibraries.BiitToolNode import BiitToolNode
+from PyFlow import getRootPath
+
+# Execute a workflow saved by the GUI without opening it (no Qt application is created):
+# python pyflow.py run path/to/workflow.pygraph [--jobs N] [--rows-per-worker N] [--only node ...] [--from node ...]
+# The nodes are executed like with the Run button (BiitToolNode.compute and execute, scheduled by ExecutionScheduler),
+# then the workflow is saved, a summary of the nodes is printed, and the exit code is 0 only if all nodes were executed.
+
+def createParser():
+    parser = argparse.ArgumentParser(prog='pyflow.py run', description='Execute a BioImageIT workflow without the graphical interface.')
+    parser.add_argument('graphPath', type=Path, help='The .pygraph file of the workflow.')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='The maximum number of nodes executed at the same time (independent branches are executed concurrently). Default is 1.')
+    parser.add_argument('--rows-per-worker', type=int, default=None, help=f'The maximum number of rows sent to a worker and not yet processed. Default is {BiitToolNode.maxRowsInFlight}.')
+    parser.add_argument('--only', action='append', default=[], metavar='NODE', help='Only execute this node (can be repeated), even if it was already executed. Its input nodes must be executed.')
+    parser.add_argument('--from', dest='fromNodes', action='append', default=[], metavar='NODE', help='Execute this node and all its downstream nodes (can be repeated), even if they were already executed.')
+    parser.add_argument('--profile', action='append', default=[], metavar='NODE', help='Profile the execution of this node (can be repeated), the profiles are saved in its metadata folder.')
+    parser.add_argument('--pipeline-rows', action='store_true', help='Process the rows of a node as soon as the previous node produced them.')
+    parser.add_argument('--fuse-nodes', action='store_true', help='Execute the chains of nodes using the same environment with a single call per row.')
+    parser.add_argument('--skip-intermediate-files', action='store_true', help='Do not write the outputs of the fused nodes which are only used by the next fused nodes (those nodes stay unexecuted).')
+    return parser
+
+def logLine(message):
+    print(message)
+
+def printSummary(summary):
+    print('\nSummary:')
+    nameWidth = max([len(node['name']) for node in summary] + [4])
+    for node in summary:
+        duration = f'{node["duration"]:.2f}s' if node['duration'] is not None else ''
+        print(f'  {node["name"]:<{nameWidth}}  {node["status"]:<12}  {duration}')
+
+def run(argv=None):
+    parser = createParser()
+    arguments = parser.parse_args(argv)
+    graphPath = arguments.graphPath
+    if graphPath.suffix != '.pygraph':
+        graphPath = graphPath.with_name(graphPath.name + '.pygraph')
+    if not graphPath.exists():
+        parser.error(f'the workflow {graphPath} does not exist')
+    if arguments.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if arguments.rows_per_worker is not None:
+        if arguments.rows_per_worker < 1:
+            parser.error('--rows-per-worker must be at least 1')
+        BiitToolNode.maxRowsInFlight = arguments.rows_per_worker
+
+    environmentManager.setCondaPath(getRootPath() / 'micromamba')
+    BiitToolNode.log.connect(logLine)
+
+    workflowManager = WorkflowManager(graphPath.parent)
+    workflowManager.loadGraph(graphPath)
+
+    nodes = {}
+    for name in arguments.only + arguments.fromNodes + arguments.profile:
+        nodes[name] = workflowManager.getNode(name)
+        if nodes[name] is None:
+            parser.error(f'the workflow has no node named "{name}"')
+    for name in arguments.profile:
+        nodes[name].profileNextExecution = True
+    if len(arguments.only) > 0 or len(arguments.fromNodes) > 0:
+        nodesToExecute = workflowManager.selectNodes([nodes[name] for name in arguments.only], [nodes[name] for name in arguments.fromNodes])
+    else:
+        nodesToExecute = workflowManager.getNodesToExecute(workflowManager.graphManager.getAllNodes())
+
+    success = False
+    try:
+        success = workflowManager.executeWorkflow(arguments.jobs, arguments.pipeline_rows, arguments.fuse_nodes, arguments.skip_intermediate_files, nodes=nodesToExecute)
+    except ExecutionException as e:
+        print(f'An error occured during the execution of the process:\n\n{e.exception}', file=sys.stderr)
+        for line in e.traceback or []:
+            print(line, file=sys.stderr)
+    except Exception as e:
+        print(f'An error occured during the execution of the process:\n\n{e}', file=sys.stderr)
+        traceback.print_exc()
+    finally:
+        workflowManager.saveGraph(graphPath)
+        for environment in list(environmentManager.environments):
+            environmentManager.exit(environment)
+
+    printSummary(workflowManager.getExecutionSummary(nodesToExecute))
+    return 0 if success else 1
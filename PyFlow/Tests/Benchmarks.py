@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import SimpleITK as sitk
+
+from PyFlow.WorkflowManager import WorkflowManager
+from PyFlow.ToolManagement.EnvironmentManager import environmentManager
+from PyFlow.ThumbnailManagement.ThumbnailGenerator import ThumbnailGenerator
+
+# Performance benchmarks of the core engine, on a synthetic workflow: a ListFiles node listing `rows` small images,
+# followed by a chain of `nodes` binary_threshold nodes (a SimpleITK tool executed in the bioimageit environment).
+#
+# python -m PyFlow.Tests.Benchmarks [--nodes 10] [--rows 200] [--repeat 5] [--output benchmarks.json] [--baseline baseline.json] [--tolerance 0.25]
+#
+# Each benchmark is run `repeat` times (its setup is not timed). The output json file contains the parameters, the machine,
+# and the min, median, mean and max durations [s] of each benchmark.
+# With --baseline (the output of a previous run), the medians are compared to the baseline ones:
+# the exit code is 1 if a benchmark is slower than its baseline by more than tolerance (0.25 means 25% slower).
+
+moduleCallerEnvironment = 'benchmarkModuleCaller'
+
+def createImages(folder:Path, nImages:int, size:int=64):
+    folder.mkdir(parents=True, exist_ok=True)
+    random = np.random.default_rng(0)
+    for i in range(nImages):
+        image = sitk.GetImageFromArray(random.integers(0, 255, (size, size), dtype=np.uint8))
+        sitk.WriteImage(image, str(folder / f'image_{i:05d}.tif'))
+
+class Benchmarks:
+
+    def __init__(self, workflowPath:Path, nNodes:int, nRows:int, repeat:int) -> None:
+        self.workflowPath = workflowPath
+        self.nNodes = nNodes
+        self.nRows = nRows
+        self.repeat = repeat
+        self.results = {}
+        createImages(workflowPath / 'Images', nRows)
+        environmentManager.launch('bioimageit', direct=True)
+        self.workflowManager = WorkflowManager(workflowPath)
+        self.graphManager = self.workflowManager.graphManager
+        self.createWorkflow()
+
+    def createWorkflow(self):
+        self.listFiles = self.workflowManager.initializeNode('ListFiles')
+        self.listFiles.parameters['inputs']['folderPath']['value'] = str(self.workflowPath / 'Images')
+        self.chain = [self.workflowManager.initializeNode('binary_threshold') for _ in range(self.nNodes)]
+        self.workflowManager.setupConnections()
+        for previousNode, node in zip([self.listFiles] + self.chain, self.chain):
+            self.workflowManager.connect(previousNode, node)
+        self.graphManager.activeGraph().populating = False
+        self.workflowManager.computeNodes()
+
+    # The nodes are found again after graph_load, which recreates them
+    def findNodes(self):
+        nodes = self.graphManager.getAllNodes()
+        self.listFiles = next(node for node in nodes if node.name == self.listFiles.name)
+        self.chain = [next(n for n in nodes if n.name == node.name) for node in self.chain]
+
+    def run(self, name:str, function, setup=None):
+        durations = []
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+        self.results[name] = dict(min=min(durations), median=statistics.median(durations), mean=statistics.mean(durations), max=max(durations), repeat=self.repeat)
+        print(f'{name:<28} median {self.results[name]["median"]:.4f}s  (min {self.results[name]["min"]:.4f}s, max {self.results[name]["max"]:.4f}s)')
+
+    def deleteData(self):
+        for folder in ['Data', 'Metadata']:
+            shutil.rmtree(self.workflowPath / folder, ignore_errors=True)
+        for node in [self.listFiles] + self.chain:
+            node.setExecuted(False, propagate=False)
+
+    def runGraphBenchmarks(self):
+        data = json.dumps(self.graphManager.serialize(), default=str)
+        self.run('graph_serialize', lambda: json.dumps(self.graphManager.serialize(), default=str))
+        # Like WorkflowManager.loadGraph, without reading the file
+        def load():
+            graphData = json.loads(data)
+            self.graphManager.deserialize(graphData)
+            self.graphManager.selectGraphByName(graphData['activeGraph'])
+        self.run('graph_load', load)
+        self.findNodes()
+        self.workflowManager.computeNodes()
+
+    def runNodeBenchmarks(self):
+        lastNode = self.chain[-1]
+        self.run('compute', self.workflowManager.computeNodes)
+        self.run('get_args', lambda: lastNode.getArgs(lastNode.processedDataFrame, raiseRequiredException=False))
+        self.run('set_output_columns', lambda: lastNode.setOutputColumns(lastNode.processedDataFrame.copy()))
+        dataFrames = [node.processedDataFrame for node in self.chain]
+        self.run('merge_data_frames', lambda: lastNode.mergeDataFrames(dataFrames))
+        self.run('dirty_propagation', lambda: self.listFiles.setNextNodesUnexecuted(setDirty=True))
+        self.workflowManager.computeNodes()
+
+    def runExecutionBenchmarks(self):
+        def setup():
+            self.deleteData()
+            self.workflowManager.computeNodes()
+        self.run('execute', lambda: self.workflowManager.executeWorkflow(), setup=setup)
+        # The rows are reused from the row cache (see RowCache)
+        def setupCached():
+            for node in [self.listFiles] + self.chain:
+                node.setExecuted(False, propagate=False)
+            self.workflowManager.computeNodes()
+        self.run('execute_cached', lambda: self.workflowManager.executeWorkflow(), setup=setupCached)
+
+    def runThumbnailBenchmarks(self):
+        thumbnailGenerator = ThumbnailGenerator.get()
+        node = self.chain[0]
+        dataFrame = node.processedDataFrame
+        def setup():
+            thumbnailGenerator.queue.join()
+            thumbnailGenerator.deleteThumbnails(node.name)
+        def generate():
+            thumbnailGenerator.generateThumbnails(node.name, dataFrame)
+            thumbnailGenerator.queue.join()
+        self.run('thumbnails', generate, setup=setup)
+
+    def runModuleCallerBenchmarks(self):
+        moduleCallerPath = Path(__file__).parent.parent / 'ToolManagement' / 'ModuleCaller.py'
+        environment = environmentManager.launch(moduleCallerEnvironment, customCommand=f'"{sys.executable}" -u "{moduleCallerPath}"', condaEnvironment=False)
+        try:
+            self.run('module_caller_execute', lambda: [environment.execute('builtins', 'len', [[i]]) for i in range(self.nRows)])
+            self.run('module_caller_batch', lambda: environment.executeBatch('builtins', 'len', [None], [(i, [i]) for i in range(self.nRows)]))
+        finally:
+            environmentManager.exit(moduleCallerEnvironment)
+
+    def runAll(self, names=None):
+        groups = dict(graph=self.runGraphBenchmarks, node=self.runNodeBenchmarks, execution=self.runExecutionBenchmarks, thumbnails=self.runThumbnailBenchmarks, moduleCaller=self.runModuleCallerBenchmarks)
+        for name, runGroup in groups.items():
+            if names is None or name in names:
+                runGroup()
+        return self.results
+
+def getMachine():
+    return dict(platform=platform.platform(), processor=platform.processor(), python=platform.python_version(), cpuCount=os.cpu_count())
+
+# Returns the names of the benchmarks which are slower than the baseline by more than tolerance
+def compareToBaseline(results:dict, baseline:dict, tolerance:float):
+    regressions = []
+    if baseline.get('parameters') != results['parameters']:
+        print(f'Warning: the baseline parameters {baseline.get("parameters")} differ from the current ones {results["parameters"]}')
+    print('\nComparison to the baseline:')
+    for name, result in results['benchmarks'].items():
+        baselineResult = baseline.get('benchmarks', {}).get(name)
+        if baselineResult is None or baselineResult['median'] <= 0:
+            print(f'{name:<28} no baseline')
+            continue
+        ratio = result['median'] / baselineResult['median']
+        regression = ratio > 1 + tolerance
+        if regression:
+            regressions.append(name)
+        print(f'{name:<28} {ratio:6.2f}x  {"REGRESSION" if regression else "ok"}')
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the core engine of BioImageIT on a synthetic workflow.')
+    parser.add_argument('--nodes', type=int, default=10, help='The number of binary_threshold nodes of the workflow.')
+    parser.add_argument('--rows', type=int, default=200, help='The number of rows (images) of the workflow.')
+    parser.add_argument('--repeat', type=int, default=5, help='The number of times each benchmark is run.')
+    parser.add_argument('--only', nargs='+', choices=['graph', 'node', 'execution', 'thumbnails', 'moduleCaller'], help='Only run these groups of benchmarks.')
+    parser.add_argument('--output', type=Path, default=Path('benchmarks.json'), help='The output json file.')
+    parser.add_argument('--baseline', type=Path, help='The output of a previous run to compare the results to.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='The maximum slowdown relative to the baseline (0.25 means 25%% slower).')
+    arguments = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workflowPath:
+        benchmarks = Benchmarks(Path(workflowPath), arguments.nodes, arguments.rows, arguments.repeat)
+        results = dict(date=datetime.now().isoformat(), machine=getMachine(), parameters=dict(nodes=arguments.nodes, rows=arguments.rows), benchmarks=benchmarks.runAll(arguments.only))
+
+    with open(arguments.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f'Results written to {arguments.output}')
+
+    if arguments.baseline is None: return 0
+    with open(arguments.baseline, 'r') as f:
+        baseline = json.load(f)
+    return 1 if len(compareToBaseline(results, baseline, arguments.tolerance)) > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
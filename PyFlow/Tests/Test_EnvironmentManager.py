@@ -0,0 +1,95 @@
+import ast
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+from PyFlow.ToolManagement import EnvironmentManager
+from PyFlow.ToolManagement.EnvironmentManager import environmentManager, startProfiler, stopProfiler
+
+
+class TestDependencies(unittest.TestCase):
+
+    condaList = ['List of packages in environment: "envs/test"', '', '  Name  Version  Build  Channel', '─────────────────────',
+                 '  numpy   1.26.4  py310_0  conda-forge', '  python  3.10.8  h4a9ceb5_0  conda-forge', '  tifffile  2024.8.30  pypi_0  pypi']
+    pipFreeze = ['numpy==1.26.4', 'scikit_image==0.24.0rc1', 'napari @ file:///tmp/napari', 'torch==2.3.1+cu121']
+
+    def setUp(self):
+        self.condaPackages = environmentManager._parsePackages(self.condaList, 'conda')
+        self.pipPackages = environmentManager._parsePackages(self.pipFreeze, 'pip')
+
+    def assertInstalled(self, dependencies, packageManager, installed=True):
+        packages = self.condaPackages if packageManager == 'conda' else self.pipPackages
+        for dependency in dependencies:
+            self.assertEqual(environmentManager._packageIsInstalled(packages, dependency, packageManager), installed, dependency)
+
+    def test_parse_packages(self):
+        self.assertEqual(self.condaPackages, dict(numpy='1.26.4', python='3.10.8'))
+        self.assertEqual(self.pipPackages, {'numpy': '1.26.4', 'scikit-image': '0.24.0rc1', 'napari': 'file:///tmp/napari', 'torch': '2.3.1+cu121'})
+
+    def test_pip_specifiers(self):
+        self.assertInstalled(['numpy', 'NumPy', 'numpy==1.26.4', 'numpy>=1.26', 'numpy>=1.20,<2', 'numpy~=1.26.0', 'numpy!=1.25.0', 'numpy[extra]==1.26.4',
+                              'scikit-image>=0.24.0rc1', 'scikit_image<0.25', 'torch==2.3.1', 'torch==2.3.1+cu121', 'napari @ file:///tmp/napari',
+                              'pywin32==306; sys_platform == "never"'], 'pip')
+        self.assertInstalled(['numpy==1.26', 'numpy==1.26.3', 'numpy<1.26', 'numpy>=2', 'numpy~=1.25.0', 'torch==2.3.1+cpu', 'napari @ file:///tmp/other',
+                              'napari==0.5.0', 'scipy', 'scipy==1.15.1', 'numpy==not a version'], 'pip', installed=False)
+
+    def test_conda_specifiers(self):
+        self.assertInstalled(['numpy', 'conda-forge::numpy', 'numpy=1.26', 'numpy=1.26.4', 'numpy 1.26.*', 'numpy==1.26.4', 'numpy>=1.26', 'numpy>=1.20,<2',
+                              'numpy=1.26.4=py310_0', 'python=3.10', 'python<3.11'], 'conda')
+        self.assertInstalled(['numpy=1.2', 'numpy=1.26.3', 'numpy==1.26', 'numpy<1.26', 'numpy>=2', 'python=3.1', 'scipy',
+                              # Packages installed with pip are not conda packages
+                              'tifffile', 'tifffile=2024.8.30'], 'conda', installed=False)
+
+
+    def test_install_missing_dependencies(self):
+        dependencies = dict(pip=['numpy==1.26.4', 'tifffile==2025.2.18'])
+        with mock.patch.object(environmentManager, 'environmentExists', return_value=True), \
+                mock.patch.object(environmentManager, '_getInstalledPackages', return_value=self.pipPackages), \
+                mock.patch.object(environmentManager, '_activateConda', return_value=[]), \
+                mock.patch.object(environmentManager, 'executeCommands') as executeCommands:
+            self.assertTrue(environmentManager.create('thumbnails', dependencies))
+            executeCommands.assert_not_called()
+            # The existing environment gets the dependencies it misses
+            self.assertTrue(environmentManager.create('thumbnails', dependencies, installMissingDependencies=True))
+            executeCommands.assert_called_once()
+            self.assertTrue(any(['tifffile==2025.2.18' in command for command in executeCommands.call_args.args[0]]))
+            executeCommands.reset_mock()
+            self.assertTrue(environmentManager.create('thumbnails', dict(pip=['numpy==1.26.4']), installMissingDependencies=True))
+            executeCommands.assert_not_called()
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_profile(self):
+        profiler = startProfiler()
+        if profiler is None: self.skipTest('the tests are already profiled')
+        sorted(range(10))
+        stats = stopProfiler(profiler)
+        self.assertTrue(any([function[2] == '<built-in method builtins.sorted>' for function in stats]))
+        # Profilers are not nested
+        profiler = startProfiler()
+        self.assertIsNone(startProfiler())
+        stopProfiler(profiler)
+        self.assertIsNone(startProfiler(False))
+        self.assertIsNone(stopProfiler(None))
+        self.assertIsNone(sys.getprofile())
+
+    # ModuleCaller cannot import PyFlow modules, it has its own copy of the profiler functions (without the annotations)
+    def test_module_caller_copy(self):
+        def getFunctions(path):
+            functions = {}
+            for node in ast.parse(Path(path).read_text()).body:
+                if isinstance(node, ast.FunctionDef) and node.name in ['startProfiler', 'stopProfiler']:
+                    node.returns = None
+                    for argument in node.args.args:
+                        argument.annotation = None
+                    functions[node.name] = ast.dump(node)
+            return functions
+        moduleCaller = Path(EnvironmentManager.__file__).parent / 'ModuleCaller.py'
+        functions = getFunctions(EnvironmentManager.__file__)
+        self.assertEqual(len(functions), 2)
+        self.assertEqual(functions, getFunctions(moduleCaller))
+
+
+if __name__ == '__main__':
+    unittest.main()
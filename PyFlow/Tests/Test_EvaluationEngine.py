@@ -0,0 +1,75 @@
+import unittest
+from PyFlow.Core.Common import pinAffects, invalidateTopology
+from PyFlow.Core.EvaluationEngine import DefaultEvaluationEngine_Impl
+
+
+class Pin:
+    def __init__(self, node):
+        self.node = node
+        self.affects = set()
+        self.affected_by = set()
+
+    def owningNode(self):
+        return self.node
+
+class Node:
+    isCompoundNode = False
+    bCallable = False
+
+    def __init__(self, name):
+        self.name = name
+        self.inputs = dict(input=Pin(self))
+        self.outputs = dict(output=Pin(self))
+
+    def __repr__(self):
+        return self.name
+
+def connect(nodeA, nodeB):
+    pinAffects(nodeA.outputs['output'], nodeB.inputs['input'])
+    invalidateTopology()
+
+
+class TestEvaluationOrder(unittest.TestCase):
+
+    # top -> left, right -> bottom -> last
+    def setUp(self):
+        self.top, self.left, self.right, self.bottom, self.last = [Node(name) for name in ['top', 'left', 'right', 'bottom', 'last']]
+        for nodeA, nodeB in [(self.top, self.left), (self.top, self.right), (self.left, self.bottom), (self.right, self.bottom), (self.bottom, self.last)]:
+            connect(nodeA, nodeB)
+
+    def assertTopological(self, order, edges):
+        positions = { node: i for i, node in enumerate(order) }
+        for nodeA, nodeB in edges:
+            self.assertLess(positions[nodeA], positions[nodeB], f'{nodeA} must be before {nodeB} in {order}')
+
+    def test_diamond(self):
+        order = DefaultEvaluationEngine_Impl.computeEvaluationOrder(self.last)
+        # Each node once, without the node itself
+        self.assertCountEqual(order, [self.top, self.left, self.right, self.bottom])
+        self.assertTopological(order, [(self.top, self.left), (self.top, self.right), (self.left, self.bottom), (self.right, self.bottom)])
+        # The shared input is computed once, before both branches
+        self.assertEqual(order[0], self.top)
+        self.assertEqual(order[-1], self.bottom)
+        self.assertCountEqual(order, DefaultEvaluationEngine_Impl.getEvaluationOrder(self.last))
+
+    def test_diamond_forward(self):
+        order = DefaultEvaluationEngine_Impl.computeEvaluationOrder(self.top, forward=True)
+        self.assertCountEqual(order, [self.left, self.right, self.bottom, self.last])
+        self.assertTopological(order, [(self.left, self.bottom), (self.right, self.bottom), (self.bottom, self.last)])
+
+    def test_cached_order(self):
+        order = DefaultEvaluationEngine_Impl.getEvaluationOrderIterative(self.bottom)
+        self.assertCountEqual(order, [self.top, self.left, self.right])
+        # The returned order is a copy of the cached one
+        order.clear()
+        self.assertEqual(len(DefaultEvaluationEngine_Impl.getEvaluationOrderIterative(self.bottom)), 3)
+        # Connecting pins invalidates the cached orders
+        extra = Node('extra')
+        connect(extra, self.left)
+        order = DefaultEvaluationEngine_Impl.getEvaluationOrderIterative(self.bottom)
+        self.assertCountEqual(order, [self.top, self.left, self.right, extra])
+        self.assertTopological(order, [(extra, self.left), (self.top, self.left)])
+
+
+if __name__ == '__main__':
+    unittest.main()
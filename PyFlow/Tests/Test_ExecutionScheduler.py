@@ -0,0 +1,202 @@
+import time
+import threading
+import unittest
+from PyFlow.ToolManagement.ExecutionScheduler import ExecutionScheduler
+
+
+class Pin:
+    def __init__(self, node):
+        self.node = node
+        self.affected_by = []
+
+    def owningNode(self):
+        return self.node
+
+# A tool node which can stream its rows, and fuse them when canFuse is True (see BiitToolNode)
+class Node:
+    lib = 'BiitLib'
+
+    def __init__(self, name, environment, inputNodes=[], canStream=True, canFuse=False):
+        self.name = name
+        self.Tool = type('Tool', (), dict(environment=environment))
+        self.executed = False
+        self.output = Pin(self)
+        self.inputs = {}
+        if len(inputNodes) > 0:
+            self.inputs['input'] = Pin(self)
+            self.inputs['input'].affected_by = [node.output for node in inputNodes]
+        self.canStream = canStream
+        self.canFuse = canFuse
+        self.inputStream = None
+        self.fusedNodes = []
+        self.maxFused = None
+
+    def __repr__(self):
+        return self.name
+
+    def canStreamRows(self):
+        return self.canStream
+
+    def canProcessStreamedRows(self):
+        return self.canStream
+
+    def canFuseRows(self):
+        return self.canFuse
+
+    def streamRowsFrom(self, node):
+        self.inputStream = node
+        return True
+
+    def closeStreams(self):
+        self.inputStream = None
+
+    def fuseNodes(self, nodes, skipIntermediateFiles=False):
+        self.fusedNodes = nodes[:self.maxFused]
+        return len(self.fusedNodes)
+
+# Records the executions: the nodes are executed in duration seconds, unexecutedNode returns without being executed
+class Executor:
+    def __init__(self, duration=0.05, failingNode=None, unexecutedNode=None):
+        self.duration = duration
+        self.failingNode = failingNode
+        self.unexecutedNode = unexecutedNode
+        self.lock = threading.Lock()
+        self.events = []
+        self.running = set()
+        self.maxRunning = 0
+        self.concurrentEnvironments = False
+
+    def __call__(self, node, n, nNodes):
+        with self.lock:
+            self.events.append(('start', node.name))
+            environments = [ExecutionScheduler.getEnvironmentName(n) for n in self.running]
+            self.concurrentEnvironments |= ExecutionScheduler.getEnvironmentName(node) in environments
+            self.running.add(node)
+            self.maxRunning = max(self.maxRunning, len(self.running))
+        time.sleep(self.duration)
+        with self.lock:
+            self.running.remove(node)
+            self.events.append(('end', node.name))
+        if node.name == self.failingNode:
+            raise Exception(f'{node.name} failed')
+        if node.name == self.unexecutedNode:
+            return False
+        for fusedNode in [node] + node.fusedNodes:
+            fusedNode.executed = True
+        return True
+
+    def position(self, event, name):
+        return self.events.index((event, name))
+
+
+class TestExecutionScheduler(unittest.TestCase):
+
+    # top -> left, right -> bottom
+    def createDiamond(self, environments=['top', 'left', 'right', 'bottom']):
+        top = Node('top', environments[0])
+        left = Node('left', environments[1], [top])
+        right = Node('right', environments[2], [top])
+        bottom = Node('bottom', environments[3], [left, right])
+        return top, left, right, bottom
+
+    def test_diamond_order(self):
+        top, left, right, bottom = nodes = self.createDiamond()
+        executor = Executor()
+        self.assertTrue(ExecutionScheduler(reversed(nodes), executor, maxActiveEnvironments=2, log=lambda message: None).run())
+        self.assertTrue(all([node.executed for node in nodes]))
+        for branch in ['left', 'right']:
+            self.assertLess(executor.position('end', 'top'), executor.position('start', branch))
+            self.assertLess(executor.position('end', branch), executor.position('start', 'bottom'))
+        # The independent branches run concurrently
+        self.assertEqual(executor.maxRunning, 2)
+
+    def test_max_active_environments(self):
+        nodes = self.createDiamond()
+        executor = Executor()
+        self.assertTrue(ExecutionScheduler(nodes, executor, maxActiveEnvironments=1, log=lambda message: None).run())
+        self.assertEqual(executor.maxRunning, 1)
+
+    def test_same_environment_never_concurrent(self):
+        nodes = self.createDiamond(['top', 'shared', 'shared', 'bottom'])
+        executor = Executor()
+        self.assertTrue(ExecutionScheduler(nodes, executor, maxActiveEnvironments=4, log=lambda message: None).run())
+        self.assertFalse(executor.concurrentEnvironments)
+        self.assertEqual(executor.maxRunning, 1)
+
+    def test_unexecuted_inputs(self):
+        top, left, right, bottom = self.createDiamond()
+        messages = []
+        executor = Executor(0)
+        # top is neither executed nor planned: its next nodes cannot be executed
+        self.assertFalse(ExecutionScheduler([left, right, bottom], executor, maxActiveEnvironments=2, log=messages.append).run())
+        self.assertEqual(executor.events, [])
+        self.assertIn('left', messages[-1])
+        top.executed = True
+        self.assertTrue(ExecutionScheduler([left, right, bottom], executor, maxActiveEnvironments=2, log=messages.append).run())
+
+    def test_exception(self):
+        top, left, right, bottom = nodes = self.createDiamond()
+        executor = Executor(failingNode='left')
+        with self.assertRaisesRegex(Exception, 'left failed'):
+            ExecutionScheduler(nodes, executor, maxActiveEnvironments=2, log=lambda message: None).run()
+        # The running nodes finish, the next ones are not launched
+        self.assertTrue(right.executed)
+        self.assertNotIn(('start', 'bottom'), executor.events)
+
+    def test_pipelines(self):
+        first = Node('first', 'a')
+        second = Node('second', 'b', [first])
+        third = Node('third', 'c', [second], canStream=False)
+        fourth = Node('fourth', 'd', [third])
+        messages = []
+        scheduler = ExecutionScheduler([first, second, third, fourth], None, log=messages.append, pipelineRows=True)
+        self.assertEqual(scheduler.getPipelines(), [[first, second], [third], [fourth]])
+        self.assertEqual(len(messages), 2)
+        self.assertFalse(scheduler.isFused([first, second]))
+        # Without pipelineRows, each node is a pipeline
+        self.assertEqual(ExecutionScheduler([first, second], None).getPipelines(), [[first], [second]])
+
+    def test_fused_pipelines(self):
+        first = Node('first', 'a', canFuse=True)
+        second = Node('second', 'a', [first], canFuse=True)
+        third = Node('third', 'b', [second], canFuse=True)
+        scheduler = ExecutionScheduler([first, second, third], None, log=lambda message: None, pipelineRows=True, fuseNodes=True)
+        pipelines = scheduler.getPipelines()
+        self.assertEqual(pipelines, [[first, second], [third]])
+        self.assertTrue(scheduler.isFused(pipelines[0]))
+
+    def test_pipelined_execution(self):
+        first = Node('first', 'a')
+        second = Node('second', 'b', [first])
+        third = Node('third', 'c', [second])
+        executor = Executor()
+        # A pipeline counts as one running node: the chain is pipelined even with a single active environment
+        self.assertTrue(ExecutionScheduler([first, second, third], executor, maxActiveEnvironments=1, log=lambda message: None, pipelineRows=True).run())
+        self.assertEqual(executor.maxRunning, 3)
+        self.assertTrue(all([node.inputStream is None for node in [first, second, third]]))
+
+    def test_fused_execution(self):
+        first = Node('first', 'a', canFuse=True)
+        second = Node('second', 'a', [first], canFuse=True)
+        executor = Executor(0)
+        self.assertTrue(ExecutionScheduler([first, second], executor, log=lambda message: None, fuseNodes=True).run())
+        # The fused nodes are executed by the first one
+        self.assertEqual(executor.events, [('start', 'first'), ('end', 'first')])
+        self.assertTrue(second.executed)
+        self.assertEqual(first.fusedNodes, [])
+
+    def test_unexecuted_pipeline_remainder(self):
+        first = Node('first', 'a', canFuse=True)
+        second = Node('second', 'a', [first], canFuse=True)
+        third = Node('third', 'b', [second])
+        # first cannot be fused with second, and is not executed: second is executed after it in the same pipeline
+        first.maxFused = 0
+        messages = []
+        executor = Executor(0, unexecutedNode='first')
+        self.assertFalse(ExecutionScheduler([first, second, third], executor, log=messages.append, fuseNodes=True).run())
+        self.assertEqual(executor.events, [('start', 'first'), ('end', 'first')])
+        self.assertIn('second, third', messages[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
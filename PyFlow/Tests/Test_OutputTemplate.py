@@ -0,0 +1,73 @@
+import re
+import unittest
+from pathlib import Path
+import pandas
+from PyFlow.ToolManagement.OutputTemplate import OutputTemplate, getOutputTemplate
+
+workflowFolder = '/data/workflow/Data'
+nodeFolder = '/data/workflow/Data/segment'
+
+# The row by row substitution which OutputTemplate replaces (BiitToolNode.replaceInputArgs and replaceOutputKeywords before the templates were compiled)
+def replaceOutputKeywords(value, row, index, getInput, extension=None):
+    finalValue = str(value)
+    for pattern, accessor in [('', lambda input: input), ('.stem', lambda input: Path(input).stem), ('.name', lambda input: Path(input).name),
+                              ('.parent.name', lambda input: Path(input).parent.name), ('.ext', lambda input: Path(input).suffix), ('.exts', lambda input: ''.join(Path(input).suffixes))]:
+        for name in re.findall(r'\{([a-zA-Z0-9_-]+)' + re.escape(pattern) + r'\}', finalValue):
+            finalValue = finalValue.replace(f'{{{name}{pattern}}}', accessor(str(getInput(name, row))))
+    for columnName in re.findall(r'\(([a-zA-Z0-9_-]+)\)', finalValue):
+        if columnName in row:
+            finalValue = finalValue.replace(f'({columnName})', str(row[columnName]))
+    if ('[workflow_folder]' not in finalValue) and ('[node_folder]' not in finalValue) and (not Path(finalValue).is_absolute()):
+        finalValue = '[node_folder]/' + finalValue
+    finalValue = finalValue.replace('[workflow_folder]', workflowFolder)
+    finalValue = finalValue.replace('[node_folder]', nodeFolder)
+    finalValue = finalValue.replace('[index]', str(index))
+    if extension is not None:
+        finalValue = finalValue.replace('[ext]', extension)
+    return finalValue
+
+
+class TestOutputTemplate(unittest.TestCase):
+
+    templates = [
+        'mask.tif',
+        '{image.stem}_mask.tif',
+        '{image.stem}_mask{image.exts}',
+        '{image.parent.name}/{image.name}',
+        '{image}.json',
+        '(condition)_{image.stem}[ext]',
+        '[workflow_folder]/results/(condition)/{image.stem}_[index].csv',
+        '[node_folder]/{image.stem}_{method}.png',
+        '/absolute/{image.stem}{image.ext}',
+        '(missing)_{image.stem}.tif',
+    ]
+
+    def setUp(self):
+        self.data = pandas.DataFrame(dict(
+            image=['/data/images/a/cell_1.ome.tif', '/data/images/a/cell_2.ome.tif', '/data/images/b/cell_1.ome.tif', '/data/images/b/cell_1.ome.tif'],
+            condition=['control', 'control', 'treated', 'treated'],
+        ), index=[0, 1, 2, 5])
+
+    # The inputs which are columns are Series, the others (parameters) are the same for all rows
+    def getInput(self, name):
+        return self.data[name] if name in self.data.columns else 'otsu'
+
+    def getRowInput(self, name, row):
+        return row[name] if name in self.data.columns else 'otsu'
+
+    def test_matches_row_by_row_substitution(self):
+        for template in self.templates:
+            values = OutputTemplate(template).evaluate(self.data, self.getInput, workflowFolder, nodeFolder, '.tif')
+            expected = [replaceOutputKeywords(template, row, index, self.getRowInput, '.tif') for index, row in self.data.iterrows()]
+            self.assertEqual(list(values.index), list(self.data.index), template)
+            self.assertEqual(list(values), expected, template)
+
+    def test_parts(self):
+        template = OutputTemplate('[node_folder]/(condition)/{image.stem}_mask{image.exts}')
+        self.assertEqual(template.parts, [('text', '[node_folder]/', None), ('column', 'condition', None), ('text', '/', None),
+                                          ('input', 'image', '.stem'), ('text', '_mask', None), ('input', 'image', '.exts')])
+        self.assertIs(getOutputTemplate('{image.stem}.tif'), getOutputTemplate('{image.stem}.tif'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import sys
+import json
+import signal
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+from unittest import mock
+from PyFlow.ToolManagement.RowCache import RowCache
+
+
+class TestRowCache(unittest.TestCase):
+
+    toolId = dict(module='tools.segment', version='1.0')
+
+    def setUp(self):
+        self.temporaryDirectory = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temporaryDirectory.name)
+        self.cacheFolder = self.folder / 'Metadata' / 'node'
+        self.image = self.folder / 'image.tif'
+        self.image.write_bytes(b'image')
+
+    def tearDown(self):
+        self.temporaryDirectory.cleanup()
+
+    def getKey(self, cache, toolId=None, **args):
+        return cache.getKey(toolId or self.toolId, dict(image=str(self.image), threshold=0.5) | args, ['image'])
+
+    def writeOutput(self, name, content=b'output'):
+        path = self.folder / name
+        path.write_bytes(content)
+        return path
+
+    def test_key(self):
+        cache = RowCache(self.cacheFolder)
+        key = self.getKey(cache)
+        self.assertEqual(key, self.getKey(RowCache(self.cacheFolder)))
+        self.assertNotEqual(key, self.getKey(cache, threshold=0.6))
+        self.assertNotEqual(key, self.getKey(cache, toolId=dict(module='tools.segment', version='1.1')))
+        # The input files are keyed by content: touching a file does not change the key, modifying it does
+        self.image.write_bytes(b'image')
+        self.assertEqual(key, self.getKey(cache))
+        self.image.write_bytes(b'other image')
+        self.assertNotEqual(key, self.getKey(cache))
+
+    def test_get_and_set(self):
+        cache = RowCache(self.cacheFolder)
+        key = self.getKey(cache)
+        self.assertEqual(cache.get(key), (False, None))
+        output = self.writeOutput('mask.tif')
+        cache.set(key, [output], dict(area=12))
+        self.assertEqual(cache.get(key), (True, dict(area=12)))
+        cache.save()
+        self.assertEqual(RowCache(self.cacheFolder).get(key), (True, dict(area=12)))
+        # A modified or deleted output invalidates the row
+        output.write_bytes(b'modified output')
+        self.assertEqual(RowCache(self.cacheFolder).get(key), (False, None))
+        output.unlink()
+        self.assertEqual(RowCache(self.cacheFolder).get(key), (False, None))
+
+    def test_journal(self):
+        cache = RowCache(self.cacheFolder)
+        keys = [self.getKey(cache, threshold=i) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.set(key, [self.writeOutput(f'mask_{i}.tif')], None)
+        cache.journal.close()
+        journalPath = self.cacheFolder / RowCache.journalName
+        self.assertFalse((self.cacheFolder / RowCache.indexName).exists())
+        self.assertEqual(len(journalPath.read_text().splitlines()), 3)
+        # The rows of the journal are reused without save(), a truncated last line is ignored
+        with open(journalPath, 'a') as f:
+            f.write(json.dumps(dict(key='truncated', outputs={}, result=False))[:20])
+        reloaded = RowCache(self.cacheFolder)
+        self.assertTrue(all([reloaded.get(key)[0] for key in keys]))
+        self.assertNotIn('truncated', reloaded.entries)
+        # save() merges the journal in the index
+        reloaded.save()
+        self.assertFalse(journalPath.exists())
+        self.assertEqual(set(RowCache(self.cacheFolder).entries), set(keys))
+
+    def test_prune(self):
+        cache = RowCache(self.cacheFolder)
+        usedKey, unusedKey, sharedKey = [self.getKey(cache, threshold=i) for i in range(3)]
+        used, unused, shared = self.writeOutput('used.tif'), self.writeOutput('unused.tif'), self.writeOutput('shared.tif')
+        cache.set(usedKey, [used, shared], dict(area=1))
+        cache.set(unusedKey, [unused], dict(area=2))
+        cache.set(sharedKey, [shared], None)
+        cache.save()
+
+        cache = RowCache(self.cacheFolder)
+        cache.get(usedKey)
+        with mock.patch('PyFlow.ToolManagement.RowCache.send2trash') as send2trash:
+            cache.prune()
+        # The outputs of the unused rows are sent to the trash, unless a used row also produced them
+        send2trash.assert_called_once_with([str(unused)])
+        self.assertEqual(set(cache.entries), {usedKey})
+        self.assertFalse(cache.getResultPath(unusedKey).exists())
+        self.assertTrue(cache.getResultPath(usedKey).exists())
+        self.assertEqual(cache.usedKeys, set())
+
+
+# A node execution processing its rows with a row cache, killed after killAfter rows (see BiitToolNode.processRows)
+# It prints the indices of the rows it processed
+executionScript = """
+import os, sys, signal
+from pathlib import Path
+from PyFlow.ToolManagement.RowCache import RowCache
+folder, nRows, killAfter = Path(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+cache = RowCache(folder / 'Metadata')
+nProcessed = 0
+try:
+    for i in range(nRows):
+        key = cache.getKey(dict(module='tools.segment'), dict(index=i), [])
+        if cache.get(key)[0]: continue
+        if nProcessed == killAfter:
+            os.kill(os.getpid(), signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+        output = folder / f'mask_{i}.tif'
+        output.write_bytes(bytes([i]))
+        cache.set(key, [output], dict(index=i))
+        nProcessed += 1
+        print(i, flush=True)
+    cache.prune()
+finally:
+    cache.save()
+"""
+
+class TestRowCacheResume(unittest.TestCase):
+
+    def setUp(self):
+        self.temporaryDirectory = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temporaryDirectory.name)
+
+    def tearDown(self):
+        self.temporaryDirectory.cleanup()
+
+    def execute(self, nRows, killAfter):
+        process = subprocess.run([sys.executable, '-c', executionScript, str(self.folder), str(nRows), str(killAfter)], capture_output=True, text=True, cwd=Path(__file__).parent.parent.parent)
+        return process.returncode, [int(line) for line in process.stdout.split()]
+
+    def test_resume_killed_execution(self):
+        returnCode, processedRows = self.execute(10, 4)
+        self.assertNotEqual(returnCode, 0)
+        self.assertEqual(processedRows, [0, 1, 2, 3])
+        # The execution was killed: the index was not saved, the finished rows are in the journal
+        self.assertFalse((self.folder / 'Metadata' / RowCache.indexName).exists())
+        self.assertTrue((self.folder / 'Metadata' / RowCache.journalName).exists())
+
+        returnCode, processedRows = self.execute(10, -1)
+        self.assertEqual(returnCode, 0)
+        self.assertEqual(processedRows, [4, 5, 6, 7, 8, 9])
+        self.assertFalse((self.folder / 'Metadata' / RowCache.journalName).exists())
+        self.assertEqual(len(RowCache(self.folder / 'Metadata').entries), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
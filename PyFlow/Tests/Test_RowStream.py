@@ -0,0 +1,68 @@
+import threading
+import unittest
+from PyFlow.ToolManagement.RowStream import RowStream
+
+
+class TestRowStream(unittest.TestCase):
+
+    def produce(self, stream, rows):
+        def producer():
+            for i in rows:
+                stream.reserve()
+                stream.put(i)
+            stream.close()
+        thread = threading.Thread(target=producer)
+        thread.start()
+        return thread
+
+    def test_rows_in_order(self):
+        stream = RowStream(100, capacity=4)
+        thread = self.produce(stream, range(100))
+        self.assertEqual(list(stream), list(range(100)))
+        thread.join()
+        self.assertEqual(len(stream), 100)
+        # Once closed, the stream keeps returning None
+        self.assertIsNone(stream.get())
+
+    def test_capacity(self):
+        stream = RowStream(10, capacity=2)
+        thread = self.produce(stream, range(10))
+        thread.join(0.5)
+        # The producer waits for the consumer once capacity rows are waiting
+        self.assertTrue(thread.is_alive())
+        self.assertEqual(stream.rows.qsize(), 2)
+        self.assertEqual(stream.take(5), [0, 1])
+        self.assertEqual(list(stream), list(range(2, 10)))
+        thread.join()
+
+    def test_stop(self):
+        stream = RowStream(10, capacity=1)
+        thread = self.produce(stream, range(10))
+        self.assertEqual(stream.get(), 0)
+        # The producer does not wait for a consumer which stopped
+        stream.stop()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        stream.wait()
+
+    def test_invalidate(self):
+        stream = RowStream(10)
+        stream.put(0)
+        stream.invalidate()
+        # The rows are not used anymore once the stream is invalid, by any of the consumer workers
+        self.assertIsNone(stream.get())
+        self.assertIsNone(stream.get())
+        self.assertEqual(stream.take(4), [])
+        stream.put(1)
+        stream.reserve()
+
+    def test_stop_event(self):
+        stream = RowStream(10)
+        stopEvent = threading.Event()
+        stopEvent.set()
+        self.assertIsNone(stream.get(stopEvent))
+        self.assertEqual(stream.take(4, stopEvent), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
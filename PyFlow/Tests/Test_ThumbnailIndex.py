@@ -0,0 +1,71 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from PyFlow.ThumbnailManagement.ThumbnailIndex import ThumbnailIndex
+
+
+class TestThumbnailIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temporaryDirectory = tempfile.TemporaryDirectory()
+        self.thumbnailsPath = Path(self.temporaryDirectory.name) / 'Thumbnails'
+        self.thumbnailsPath.mkdir()
+        self.images = []
+        for i in range(3):
+            self.images.append(Path(self.temporaryDirectory.name) / f'image_{i}.tif')
+            self.images[-1].write_bytes(b'image')
+        self.thumbnails = [self.thumbnailsPath / 'node' / f'image_{i}.png' for i in range(3)]
+
+    def tearDown(self):
+        self.temporaryDirectory.cleanup()
+
+    def test_import_legacy_index(self):
+        self.thumbnails[0].parent.mkdir()
+        self.thumbnails[0].write_bytes(b'thumbnail')
+        legacyIndex = {
+            str(self.images[0]): dict(path=str(self.thumbnails[0]), nodes=['node', 'other']),
+            str(self.images[1]): dict(path=None, nodes=['node']),
+        }
+        legacyPath = self.thumbnailsPath / ThumbnailIndex.legacyFileName
+        with open(legacyPath, 'w') as f:
+            json.dump(legacyIndex, f)
+
+        index = ThumbnailIndex(self.thumbnailsPath)
+        # The legacy index is kept as a backup, and not imported again
+        self.assertFalse(legacyPath.exists())
+        self.assertEqual(json.loads(legacyPath.with_name(legacyPath.name + '.bak').read_text()), legacyIndex)
+        self.assertEqual(index.getThumbnailPath(str(self.images[0])), self.thumbnails[0])
+        self.assertIsNone(index.getThumbnailPath(str(self.images[1])))
+        # The imported thumbnails are up to date, the missing ones must be generated
+        self.assertEqual(list(index.addImages('node', [str(image) for image in self.images])), [str(self.images[1]), str(self.images[2])])
+        # The nodes using the images were imported
+        self.assertEqual(index.removeNode('node'), [])
+        self.assertEqual(index.removeNode('other'), [self.thumbnails[0]])
+        index.close()
+
+        index = ThumbnailIndex(self.thumbnailsPath)
+        self.assertIsNone(index.getThumbnailPath(str(self.images[0])))
+        index.close()
+
+    def test_thumbnails(self):
+        index = ThumbnailIndex(self.thumbnailsPath)
+        imagePaths = [str(image) for image in self.images]
+        signatures = index.addImages('node', imagePaths)
+        self.assertEqual(list(signatures), imagePaths)
+        self.thumbnails[0].parent.mkdir()
+        for thumbnail in self.thumbnails:
+            thumbnail.write_bytes(b'thumbnail')
+        self.assertEqual(index.setThumbnails([(imagePath, str(thumbnail), signatures[imagePath]) for imagePath, thumbnail in zip(imagePaths, self.thumbnails)]), [])
+        self.assertEqual(index.getThumbnailPaths(imagePaths), dict(zip(imagePaths, self.thumbnails)))
+        self.assertEqual(index.addImages('other', imagePaths[:2]), {})
+        # A modified image is stale
+        self.images[1].write_bytes(b'modified image')
+        self.assertEqual(list(index.addImages('other', imagePaths[:2])), [imagePaths[1]])
+        self.assertEqual(index.removeNode('node'), [self.thumbnails[2]])
+        self.assertCountEqual(index.removeNode('other'), self.thumbnails[:2])
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
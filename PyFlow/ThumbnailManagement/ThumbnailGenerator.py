@@ -1,4 +1,3 @@
-import json
 from pathlib import Path
 import queue
 import pandas
@@ -8,21 +7,12 @@ from PyFlow.invoke_in_main import inmain, inthread
 from blinker import Signal
 # import threading
 from PyFlow.ToolManagement.EnvironmentManager import environmentManager
+from PyFlow.ToolManagement.Timings import Timings
+from PyFlow.ThumbnailManagement.ThumbnailIndex import ThumbnailIndex
 # Warning: we cannot import generate_thumbnails.generateThumbnails directly here, otherwise the multiprocessing will initialize the entire BioImageIT app for each parallel process!
 # from PyFlow.ThumbnailManagement.generate_thumbnails import generateThumbnails
-import sys
 
-if sys.version_info < (3, 11):
-	from typing_extensions import TypedDict
-else:
-	from typing import TypedDict
-
-class PathInfo(TypedDict):
-	nodes: list[str]
-	path: str
-
-# Lock is not mandatory since all is in main thread. 
-# Keep in case API changes, to show that ThumbnailGenerator.lowPath and ThumbnailGenerator.imageToThumbnail must be "thread safe".
+# ThumbnailGenerator.indexes is used by the main thread and by the ThumbnailGenerator thread (which registers the images of the nodes and their thumbnails).
 lock = threading.Lock()
 
 class ThumbnailGenerator:
@@ -30,10 +20,17 @@ class ThumbnailGenerator:
 	instance = None
 	finished = Signal(object)
 	queue = queue.Queue()
+	# The images are sent to the thumbnail environment in chunks, and the thumbnails of each chunk are shown as soon as they are generated
+	chunkSize = 32
+	maxChunksInFlight = 4
+	# Only the cells with those extensions are considered as images
+	imageSuffixes = ['.png', '.jpg', '.jpeg', '.bmp', '.dib', '.gif', '.tiff', '.tif', '.webp', '.h5']
 
 	def __init__(self) -> None:
-		self.imageToThumbnail: dict[str, PathInfo] = {}
-		self.environment = environmentManager.createAndLaunch('thumbnailGenerator', {'pip': ["h5py==3.11.0", "pillow==11.1.0", "numpy==2.2.3"]})
+		self.workflowPath = None
+		self.indexes: dict[str, ThumbnailIndex] = {}
+		# tifffile was added after the first releases: it is installed in the existing environments when it is missing
+		self.environment = environmentManager.createAndLaunch('thumbnailGenerator', {'pip': ["h5py==3.11.0", "pillow==11.1.0", "numpy==2.2.3", "tifffile==2025.2.18"]}, installMissingDependencies=True)
 		if self.environment.process is not None:
 			inthread(self.logOutput, self.environment.process)
 		inthread(self._generateThumbnailsThread)
@@ -45,23 +42,19 @@ class ThumbnailGenerator:
 				print(line)
 		return
 	
-	# Main thread
-	def loadImageToThumbnail(self, workflowPath=None):
-		imageToThumbnailPath = self.getThumbnailsPath(workflowPath or self.workflowPath) / 'imageToThumbnail.json'
-		imageToThumbnail = {}
-		if imageToThumbnailPath.exists():
-			with open(imageToThumbnailPath, 'r') as f:
-				try:
-					imageToThumbnail = json.load(f)
-				except json.JSONDecodeError:
-					pass
-		return imageToThumbnail
+	# The thumbnail index of the workflow (the current workflow by default), opened once
+	def getIndex(self, workflowPath=None) -> ThumbnailIndex:
+		workflowPath = str(workflowPath or self.workflowPath)
+		with lock:
+			if workflowPath not in self.indexes:
+				self.indexes[workflowPath] = ThumbnailIndex(self.getThumbnailsPath(workflowPath))
+			return self.indexes[workflowPath]
 	
 	# Main thread
 	def setWorkflowPathAndLoadImageToThumbnail(self, workflowPath):
 		with lock:
 			self.workflowPath = workflowPath
-			self.imageToThumbnail = self.loadImageToThumbnail()
+		self.getIndex(workflowPath)
 		
 	# Main thread
 	def getThumbnailsPath(self, workflowPath=None):
@@ -76,12 +69,18 @@ class ThumbnailGenerator:
 	# Main thread
 	def getThumbnailPath(self, imagePath):
 		imagePath = str(imagePath) if isinstance(imagePath, Path) else imagePath
-		if imagePath is None or not isinstance(imagePath, str): return None
-		return Path(self.imageToThumbnail[imagePath]['path']) if imagePath in self.imageToThumbnail and self.imageToThumbnail[imagePath]['path'] is not None else None
+		if imagePath is None or not isinstance(imagePath, str) or self.workflowPath is None: return None
+		return self.getIndex().getThumbnailPath(imagePath)
+
+	# Main thread
+	# Returns the thumbnails of the given images which have one, as a dict {imagePath: thumbnailPath}
+	def getThumbnailPaths(self, imagePaths: list[str]):
+		if self.workflowPath is None or len(imagePaths) == 0: return {}
+		return self.getIndex().getThumbnailPaths(imagePaths)
 
 	# Main thread
 	# Generate a unique name for each item from the row and col indices ; since 2 images in 2 different folders could have the same stem.
-	# The same image (full path) gets a unique thumbnail stored in self.imageToThumbnail
+	# The same image (full path) gets a unique thumbnail stored in the ThumbnailIndex
 	def generateThumbnailPath(self, nodeName, path, rowIndex, colIndex, thumbnailsPath=None):
 		thumbnailsPath = self.getNodeThumbnailsPath(nodeName) if thumbnailsPath is None else thumbnailsPath
 		return thumbnailsPath / f'{Path(path).stem}_{rowIndex}-{colIndex}.png'
@@ -89,59 +88,64 @@ class ThumbnailGenerator:
 	# ThumbnailGenerator thread
 	def _generateThumbnailsThread(self):
 		while True:
-			taskData = self.queue.get()
-			results = self.environment.execute('PyFlow.ThumbnailManagement.generate_thumbnails', 'generateThumbnails', [taskData])
-			if results is None: continue
-			inmain(self._finishGenerateThumbnails, results)
-			self.queue.task_done()
+			task = self.queue.get()
+			try:
+				index = self.getIndex(task['workflowPath'])
+				images, signatures = self._getImages(index, task['nodeName'], task['dataFrame'], task['thumbnailsPath'])
+				if len(images) == 0: continue
+				chunks = [dict(images=images[i:i+self.chunkSize], workflowPath=task['workflowPath']) for i in range(0, len(images), self.chunkSize)]
+				rowFinished = lambda chunkIndex, results: self._finishGenerateThumbnails(index, signatures, results) if results is not None else None
+				with Timings.capture(self.environment.getMonitor()) as measurement:
+					self.environment.executeBatch('PyFlow.ThumbnailManagement.generate_thumbnails', 'generateThumbnails', [None], enumerate(chunks), rowArgIndex=0, maxInFlight=self.maxChunksInFlight, rowFinished=rowFinished)
+				# Only the thumbnails of the executed nodes are recorded (the nodes which are only computed have no metadata folder)
+				metadataPath = Path(task['workflowPath']) / 'Metadata' / task['nodeName']
+				if metadataPath.exists():
+					Timings(metadataPath).record('thumbnails', images=len(images), **measurement)
+			except Exception as e:
+				print(f'Error while generating the thumbnails of {task["nodeName"]}: {e}')
+			finally:
+				self.queue.task_done()
 	
-	# Main thread
-	def _finishGenerateThumbnails(self, results):
-		with lock:
-			imageToThumbnail = self.imageToThumbnail if self.workflowPath == results['workflowPath'] else self.loadImageToThumbnail(results['workflowPath'])
-			for path in results['paths']:
-				if not isinstance(path, Exception):
-					imageToThumbnail[path[0]]['path'] = path[1]
-			with open(self.getThumbnailsPath(results['workflowPath']) / 'imageToThumbnail.json', 'w') as f:
-				json.dump(imageToThumbnail, f)
-			print(f'generated {len(results)} thumbnails')
-			self.finished.send(results)
+	# ThumbnailGenerator thread
+	def _finishGenerateThumbnails(self, index: ThumbnailIndex, signatures, results):
+		for thumbnailPath in index.setThumbnails([(path[0], path[1], signatures[path[0]]) for path in results['paths'] if not isinstance(path, Exception)]):
+			thumbnailPath.unlink(missing_ok=True)
+		print(f'generated {len(results["paths"])} thumbnails')
+		inmain(self.finished.send, results)
 		return
 	
+	# ThumbnailGenerator thread
+	# Registers the images of the dataFrame in the index, and returns the (image, thumbnail) paths of the images whose thumbnail is missing or stale, and their signatures
+	# The cells are filtered column by column: only the strings and paths with an image extension are considered
+	def _getImages(self, index: ThumbnailIndex, nodeName, dataFrame: pandas.DataFrame, thumbnailsPath: Path):
+		cells = {}
+		for ci in range(len(dataFrame.columns)):
+			series = dataFrame.iloc[:, ci]
+			series = series[series.map(lambda item: isinstance(item, (str, Path)))].astype(str)
+			series = series[series.str.lower().str.endswith(tuple(self.imageSuffixes))].drop_duplicates()
+			for ri, item in series.items():
+				cells.setdefault(item, (ri, ci))
+		signatures = index.addImages(nodeName, list(cells))
+		images = [(item, str(self.generateThumbnailPath(nodeName, item, *cells[item], thumbnailsPath))) for item in signatures]
+		return images, signatures
+
 	# Main thread
+	# The dataFrame cells are filtered and the thumbnails generated in the ThumbnailGenerator thread, the GUI is notified (finished) as they are generated
 	def generateThumbnails(self, nodeName, dataFrame: pandas.DataFrame):
 		if dataFrame is None: return
 		thumbnailsPath = self.getNodeThumbnailsPath(nodeName)
 		thumbnailsPath.mkdir(exist_ok=True, parents=True)
-		images = []
-		
-		for ri, row in dataFrame.iterrows():
-			for ci, item in enumerate(row):
-				if not (isinstance(item, Path) or isinstance(item, str)): continue
-				item = str(item)
-				if item in self.imageToThumbnail:
-					if nodeName not in self.imageToThumbnail[item]['nodes']:
-						self.imageToThumbnail[item]['nodes'].append(nodeName)
-					if self.imageToThumbnail[item]['path'] is not None: continue
-				else:
-					self.imageToThumbnail[item] = dict(nodes=[nodeName], path=None)
-				if not Path(item).is_file(): continue
-				thumbnailPath = self.generateThumbnailPath(nodeName, item, ri, ci, thumbnailsPath)
-				images.append((item, str(thumbnailPath)))
-
-		if len(images)>0:
-			self.queue.put(dict(images=images, workflowPath=self.workflowPath))
+		# Only the object and string columns can contain paths, copy them since the dataFrame could be modified before being processed
+		dataFrame = dataFrame.select_dtypes(include=['object', 'string']).copy()
+		if dataFrame.empty: return
+		self.queue.put(dict(nodeName=nodeName, dataFrame=dataFrame, thumbnailsPath=thumbnailsPath, workflowPath=self.workflowPath))
 		return 
 
 	# Main thread
 	def deleteThumbnails(self, nodeName):
-		for path, pathInfo in list(self.imageToThumbnail.items()):
-			if nodeName in pathInfo['nodes']:
-				pathInfo['nodes'].remove(nodeName)
-			if len(pathInfo['nodes']) == 0:
-				if 'path' in pathInfo and (pathInfo['path'] is not None) and Path(pathInfo['path']).exists():
-					Path(pathInfo['path']).unlink()
-				del self.imageToThumbnail[path]
+		if self.workflowPath is None: return
+		for thumbnailPath in self.getIndex().removeNode(nodeName):
+			thumbnailPath.unlink(missing_ok=True)
 		folder:Path = self.getNodeThumbnailsPath(nodeName)
 		if folder.exists() and len(list(folder.iterdir()))==0:
 			folder.rmdir()
@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+# The thumbnails of the images of a workflow, stored in Thumbnails/thumbnails.db:
+# - images: the thumbnail of each image (None until it is generated), and the signature (size and modification time) of the image when the thumbnail was generated,
+# - image_nodes: the nodes which use each image ; the thumbnail of an image is deleted when no node uses it anymore.
+# The index is used by the main thread and the ThumbnailGenerator thread, all accesses are serialized with self.lock.
+class ThumbnailIndex:
+
+	fileName = 'thumbnails.db'
+	legacyFileName = 'imageToThumbnail.json'
+
+	def __init__(self, thumbnailsPath:Path) -> None:
+		self.thumbnailsPath = Path(thumbnailsPath)
+		self.lock = threading.RLock()
+		self.connection = sqlite3.connect(self.thumbnailsPath / self.fileName, check_same_thread=False)
+		self.connection.execute('PRAGMA journal_mode=WAL')
+		self.connection.execute('PRAGMA synchronous=NORMAL')
+		with self.connection:
+			self.connection.execute('CREATE TABLE IF NOT EXISTS images (path TEXT PRIMARY KEY, thumbnail TEXT, size INTEGER, mtime INTEGER)')
+			self.connection.execute('CREATE TABLE IF NOT EXISTS image_nodes (path TEXT NOT NULL, node TEXT NOT NULL, PRIMARY KEY (path, node))')
+			self.connection.execute('CREATE INDEX IF NOT EXISTS image_nodes_node ON image_nodes (node)')
+		self.importLegacyIndex()
+
+	def close(self):
+		with self.lock:
+			self.connection.close()
+
+	# Import the imageToThumbnail.json file of the workflows created with previous versions, then rename it imageToThumbnail.json.bak
+	# (the file is kept as a backup: renaming it back restores the thumbnails for the previous versions of BioImageIT)
+	def importLegacyIndex(self):
+		legacyPath = self.thumbnailsPath / self.legacyFileName
+		if not legacyPath.exists(): return
+		try:
+			with open(legacyPath, 'r') as f:
+				imageToThumbnail = json.load(f)
+		except (OSError, json.JSONDecodeError):
+			imageToThumbnail = {}
+		with self.lock, self.connection:
+			# The signatures are unknown: the thumbnails will be considered up to date
+			self.connection.executemany('INSERT OR IGNORE INTO images (path, thumbnail, size, mtime) VALUES (?, ?, NULL, NULL)', [(path, info.get('path')) for path, info in imageToThumbnail.items()])
+			self.connection.executemany('INSERT OR IGNORE INTO image_nodes (path, node) VALUES (?, ?)', [(path, node) for path, info in imageToThumbnail.items() for node in info.get('nodes', [])])
+		legacyPath.replace(legacyPath.with_name(legacyPath.name + '.bak'))
+
+	@staticmethod
+	def getSignature(path:Path):
+		try:
+			stat = Path(path).stat()
+		except OSError:
+			return None
+		return (stat.st_size, stat.st_mtime_ns)
+
+	def getThumbnailPath(self, imagePath:str):
+		with self.lock:
+			row = self.connection.execute('SELECT thumbnail FROM images WHERE path = ?', (imagePath,)).fetchone()
+		return Path(row[0]) if row is not None and row[0] is not None else None
+
+	# Returns the thumbnails of the given images which have one, as a dict {imagePath: thumbnailPath}
+	def getThumbnailPaths(self, imagePaths:list[str]):
+		thumbnails = {}
+		with self.lock:
+			for i in range(0, len(imagePaths), 500):
+				chunk = imagePaths[i:i+500]
+				query = f'SELECT path, thumbnail FROM images WHERE thumbnail IS NOT NULL AND path IN ({",".join(["?"] * len(chunk))})'
+				thumbnails.update({ path: Path(thumbnail) for path, thumbnail in self.connection.execute(query, chunk) })
+		return thumbnails
+
+	# Register the images of the node, returns the signatures of the images which exist and whose thumbnail is missing or stale
+	def addImages(self, nodeName:str, imagePaths:list[str]):
+		with self.lock:
+			thumbnails = {}
+			for i in range(0, len(imagePaths), 500):
+				chunk = imagePaths[i:i+500]
+				query = f'SELECT path, thumbnail, size, mtime FROM images WHERE path IN ({",".join(["?"] * len(chunk))})'
+				thumbnails.update({ path: (thumbnail, size, mtime) for path, thumbnail, size, mtime in self.connection.execute(query, chunk) })
+			with self.connection:
+				self.connection.executemany('INSERT OR IGNORE INTO images (path, thumbnail, size, mtime) VALUES (?, NULL, NULL, NULL)', [(path,) for path in imagePaths if path not in thumbnails])
+				self.connection.executemany('INSERT OR IGNORE INTO image_nodes (path, node) VALUES (?, ?)', [(path, nodeName) for path in imagePaths])
+		signatures = {}
+		for path in imagePaths:
+			signature = self.getSignature(path)
+			if signature is None or not Path(path).is_file(): continue
+			thumbnail, size, mtime = thumbnails.get(path, (None, None, None))
+			isStale = size is not None and (size, mtime) != signature
+			if thumbnail is None or isStale or not Path(thumbnail).exists():
+				signatures[path] = signature
+		return signatures
+
+	# Set the thumbnails which were generated: thumbnails is a list of (imagePath, thumbnailPath, signature)
+	# Returns the previous thumbnails which were replaced by a new file
+	def setThumbnails(self, thumbnails:list[tuple]):
+		with self.lock, self.connection:
+			replaced = []
+			for imagePath, thumbnailPath, _ in thumbnails:
+				row = self.connection.execute('SELECT thumbnail FROM images WHERE path = ?', (imagePath,)).fetchone()
+				if row is not None and row[0] is not None and row[0] != thumbnailPath:
+					replaced.append(Path(row[0]))
+			self.connection.executemany('UPDATE images SET thumbnail = ?, size = ?, mtime = ? WHERE path = ?', [(thumbnailPath, signature[0], signature[1], imagePath) for imagePath, thumbnailPath, signature in thumbnails])
+		return replaced
+
+	# Unregister the images of the node, returns the thumbnails of the images which are not used by any node anymore
+	def removeNode(self, nodeName:str):
+		with self.lock, self.connection:
+			paths = [row[0] for row in self.connection.execute('SELECT path FROM image_nodes WHERE node = ?', (nodeName,))]
+			self.connection.execute('DELETE FROM image_nodes WHERE node = ?', (nodeName,))
+			orphans = []
+			for i in range(0, len(paths), 500):
+				chunk = paths[i:i+500]
+				placeholders = ",".join(["?"] * len(chunk))
+				orphans += self.connection.execute(f'SELECT path, thumbnail FROM images WHERE path IN ({placeholders}) AND path NOT IN (SELECT path FROM image_nodes WHERE path IN ({placeholders}))', chunk + chunk).fetchall()
+			self.connection.executemany('DELETE FROM images WHERE path = ?', [(path,) for path, _ in orphans])
+		return [Path(thumbnail) for _, thumbnail in orphans if thumbnail is not None]
@@ -1,3 +1,4 @@
+import os
 import multiprocessing
 import logging
 from pathlib import Path
@@ -18,32 +19,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__file__)
 
-def openH5array(filename, datasetName='dataset'):
+# tifffile gives access to the pages and pyramid levels of TIFF files, PIL is used when it is not installed
+try:
+	import tifffile
+except ImportError:
+	tifffile = None
+
+# The images are only read at the resolution needed for the thumbnail: one plane, subsampled with a step such that it stays at least twice the thumbnail size
+def getStep(shape, size):
+	return max(1, max(shape) // (2 * max(size)))
+
+# Reduce the data to a 2D plane (or a RGB(A) plane) by taking the middle of the other axes
+def getPlane(data):
+	while data.ndim > 2 and not (data.ndim == 3 and data.shape[-1] in [3, 4]):
+		data = data[data.shape[0]//2]
+	return data
+
+# Only read the middle plane of the h5 dataset (hyperslab), subsampled
+def readH5Plane(filename, size, datasetName='dataset'):
 	with h5py.File(filename, 'r') as h5file:
-		return h5file[datasetName][:]
+		dataset = h5file[datasetName]
+		step = getStep(dataset.shape[-2:], size)
+		index = tuple([s//2 for s in dataset.shape[:-2]]) + (slice(None, None, step), slice(None, None, step))
+		return dataset[index]
+
+# Only read the middle page of the smallest pyramid level which is larger than the thumbnail, memory-mapped when possible, subsampled
+def readTiffPlane(filename, size):
+	with tifffile.TiffFile(filename) as tif:
+		series = tif.series[0]
+		levelIndex = max([i for i, level in enumerate(series.levels) if min(level.keyframe.imagelength, level.keyframe.imagewidth) >= max(size)], default=0)
+		level = series.levels[levelIndex]
+		page = level.pages[len(level.pages)//2]
+		if getattr(page, 'is_memmappable', False):
+			data = np.memmap(filename, dtype=np.dtype(tif.byteorder + page.dtype.char), mode='r', offset=page.dataoffsets[0], shape=page.shape)
+		else:
+			data = page.asarray()
+		# Planar RGB(A) pages are stored SYX
+		if data.ndim == 3 and data.shape[0] in [3, 4] and data.shape[-1] not in [3, 4]:
+			data = np.moveaxis(data, 0, -1)
+		data = getPlane(data)
+		step = getStep(data.shape[:2], size)
+		return np.array(data[::step, ::step])
+
+# Only read the middle frame of the image, returns the PIL image if it is not a grayscale image
+def readImagePlane(filename, size):
+	with Image.open(filename) as im:
+		if getattr(im, 'n_frames', 1) > 1:
+			im.seek(im.n_frames//2)
+		if im.mode[0] not in ['I', 'F', 'L']:
+			im.load()
+			return im.copy()
+		data = np.asarray(im)
+	step = getStep(data.shape[:2], size)
+	return data[::step, ::step]
 
+# The intensity range is estimated from a subsample of the plane (at most 65536 values), ignoring the extreme values
 def normalizeAndConvert(data):
-	dmax, dmin = data.max(), data.min()
-	data = 255.0 * ( data - dmin ) / (dmax - dmin) if abs(dmax - dmin) > 0 else data
-	return Image.fromarray(data.astype(np.uint8))
+	if data.ndim == 3 and data.dtype == np.uint8:
+		return Image.fromarray(data)
+	sample = data.ravel()[::max(1, data.size // 65536)].astype(np.float64)
+	dmin, dmax = np.nanpercentile(sample, [0.5, 99.5])
+	data = np.clip(255.0 * ( data - dmin ) / (dmax - dmin), 0, 255) if abs(dmax - dmin) > 0 else data
+	return Image.fromarray(np.nan_to_num(data).astype(np.uint8))
 
 def thumbnail(inputPath, outputPath, size=(128,128)): 
 	try:
-		if Path(inputPath).suffix == '.h5':
-			data = openH5array(inputPath)
-			im = normalizeAndConvert(data[data.shape[0]//2,:,:])
+		suffix = Path(inputPath).suffix.lower()
+		if suffix == '.h5':
+			im = normalizeAndConvert(getPlane(readH5Plane(inputPath, size)))
+		elif suffix in ['.tif', '.tiff'] and tifffile is not None:
+			im = normalizeAndConvert(readTiffPlane(inputPath, size))
 		else:
-			im = Image.open(inputPath)
-			if im.mode[0] in ['I', 'F', 'L']:
-				im = normalizeAndConvert(np.asarray(im))
+			im = readImagePlane(inputPath, size)
+			if isinstance(im, np.ndarray):
+				im = normalizeAndConvert(im)
 		im.thumbnail(size)
 		im.save(outputPath)
 		return (inputPath, outputPath)
 	except Exception as e:
+		logger.warning(f'Could not generate the thumbnail of {inputPath}: {e}')
 		return None
 
+# The pool is created once and reused by all the generateThumbnails calls of the environment
+pool = None
+
+def getPool():
+	global pool
+	if pool is None:
+		pool = multiprocessing.Pool(max(1, (os.cpu_count() or 2) - 1))
+	return pool
+
 def generateThumbnails(taskData):
-	pool = multiprocessing.Pool(8)
 	logger.info(f'generate {len(taskData["images"])} thumbnails')
-	results = pool.starmap(thumbnail, taskData['images'])
+	results = getPool().starmap(thumbnail, taskData['images'])
 	return dict(paths=[r for r in results if r is not None], workflowPath=taskData['workflowPath'])
\ No newline at end of file
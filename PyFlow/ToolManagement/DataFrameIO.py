@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+import pandas
+from PyFlow import OUTPUT_DATAFRAME_PATH, OUTPUT_DATAFRAME_PARQUET_PATH
+
+# pyarrow is optional: the output DataFrames are saved in csv when it is not installed
+try:
+	import pyarrow
+	import pyarrow.parquet
+except ImportError:
+	pyarrow = None
+
+# The output DataFrame of a node is saved in Parquet, which keeps the column types; the Path columns are stored as strings
+# and listed in the file metadata to be converted back to Path when loading.
+# It is saved in csv (as in the previous versions) when pyarrow is not installed or when a column cannot be stored in Parquet (mixed types).
+metadataKey = b'bioimageit'
+
+def getPathColumns(dataFrame: pandas.DataFrame):
+	return [column for column in dataFrame.columns if dataFrame[column].dtype == object and dataFrame[column].notna().any() and all([isinstance(value, Path) for value in dataFrame[column].dropna()])]
+
+def saveParquet(dataFrame: pandas.DataFrame, path: Path):
+	pathColumns = getPathColumns(dataFrame)
+	data = dataFrame.copy(deep=False)
+	for column in pathColumns:
+		data[column] = data[column].map(lambda value: str(value) if isinstance(value, Path) else value)
+	table = pyarrow.Table.from_pandas(data, preserve_index=True)
+	metadata = dict(table.schema.metadata or {})
+	metadata[metadataKey] = json.dumps(dict(pathColumns=[str(column) for column in pathColumns])).encode('utf-8')
+	pyarrow.parquet.write_table(table.replace_schema_metadata(metadata), path)
+
+# Save the output DataFrame in the node metadata folder, returns the name of the file
+def saveDataFrame(dataFrame: pandas.DataFrame, folder: Path):
+	fileName = OUTPUT_DATAFRAME_PATH
+	if pyarrow is not None:
+		try:
+			saveParquet(dataFrame, folder / OUTPUT_DATAFRAME_PARQUET_PATH)
+			fileName = OUTPUT_DATAFRAME_PARQUET_PATH
+		except Exception as e:
+			print(f'Warning: the DataFrame cannot be saved in Parquet ({e}), save it in csv.')
+	if fileName == OUTPUT_DATAFRAME_PATH:
+		dataFrame.to_csv(folder / OUTPUT_DATAFRAME_PATH)
+	# Remove the file of the other format which would be out of date
+	otherFileName = OUTPUT_DATAFRAME_PATH if fileName == OUTPUT_DATAFRAME_PARQUET_PATH else OUTPUT_DATAFRAME_PARQUET_PATH
+	(folder / otherFileName).unlink(missing_ok=True)
+	return fileName
+
+# Returns the path of the saved output DataFrame in the folder, or None
+def getDataFramePath(folder: Path):
+	return next((folder / fileName for fileName in [OUTPUT_DATAFRAME_PARQUET_PATH, OUTPUT_DATAFRAME_PATH] if (folder / fileName).exists()), None)
+
+def loadDataFrame(path: Path):
+	path = Path(path)
+	if path.suffix != '.parquet':
+		return pandas.read_csv(path, index_col=0)
+	if pyarrow is None:
+		raise Exception(f'pyarrow is required to read {path}.')
+	table = pyarrow.parquet.read_table(path)
+	metadata = json.loads((table.schema.metadata or {}).get(metadataKey, b'{}'))
+	dataFrame = table.to_pandas()
+	for column in dataFrame.columns:
+		if str(column) in metadata.get('pathColumns', []):
+			dataFrame[column] = pandas.Series([Path(value) if isinstance(value, str) else value for value in dataFrame[column]], index=dataFrame.index, dtype=object)
+	return dataFrame
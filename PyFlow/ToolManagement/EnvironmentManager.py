@@ -1,16 +1,22 @@
 import logging
 import re
+import json
+import itertools
+import time
 import platform
 import tempfile
 import threading
 import subprocess
+import cProfile
 from importlib import metadata
 from importlib import import_module
 from pathlib import Path
+from contextlib import contextmanager
 from collections.abc import Callable
 from abc import abstractmethod
 from multiprocessing.connection import Client
 import sys
+import sysconfig
 from typing import Any, cast
 
 import yaml
@@ -20,6 +26,9 @@ else:
 	from typing import TypedDict, NotRequired
 
 import psutil
+from packaging.requirements import Requirement, InvalidRequirement
+from packaging.specifiers import SpecifierSet, InvalidSpecifier
+from packaging.version import Version, InvalidVersion
 
 if len(logging.root.handlers)==0: 
 	logging.basicConfig()
@@ -74,6 +83,104 @@ class Dependencies(TypedDict):
 	pip_no_deps: NotRequired[list[str]]
 	optional: OptionalDependencies
 
+# Measures the resources used by a process (and its children) between start() and stop(): the wall and cpu times [s], the bytes read and written,
+# and the peak resident memory [bytes], sampled every samplingPeriod seconds while some measurements are running
+# The io counters are not available on macOS (readBytes and writtenBytes are 0)
+class ResourceMonitor:
+
+	samplingPeriod = 0.1
+
+	def __init__(self, pid:int|None=None, includeChildren:bool=True) -> None:
+		self.process = psutil.Process(pid)
+		self.includeChildren = includeChildren
+		self.measurements = []
+		self.thread = None
+		self.lock = threading.Lock()
+
+	def getProcesses(self):
+		try:
+			return [self.process] + (self.process.children(recursive=True) if self.includeChildren else [])
+		except psutil.Error:
+			return []
+
+	def getRss(self):
+		rss = 0
+		for process in self.getProcesses():
+			try:
+				rss += process.memory_info().rss
+			except psutil.Error:
+				pass
+		return rss
+
+	def getCounters(self):
+		counters = dict(time=time.perf_counter(), cpu=0.0, readBytes=0, writtenBytes=0, rss=0)
+		for process in self.getProcesses():
+			try:
+				with process.oneshot():
+					cpuTimes = process.cpu_times()
+					counters['cpu'] += cpuTimes.user + cpuTimes.system
+					counters['rss'] += process.memory_info().rss
+					if hasattr(process, 'io_counters'):
+						io = process.io_counters()
+						counters['readBytes'] += io.read_bytes
+						counters['writtenBytes'] += io.write_bytes
+			except psutil.Error:
+				pass
+		return counters
+
+	def start(self):
+		measurement = dict(start=self.getCounters())
+		measurement['peakRss'] = measurement['start']['rss']
+		with self.lock:
+			self.measurements.append(measurement)
+			if self.thread is None:
+				self.thread = threading.Thread(target=self.sample, daemon=True)
+				self.thread.start()
+		return measurement
+
+	def sample(self):
+		while True:
+			time.sleep(self.samplingPeriod)
+			with self.lock:
+				if len(self.measurements) == 0:
+					self.thread = None
+					return
+			rss = self.getRss()
+			with self.lock:
+				for measurement in self.measurements:
+					measurement['peakRss'] = max(measurement['peakRss'], rss)
+
+	def stop(self, measurement):
+		end = self.getCounters()
+		with self.lock:
+			self.measurements.remove(measurement)
+		start = measurement['start']
+		return dict(wall=end['time'] - start['time'], cpu=end['cpu'] - start['cpu'], peakRss=max(measurement['peakRss'], end['rss']),
+			readBytes=max(0, end['readBytes'] - start['readBytes']), writtenBytes=max(0, end['writtenBytes'] - start['writtenBytes']))
+
+# The BioImageIT process, without the environments it launched
+hostMonitor = ResourceMonitor(includeChildren=False)
+
+# Profile the calls of the current thread with cProfile until stopProfiler() ; returns None if not enabled or if they are already profiled
+# (profilers cannot be nested: the outer one would stop receiving the calls, or enable() fails on Python >= 3.12)
+# Kept identical to ModuleCaller.startProfiler, which runs in the tool environments and cannot import PyFlow modules
+def startProfiler(enabled:bool=True) -> cProfile.Profile|None:
+	if not enabled or sys.getprofile() is not None: return None
+	profiler = cProfile.Profile()
+	try:
+		profiler.enable()
+	except ValueError:
+		return None
+	return profiler
+
+# Returns the raw stats of the profiler (see pstats.Stats), which can be pickled, or None if there is no profiler
+# Kept identical to ModuleCaller.stopProfiler
+def stopProfiler(profiler:cProfile.Profile|None) -> dict|None:
+	if profiler is None: return None
+	profiler.disable()
+	profiler.create_stats()
+	return profiler.stats
+
 class Environment():
 	
 	def __init__(self, name) -> None:
@@ -81,11 +188,67 @@ class Environment():
 		self.process = None
 		self.stopEvent = threading.Event()
 		self.installedDependencies = {}
+		self.nActiveCalls = 0 # the number of execute and executeBatch calls in progress, an active environment is never evicted from the pool
+		self.activeCallsLock = threading.Lock()
 
+	# onMeasured(measurement) is called once the function is executed (see measure())
+	# onProfiled(stats) is called with the cProfile stats of the call when it is given (see startProfiler)
 	@abstractmethod
-	def execute(self, module:str, function: str, args: list):
+	def execute(self, module:str, function: str, args: list, onMeasured:Callable[[dict], None]|None=None, onProfiled:Callable[[dict], None]|None=None):
 		return
 	
+	# The monitor of the process which executes the functions, None if it is unknown
+	def getMonitor(self) -> ResourceMonitor|None:
+		return None
+
+	# Measure the resources used by the environment process, onMeasured receives the measurement (see ResourceMonitor.stop) and the given fields
+	@contextmanager
+	def measure(self, onMeasured:Callable[[dict], None]|None, **fields):
+		monitor = self.getMonitor() if onMeasured is not None else None
+		if monitor is None:
+			yield
+			return
+		measurement = monitor.start()
+		try:
+			yield
+		finally:
+			onMeasured(dict(fields, **monitor.stop(measurement)))
+
+	# Count the calls in progress (see isActive)
+	@contextmanager
+	def activeCall(self):
+		with self.activeCallsLock:
+			self.nActiveCalls += 1
+		try:
+			yield
+		finally:
+			with self.activeCallsLock:
+				self.nActiveCalls -= 1
+
+	def isActive(self) -> bool:
+		return self.nActiveCalls > 0
+
+	# Profile the block in the current process, onProfiled receives the stats (nothing is profiled if onProfiled is None)
+	@contextmanager
+	def profile(self, onProfiled:Callable[[dict], None]|None):
+		profiler = startProfiler(onProfiled is not None)
+		try:
+			yield
+		finally:
+			if profiler is not None:
+				onProfiled(stopProfiler(profiler))
+
+	# Call module.function once per row, rowArgs replacing args[rowArgIndex] for each row (index, rowArgs) of rows
+	# rowFinished(index, result) is called as soon as a row is processed, onMeasured(measurement) with the resources used by the row and onProfiled(stats) with its profile
+	def executeBatch(self, module:str, function: str, args: list, rows, rowArgIndex:int=0, maxInFlight:int=16, rowFinished:Callable[[Any, Any], None]=None, onMeasured:Callable[[dict], None]|None=None, onProfiled:Callable[[dict], None]|None=None):
+		for index, rowArgs in rows:
+			callArgs = list(args)
+			callArgs[rowArgIndex] = rowArgs
+			with self.measure(onMeasured, function=function, row=index):
+				result = self.execute(module, function, callArgs, onProfiled=onProfiled)
+			if rowFinished is not None:
+				rowFinished(index, result)
+	
 	@abstractmethod
 	def _exit(self):
 		return
@@ -99,21 +262,53 @@ class ClientEnvironment(Environment):
 		self.port = port
 		self.process = process
 		self.connection = None
+		self.batchIds = itertools.count()
+		self.monitor = None
 		# self.nTries = 0
 	
 	def initialize(self):
 		self.connection = Client((EnvironmentManager.host, self.port))
 	
-	def execute(self, module:str, function: str, args: list):
+	# If the connection was closed (subprocess killed): catch and ignore the exception, otherwise: raise it
+	@contextmanager
+	def ignoreClosedConnection(self):
+		try:
+			yield
+		except EOFError:
+			print("Connection closed gracefully by the peer.")
+		except BrokenPipeError as e:
+			print("Broken pipe. The peer process might have terminated.")
+		# except (PicklingError, TypeError) as e:
+		# 	print(f"Failed to serialize the message: {e}")
+		except OSError as e:
+			if e.errno == 9:  # Bad file descriptor
+				print("Connection closed abruptly by the peer.")
+			else:
+				print(f"Unexpected OSError: {e}")
+				raise e
+
+	# The ModuleCaller process is a child of self.process (the shell which launched it)
+	def getMonitor(self):
+		if self.monitor is None and self.process is not None:
+			try:
+				self.monitor = ResourceMonitor(self.process.pid)
+			except psutil.Error:
+				return None
+		return self.monitor
+
+	# The ModuleCaller profiles the call and sends the stats with the result when onProfiled is given
+	def execute(self, module:str, function: str, args: list, onMeasured:Callable[[dict], None]|None=None, onProfiled:Callable[[dict], None]|None=None):
 		if self.connection is None: return
 		if self.connection.closed:
 			logger.warning(f'Connection not ready. Skipping execute {module}.{function}({args})')
 			return
-		try:
-			self.connection.send(dict(action='execute', module=module, function=function, args=args))
+		with self.activeCall(), self.ignoreClosedConnection(), self.measure(onMeasured, function=function):
+			self.connection.send(dict(action='execute', module=module, function=function, args=args, profile=onProfiled is not None))
 			while message := self.connection.recv():
 				if message['action'] == 'execution finished':
 					logger.info('execution finished')
+					if onProfiled is not None and message.get('profile') is not None:
+						onProfiled(message['profile'])
 					return message['result'] if 'result' in message else None
 				elif message['action'] == 'error':
 					raise ExecutionException(message)
@@ -121,19 +316,6 @@ class ClientEnvironment(Environment):
 				# 	print(message['content'])
 				else:
 					logger.warning('Got an unexpected message: ', message)
-		# If the connection was closed (subprocess killed): catch and ignore the exception, otherwise: raise it
-		except EOFError:
-			print("Connection closed gracefully by the peer.")
-		except BrokenPipeError as e:
-			print("Broken pipe. The peer process might have terminated.")
-		# except (PicklingError, TypeError) as e:
-		# 	print(f"Failed to serialize the message: {e}")
-		except OSError as e:
-			if e.errno == 9:  # Bad file descriptor
-				print("Connection closed abruptly by the peer.")
-			else:
-				print(f"Unexpected OSError: {e}")
-				raise e
 		
 		# Check that process are launched only once: id?
 		# Check that they are properly killed
@@ -146,6 +328,56 @@ class ClientEnvironment(Environment):
 		# 	self.execute(module, function, args)
 		# 	self.nTries += 1
 	
+	# Send the rows by chunks in executeBatch messages, and receive the results as they are streamed back by the ModuleCaller (see ModuleCaller.BatchExecutor)
+	# The module, function and common args are sent once per chunk instead of once per row
+	# At most maxInFlight rows are sent and not yet processed, new rows are sent once half of them are processed
+	# rows can be any iterable (a generator shared by several environments for example), it is consumed lazily
+	# The rows are processed one after the other by the ModuleCaller: the measurement of a row covers the time since the previous row finished
+	def executeBatch(self, module:str, function: str, args: list, rows, rowArgIndex:int=0, maxInFlight:int=16, rowFinished:Callable[[Any, Any], None]=None, onMeasured:Callable[[dict], None]|None=None, onProfiled:Callable[[dict], None]|None=None):
+		if self.connection is None: return
+		if self.connection.closed:
+			logger.warning(f'Connection not ready. Skipping execute batch {module}.{function}')
+			return
+		batchId = next(self.batchIds)
+		rows = iter(rows)
+		maxInFlight = max(1, maxInFlight)
+
+		def sendRows(nRows):
+			chunk = list(itertools.islice(rows, nRows))
+			if len(chunk) > 0:
+				self.connection.send(dict(action='executeBatch', batchId=batchId, module=module, function=function, args=args, rowArgIndex=rowArgIndex, rows=chunk, profile=onProfiled is not None))
+			return len(chunk)
+		
+		monitor = self.getMonitor() if onMeasured is not None else None
+		measurement = None
+		with self.activeCall(), self.ignoreClosedConnection():
+			try:
+				if monitor is not None:
+					measurement = monitor.start()
+				nInFlight = sendRows(maxInFlight)
+				while nInFlight > 0:
+					message = self.connection.recv()
+					if message['action'] == 'row finished' and message['batchId'] == batchId:
+						nInFlight -= 1
+						if measurement is not None:
+							rowMeasurement = monitor.stop(measurement)
+							measurement = monitor.start()
+							onMeasured(dict(function=function, row=message['index'], **rowMeasurement))
+						if onProfiled is not None and message.get('profile') is not None:
+							onProfiled(message['profile'])
+						if rowFinished is not None:
+							rowFinished(message['index'], message['result'])
+						if nInFlight <= maxInFlight // 2:
+							nInFlight += sendRows(maxInFlight - nInFlight)
+					elif message['action'] == 'error':
+						raise ExecutionException(message)
+					else:
+						logger.warning('Got an unexpected message: ', message)
+			finally:
+				if measurement is not None:
+					monitor.stop(measurement)
+		logger.info('batch execution finished')
+	
 	def launched(self):
 		if self.process is None: return True # can be true in Debug mode
 		return self.process.poll() is None and self.connection is not None and self.connection.writable and self.connection.readable and not self.connection.closed
@@ -183,16 +415,25 @@ class ClientEnvironment(Environment):
 	# 	self.exit()
 	
 class DirectEnvironment(Environment):
+
+	# Direct environments share the same process (and the ToolBase module state), so nodes executed concurrently must not run their tools at the same time
+	lock = threading.Lock()
+
 	def __init__(self, name) -> None:
 		super().__init__(name)
 		self.modules = {}
 
-	def execute(self, module:str, function: str, args: list):
-		if module not in self.modules:
-			self.modules[module] = import_module(module)
-		if not hasattr(self.modules[module], function):
-			raise Exception(f'Module {module} has no function {function}.')
-		return getattr(self.modules[module], function)(*args)
+	# The functions are executed in the BioImageIT process: the measurements also include the other threads of BioImageIT
+	def getMonitor(self):
+		return hostMonitor
+
+	def execute(self, module:str, function: str, args: list, onMeasured:Callable[[dict], None]|None=None, onProfiled:Callable[[dict], None]|None=None):
+		with self.lock, self.measure(onMeasured, function=function), self.profile(onProfiled):
+			if module not in self.modules:
+				self.modules[module] = import_module(module)
+			if not hasattr(self.modules[module], function):
+				raise Exception(f'Module {module} has no function {function}.')
+			return getattr(self.modules[module], function)(*args)
 
 	def _exit(self):
 		return
@@ -207,7 +448,30 @@ class EnvironmentManager:
 
 	host = 'localhost'
 	environments: dict[str, Environment] = {}
+	workers: dict[str, list[Environment]] = {}
 	proxies = None
+	# Environment name -> port of a ModuleCaller.py launched by hand (in a debugger, see PyFlow/ToolManagement/.vscode/launch.json), used instead of launching the environment
+	debugPorts: dict[str, int] = {}
+	# Incremented when the format of the manifests changes (see _loadManifest)
+	manifestVersion = 2
+
+	# Pool of the environments which are launched but not used by any node: they are kept warm to avoid relaunching them
+	# They are exited when idle for more than maxIdleTime seconds, when there are more than maxIdleEnvironments of them (least recently used first),
+	# or when the memory (RSS) of all launched environments exceeds maxMemory bytes (least recently used first)
+	# An environment is idle once it has no users (the node classes which launched it, see acquire and release)
+	idleEnvironments: dict[str, float] = {}     # environment name -> time at which it was released
+	environmentUsers: dict[str, set] = {}       # environment name -> users
+	maxIdleTime: float|None = 15 * 60
+	maxIdleEnvironments: int|None = 4
+	maxMemory: int|None = None
+	lock = threading.RLock()
+	launchLocks: dict[str, threading.Lock] = {}
+	evictionThread: threading.Thread|None = None
+	# At most maxConcurrentPrelaunches environments are launched in advance at the same time,
+	# and no more than maxIdleEnvironments are launched in advance (the others would be evicted immediately)
+	maxConcurrentPrelaunches = 2
+	prelaunchSemaphore = threading.Semaphore(maxConcurrentPrelaunches)
+	prelaunchingEnvironments: set[str] = set()
 	
 	def __init__(self, condaPath:str|Path=Path('micromamba')) -> None:
 		self.setCondaPath(condaPath)
@@ -314,27 +578,130 @@ class EnvironmentManager:
 		withoutChannel = condaDependency.split('::')[1] if '::' in condaDependency else condaDependency
 		return withoutChannel.split('|')[0] if '|' in withoutChannel else withoutChannel
 	
+	# The installed packages of each environment are parsed once and saved in a manifest (condaPath/manifests/environment.json)
+	# The manifest is valid as long as the conda history and the site-packages folders of the environment are not modified
+	def _getManifestPath(self, environment:str):
+		return self.condaPath / 'manifests' / f'{environment}.json'
+
+	def _getManifestKey(self, environment:str):
+		if isinstance(self.environments.get(environment), DirectEnvironment):
+			prefix = Path(sys.prefix)
+			sitePackages = [Path(sysconfig.get_paths()['purelib'])]
+		else:
+			prefix = self.condaPath / 'envs' / environment
+			sitePackages = sorted(prefix.glob('lib/python*/site-packages')) + sorted(prefix.glob('Lib/site-packages'))
+		return [[str(path), path.stat().st_mtime_ns if path.exists() else None] for path in [prefix / 'conda-meta' / 'history'] + sitePackages]
+
+	def _loadManifest(self, environment:str):
+		manifestPath = self._getManifestPath(environment)
+		if not manifestPath.exists(): return {}
+		try:
+			with open(manifestPath, 'r') as f:
+				manifest = json.load(f)
+		except (OSError, json.JSONDecodeError):
+			return {}
+		return manifest if manifest.get('version') == self.manifestVersion and manifest.get('key') == self._getManifestKey(environment) else {}
+
+	def _saveManifest(self, environment:str, manifest:dict):
+		manifestPath = self._getManifestPath(environment)
+		manifestPath.parent.mkdir(exist_ok=True, parents=True)
+		with open(manifestPath, 'w') as f:
+			json.dump(manifest | dict(version=self.manifestVersion, key=self._getManifestKey(environment)), f)
+
+	def invalidateManifest(self, environment:str):
+		if environment in self.environments:
+			self.environments[environment].installedDependencies = {}
+		self._getManifestPath(environment).unlink(missing_ok=True)
+
+	@staticmethod
+	def _normalizePackageName(name:str):
+		return re.sub(r'\[.*\]', '', name).lower().replace('_', '-')
+
+	# Parse the output of "micromamba list" (name version build channel) or "pip freeze" (name==version, or name @ url: the url is saved as the version)
+	def _parsePackages(self, lines:list[str], packageManager:str) -> dict[str, str|None]:
+		packages = {}
+		for line in lines:
+			if packageManager == 'pip':
+				if '==' in line:
+					name, version = line.split('==', 1)
+					packages[self._normalizePackageName(name.strip())] = version.strip()
+				elif ' @ ' in line:
+					name, url = line.split(' @ ', 1)
+					packages[self._normalizePackageName(name.strip())] = url.strip()
+			else:
+				parts = line.split()
+				# The packages installed with pip are listed in the pypi channel, they are not conda packages
+				if len(parts) >= 4 and parts[3] == 'pypi': continue
+				if len(parts) >= 2 and parts[0] not in ['Name', 'List', 'Environment'] and not parts[0].startswith('─'):
+					packages[self._normalizePackageName(parts[0])] = parts[1]
+		return packages
+
+	# The environment does not need to be launched (the installed packages of the launched environments are kept in installedDependencies)
+	def _getInstalledPackages(self, environment:str, packageManager:str) -> dict[str, str|None]:
+		launchedEnvironment = self.environments.get(environment)
+		installedDependencies = launchedEnvironment.installedDependencies if launchedEnvironment is not None else {}
+		if packageManager in installedDependencies: return installedDependencies[packageManager]
+		manifest = self._loadManifest(environment)
+		if packageManager not in manifest:
+			activateEnvironment = not isinstance(launchedEnvironment, DirectEnvironment)
+			activateEnvironmentCommands = self._activateConda() + (self._activateEnvironment(environment) if activateEnvironment else [])
+			if packageManager == 'conda':
+				lines, _ = self.executeCommands(activateEnvironmentCommands + [f'{self.condaBin} list -y'], waitComplete=True, log=False) # type: ignore
+			elif environment is not None:
+				lines, _ = self.executeCommands(activateEnvironmentCommands + [f'pip freeze'], waitComplete=True, log=False) # type: ignore
+			else:
+				lines = [f'{dist.metadata["Name"]}=={dist.version}' for dist in metadata.distributions()]
+			manifest[packageManager] = self._parsePackages(lines, packageManager)
+			self._saveManifest(environment, manifest)
+		installedDependencies[packageManager] = manifest[packageManager]
+		return installedDependencies[packageManager]
+
+	# Convert a conda match spec version ("1.2", "=1.2", "1.2.*", ">=1.2,<2", "=1.2=build") to a PEP 440 specifier set:
+	# "1.2", "=1.2" and "1.2.*" match all 1.2.* versions, "==1.2" only matches 1.2, the build strings are ignored
+	@staticmethod
+	def _condaSpecifierSet(version:str) -> SpecifierSet:
+		specifiers = []
+		for specifier in version.split(','):
+			specifier = specifier.strip()
+			if specifier.startswith('=='):
+				specifier = '==' + specifier[2:].split('=')[0]
+			elif specifier.startswith('=') or specifier[:1].isalnum():
+				specifier = specifier.lstrip('=').split('=')[0]
+				specifier = '==' + (specifier if specifier.endswith('.*') else specifier + '.*')
+			specifiers.append(specifier)
+		return SpecifierSet(','.join(specifiers))
+
+	# Pip dependencies are PEP 440 requirements ("name", "name==1.2", "name>=1.2,<2", "name~=1.2", "name[extra]>=1", "name @ url"),
+	# conda dependencies are match specs ("channel::name", "name=1.2", "name 1.2.*", "name>=1.2", see _condaSpecifierSet).
+	# A dependency without version matches any installed version, a dependency with an invalid version or specifier is never considered installed.
+	def _packageIsInstalled(self, packages:dict[str, str|None], dependency:str, packageManager:str):
+		try:
+			if packageManager == 'conda':
+				match = re.match(r'^\s*([A-Za-z0-9_.\-]+)\s*(.*?)\s*$', self._removeChannel(dependency))
+				if match is None: return False
+				name, url, specifierSet = match.group(1), None, self._condaSpecifierSet(match.group(2)) if len(match.group(2)) > 0 else SpecifierSet()
+			else:
+				requirement = Requirement(dependency)
+				if requirement.marker is not None and not requirement.marker.evaluate(): return True
+				name, url, specifierSet = requirement.name, requirement.url, requirement.specifier
+			name = self._normalizePackageName(name)
+			if name not in packages: return False
+			installedVersion = packages[name]
+			if url is not None: return installedVersion == url
+			if len(specifierSet) == 0: return True
+			return installedVersion is not None and specifierSet.contains(Version(installedVersion), prereleases=True)
+		except (InvalidRequirement, InvalidSpecifier, InvalidVersion):
+			return False
+
 	def dependenciesAreInstalled(self, environment:str, dependencies: Dependencies):
-		installedDependencies = self.environments[environment].installedDependencies if environment in self.environments else {}
-		activateEnvironment = isinstance(self.environments[environment], ClientEnvironment)
-		activateEnvironmentCommands = self._activateConda() + (self._activateEnvironment(environment) if activateEnvironment else [])
 		if 'conda' in dependencies and len(dependencies['conda'])>0:
-			if 'conda' not in installedDependencies:
-				installedDependencies['conda'], _ = self.executeCommands(activateEnvironmentCommands + [f'{self.condaBin} list -y'], waitComplete=True, log=False) # type: ignore
-			if not all([self._removeChannel(d) in installedDependencies['conda'] for d in dependencies['conda']]):
+			condaPackages = self._getInstalledPackages(environment, 'conda')
+			if not all([self._packageIsInstalled(condaPackages, d, 'conda') for d in dependencies['conda']]):
 				return False
 		if ('pip' not in dependencies) and ('pip_no_deps' not in dependencies): return True
 		
-		if 'pip' not in installedDependencies:
-			if environment is not None:
-				installedDependencies['pip'], _ = self.executeCommands(activateEnvironmentCommands + [f'pip freeze'], waitComplete=True, log=False) # type: ignore
-			else:
-				installedDependencies['pip'] = [f'{dist.metadata["Name"]}=={dist.version}' for dist in metadata.distributions()]
-
-		allPipDepsAreSatisfied = True
-		if 'pip' in dependencies: allPipDepsAreSatisfied = allPipDepsAreSatisfied and all([d in installedDependencies['pip'] for d in dependencies['pip']])
-		if 'pip_no_deps' in dependencies: allPipDepsAreSatisfied = allPipDepsAreSatisfied and all([d in installedDependencies['pip'] for d in dependencies['pip_no_deps']])
-		return allPipDepsAreSatisfied
+		pipPackages = self._getInstalledPackages(environment, 'pip')
+		return all([self._packageIsInstalled(pipPackages, d, 'pip') for d in dependencies.get('pip', []) + dependencies.get('pip_no_deps', [])])
 
 	def _getPlatformCommonName(self):
 		return 'mac' if platform.system() == 'Darwin' else platform.system().lower()
@@ -417,7 +784,7 @@ class EnvironmentManager:
 	def install(self, environment:str, package:str, channel=None):
 		channel = channel + '::' if channel is not None else ''
 		self.executeCommands(self._activateConda() + self._activateEnvironment(environment) + [f'{self.condaBinConfig} install {channel}{package} -y'], waitComplete=True)
-		self.environments[environment].installedDependencies = {}
+		self.invalidateManifest(environment)
 	
 	def platformCondaFormat(self):
 		machine = platform.machine() # machine can be arm64, AMD64 or maybe x86_64
@@ -468,8 +835,7 @@ class EnvironmentManager:
 		proxyArgs = f'--proxy {proxyString}' if proxyString is not None else ''
 		installDepsCommands += [f'echo "Installing pip dependencies..."', f'pip install {proxyArgs} {" ".join(pipDependencies)}'] if len(pipDependencies)>0 else []
 		installDepsCommands += [f'echo "Installing additional pip dependencies without their dependencies..."', f'pip install {proxyArgs} --no-dependencies {" ".join(pipNoDepsDependencies)}'] if len(pipNoDepsDependencies)>0 else []
-		if environment in self.environments:
-			self.environments[environment].installedDependencies = {}
+		self.invalidateManifest(environment)
 		return installDepsCommands
 	
 	def _getCommandsForCurrentPlatfrom(self, additionalCommands:dict[str, list[str]]={}):
@@ -480,13 +846,17 @@ class EnvironmentManager:
 			commands += additionalCommands[self._getPlatformCommonName()]
 		return commands
 	
-	def create(self, environment:str, dependencies:Any={}, additionalInstallCommands:dict[str, list[str]]={}, additionalActivateCommands:dict[str, list[str]]={}, mainEnvironment:str|None=None, errorIfExists=False, raiseIncompatibilityException=True) -> bool:
+	# With installMissingDependencies, the dependencies which are not installed in the existing environment are installed
+	# (for the environments whose dependencies change between versions, like the thumbnailGenerator one)
+	def create(self, environment:str, dependencies:Any={}, additionalInstallCommands:dict[str, list[str]]={}, additionalActivateCommands:dict[str, list[str]]={}, mainEnvironment:str|None=None, errorIfExists=False, raiseIncompatibilityException=True, installMissingDependencies=False) -> bool:
 		if mainEnvironment is not None and self.dependenciesAreInstalled(mainEnvironment, dependencies): return False
 		if self.environmentExists(environment):
 			if errorIfExists:
 				raise Exception(f'Error: the environment {environment} already exists.')
-			else:
-				return True
+			if installMissingDependencies and not self.dependenciesAreInstalled(environment, dependencies):
+				logger.info(f'Install the missing dependencies of {environment}...')
+				self.executeCommands(self._activateConda() + self.installDependencies(environment, dependencies, raiseIncompatibilityException), waitComplete=True)
+			return True
 		pythonVersion = str(dependencies['python']).replace('=', '') if 'python' in dependencies and dependencies['python'] else ''
 		match = re.search(r'(\d+)\.(\d+)', pythonVersion)
 		if match and (int(match.group(1))<3 or int(match.group(2))<9):
@@ -508,20 +878,16 @@ class EnvironmentManager:
 	# 	commands = self._activateConda() + [f'{self.condaBin} activate {environment}'] + commands
 	# 	return self.executeCommands(commands, env=environmentVariables)
 
-	def launch(self, environment:str, customCommand:str|None=None, environmentVariables:dict[str, str]|None=None, condaEnvironment=True, additionalActivateCommands:dict[str, list[str]]={}, direct=False) -> Environment:
-		if self.environmentIsLaunched(environment):
-			return self.environments[environment]
-		if direct:
-			self.environments[environment] = DirectEnvironment(environment)
-			return self.environments[environment]
+	def _launchClient(self, environment:str, customCommand:str|None=None, environmentVariables:dict[str, str]|None=None, condaEnvironment=True, additionalActivateCommands:dict[str, list[str]]={}) -> ClientEnvironment:
 		moduleCallerPath = Path(__file__).parent / 'ModuleCaller.py'
 		commands = self._activateConda() + self._activateEnvironment(environment) if condaEnvironment else []
 		commands += self._getCommandsForCurrentPlatfrom(additionalActivateCommands)
 		commands += [f'python -u "{moduleCallerPath}"' if customCommand is None else customCommand]
-		debug = False # environment == 'napari' # customCommand is not None and 'NapariManager' in customCommand
-		port = -1 if not debug else 60873 # Replace port number by the one you get when you debug ModuleCaller.py ; see PyFlow/ToolManagement/.vscode/launch.json
+		# Connect to the ModuleCaller launched in a debugger instead of launching one
+		debug = environment in self.debugPorts
+		port = self.debugPorts.get(environment, -1)
 		process = cast(subprocess.Popen, self.executeCommands(commands, env=environmentVariables)) if not debug else None
-		if process is None: raise Exception('Error while launching environment')
+		if process is None and not debug: raise Exception('Error while launching environment')
 		# The python command is called with the -u (unbuffered) option, we can wait for a specific print before letting the process run by itself
 		# if the unbuffered option is not set, the following can wait for the whole python process to finish
 		if not debug and process.stdout is not None:
@@ -540,13 +906,46 @@ class EnvironmentManager:
 					process.stdout.close()
 					raise Exception(f'Process exited with return code {process.returncode}.')
 		ce = ClientEnvironment(environment, port, process)
-		self.environments[environment] = ce
 		ce.initialize()
 		return ce
+
+	def launch(self, environment:str, customCommand:str|None=None, environmentVariables:dict[str, str]|None=None, condaEnvironment=True, additionalActivateCommands:dict[str, list[str]]={}, direct=False) -> Environment:
+		# Only one thread can launch a given environment at a time (it can be pre-launched in another thread, see prelaunch())
+		with self.lock:
+			launchLock = self.launchLocks.setdefault(environment, threading.Lock())
+		with launchLock:
+			with self.lock:
+				if self.environmentIsLaunched(environment):
+					self.idleEnvironments.pop(environment, None)
+					return self.environments[environment]
+			if direct:
+				self.environments[environment] = DirectEnvironment(environment)
+				return self.environments[environment]
+			ce = self._launchClient(environment, customCommand, environmentVariables, condaEnvironment, additionalActivateCommands)
+			with self.lock:
+				self.environments[environment] = ce
+			return ce
+	
+	# Launch additional ModuleCaller processes of an already launched environment, so that rows can be processed in parallel
+	# Returns the main environment followed by nWorkers-1 workers ; workers are reused between calls and exited with the main environment
+	# logOutput(process, stopEvent) is called in a new thread for each new worker, to consume its output
+	def launchWorkers(self, environment:str, nWorkers:int, additionalActivateCommands:dict[str, list[str]]={}, logOutput:Callable[[subprocess.Popen, threading.Event], None]|None=None) -> list[Environment]:
+		if not self.environmentIsLaunched(environment):
+			raise Exception(f'Error: the environment {environment} must be launched before its workers.')
+		mainEnvironment = self.environments[environment]
+		if not isinstance(mainEnvironment, ClientEnvironment): return [mainEnvironment]
+		workers = [worker for worker in self.workers.get(environment, []) if worker.launched()]
+		while len(workers) < nWorkers - 1:
+			worker = self._launchClient(environment, additionalActivateCommands=additionalActivateCommands)
+			if logOutput is not None and worker.process is not None:
+				threading.Thread(target=logOutput, args=(worker.process, worker.stopEvent), daemon=True).start()
+			workers.append(worker)
+		self.workers[environment] = workers
+		return [mainEnvironment] + workers[:max(nWorkers-1, 0)]
 	
 	# @contextmanager
-	def createAndLaunch(self, environment:str, dependencies:Any={}, customCommand:str|None=None, environmentVariables:dict[str, str]|None=None, additionalInstallCommands:dict[str, list[str]]={}, additionalActivateCommands:dict[str, list[str]]={}, mainEnvironment:str|None=None, raiseIncompatibilityException=True) -> Environment:
-		environmentIsRequired = self.create(environment, dependencies, additionalInstallCommands=additionalInstallCommands, additionalActivateCommands=additionalActivateCommands, mainEnvironment=mainEnvironment, raiseIncompatibilityException=raiseIncompatibilityException)
+	def createAndLaunch(self, environment:str, dependencies:Any={}, customCommand:str|None=None, environmentVariables:dict[str, str]|None=None, additionalInstallCommands:dict[str, list[str]]={}, additionalActivateCommands:dict[str, list[str]]={}, mainEnvironment:str|None=None, raiseIncompatibilityException=True, installMissingDependencies=False) -> Environment:
+		environmentIsRequired = self.create(environment, dependencies, additionalInstallCommands=additionalInstallCommands, additionalActivateCommands=additionalActivateCommands, mainEnvironment=mainEnvironment, raiseIncompatibilityException=raiseIncompatibilityException, installMissingDependencies=installMissingDependencies)
 		if environmentIsRequired:
 			return self.launch(environment, customCommand, environmentVariables=environmentVariables, additionalActivateCommands=additionalActivateCommands)
 			# ce = self.launch(environment)
@@ -557,10 +956,113 @@ class EnvironmentManager:
 		else:
 			return DirectEnvironment(environment)
 	
+	# Launch the environment in a new thread if it is already installed, and keep it in the idle pool until it is used
+	# Nothing is launched if the dependencies are installed in mainEnvironment (the tool will be executed there), or if the environment must be created
+	# Returns None if the environment is not launched in advance because the idle pool would be full (see maxIdleEnvironments)
+	def prelaunch(self, environment:str, dependencies:Any={}, additionalActivateCommands:dict[str, list[str]]={}, mainEnvironment:str|None=None, logOutput:Callable[[subprocess.Popen, threading.Event], None]|None=None) -> threading.Thread|None:
+		with self.lock:
+			if environment in self.prelaunchingEnvironments or self.environmentIsLaunched(environment): return None
+			if self.maxIdleEnvironments is not None and len(self.idleEnvironments) + len(self.prelaunchingEnvironments) >= self.maxIdleEnvironments: return None
+			self.prelaunchingEnvironments.add(environment)
+		def launchIfInstalled():
+			try:
+				with self.prelaunchSemaphore:
+					if self.environmentIsLaunched(environment) or not self.environmentExists(environment): return
+					if mainEnvironment is not None and mainEnvironment in self.environments and self.dependenciesAreInstalled(mainEnvironment, dependencies): return
+					launchedEnvironment = self.launch(environment, additionalActivateCommands=additionalActivateCommands)
+				if logOutput is not None and launchedEnvironment.process is not None:
+					threading.Thread(target=logOutput, args=(launchedEnvironment.process, launchedEnvironment.stopEvent), daemon=True).start()
+				self.release(launchedEnvironment)
+			except Exception as e:
+				logger.warning(f'Could not launch environment {environment} in advance: {e}')
+			finally:
+				with self.lock:
+					self.prelaunchingEnvironments.discard(environment)
+		thread = threading.Thread(target=launchIfInstalled, daemon=True)
+		thread.start()
+		return thread
+
+	# The user (a node class for example) uses the environment: it is not idle until all its users release it
+	def acquire(self, environment:Environment|str, user:Any):
+		environmentName = environment if isinstance(environment, str) else environment.name
+		with self.lock:
+			self.environmentUsers.setdefault(environmentName, set()).add(user)
+			self.idleEnvironments.pop(environmentName, None)
+
+	# The user does not use the environment anymore: once it has no users, keep it launched in the idle pool, it will be exited when evicted
+	def release(self, environment:Environment|str, user:Any=None):
+		environmentName = environment if isinstance(environment, str) else environment.name
+		with self.lock:
+			users = self.environmentUsers.get(environmentName, set())
+			users.discard(user)
+			if len(users) > 0: return
+			self.environmentUsers.pop(environmentName, None)
+			if not isinstance(self.environments.get(environmentName), ClientEnvironment): return
+			self.idleEnvironments[environmentName] = time.time()
+		self.evictIdleEnvironments()
+	
+	def configurePool(self, maxIdleTime:float|None=None, maxIdleEnvironments:int|None=None, maxMemory:int|None=None):
+		self.maxIdleTime = maxIdleTime
+		self.maxIdleEnvironments = maxIdleEnvironments
+		self.maxMemory = maxMemory
+		if self.evictionThread is None:
+			self.evictionThread = threading.Thread(target=self._evictPeriodically, daemon=True)
+			self.evictionThread.start()
+		self.evictIdleEnvironments()
+
+	def _evictPeriodically(self, period=30):
+		while True:
+			time.sleep(period)
+			try:
+				self.evictIdleEnvironments()
+			except Exception as e:
+				logger.warning(f'Error while exiting idle environments: {e}')
+	
+	# The resident memory of the environment processes (and their children), workers included
+	def getMemoryUsage(self, environmentName:str) -> int:
+		memory = 0
+		for environment in [self.environments.get(environmentName)] + self.workers.get(environmentName, []):
+			if environment is None or environment.process is None: continue
+			try:
+				process = psutil.Process(environment.process.pid)
+				memory += sum([p.memory_info().rss for p in [process] + process.children(recursive=True)])
+			except psutil.Error:
+				pass
+		return memory
+
+	# Whether the environment or one of its workers is executing something
+	def isActive(self, environmentName:str) -> bool:
+		return any([environment is not None and environment.isActive() for environment in [self.environments.get(environmentName)] + self.workers.get(environmentName, [])])
+
+	# The environments executing something are never evicted
+	def evictIdleEnvironments(self):
+		with self.lock:
+			leastRecentlyUsed = sorted([name for name in self.idleEnvironments if not self.isActive(name)], key=lambda name: self.idleEnvironments[name])
+			now = time.time()
+			for name in leastRecentlyUsed.copy():
+				tooOld = self.maxIdleTime is not None and now - self.idleEnvironments[name] > self.maxIdleTime
+				tooMany = self.maxIdleEnvironments is not None and len(leastRecentlyUsed) > self.maxIdleEnvironments
+				if tooOld or tooMany:
+					logger.info(f'Exit idle environment {name}')
+					self.exit(name)
+					leastRecentlyUsed.remove(name)
+			if self.maxMemory is None or len(leastRecentlyUsed) == 0: return
+			memory = sum([self.getMemoryUsage(name) for name in self.environments])
+			while memory > self.maxMemory and len(leastRecentlyUsed) > 0:
+				name = leastRecentlyUsed.pop(0)
+				memory -= self.getMemoryUsage(name)
+				logger.info(f'Exit idle environment {name} to free memory')
+				self.exit(name)
+
 	def exit(self, environment:Environment|str):
 		environmentName = environment if isinstance(environment, str) else environment.name
-		if environmentName in self.environments:
-			self.environments[environmentName]._exit()
-			del self.environments[environmentName]
+		with self.lock:
+			self.idleEnvironments.pop(environmentName, None)
+			self.environmentUsers.pop(environmentName, None)
+			if environmentName in self.environments:
+				self.environments[environmentName]._exit()
+				del self.environments[environmentName]
+			for worker in self.workers.pop(environmentName, []):
+				worker._exit()
 	
 environmentManager = EnvironmentManager()
\ No newline at end of file
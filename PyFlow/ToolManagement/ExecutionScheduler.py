@@ -0,0 +1,194 @@
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Executes the nodes of a workflow as soon as their input nodes are executed.
+# Independent branches run concurrently, with at most maxActiveEnvironments pipelines (usually single nodes) running at the same time.
+# Two nodes using the same environment never run at the same time, since an environment processes one call at a time
+# (the rows of a node can still be processed in parallel by the environment workers, see BiitToolNode.nWorkers).
+# When pipelineRows is True, chains of nodes processing their rows one by one are executed at the same time (see executePipeline):
+# row i of a node is processed as soon as row i of the previous node is processed.
+# When fuseNodes is True, chains of nodes using the same environment are fused (see executeFusedNodes):
+# they are executed with a single call per row, the intermediate outputs being passed in memory.
+# Used by the GUI (RunTool.executeNodes) and the headless WorkflowManager.executeWorkflow.
+class ExecutionScheduler:
+
+	def __init__(self, nodes:list, executeNode:Callable, maxActiveEnvironments:int=1, log:Callable[[str], None]=print, pipelineRows:bool=False, fuseNodes:bool=False, skipIntermediateFiles:bool=False) -> None:
+		self.nodes = list(nodes)
+		self.executeNode = executeNode      # executeNode(node, n, nNodes) executes the node, it returns False if the node could not be executed
+		self.maxActiveEnvironments = max(1, int(maxActiveEnvironments or 1))
+		self.pipelineRows = pipelineRows
+		self.fuseNodes = fuseNodes
+		self.skipIntermediateFiles = skipIntermediateFiles   # do not write the outputs of the fused nodes which are only used in memory
+		self.log = log
+		self.cancelEvent = threading.Event()
+		self.runningNodes = []
+		self.skippedNodes = []      # the nodes of the launched pipelines which could not be executed since their inputs were not executed (see executePipeline)
+		self.lock = threading.Lock()
+
+	# The readiness helpers of the nodes, shared with RunTool and WorkflowManager
+	@staticmethod
+	def isBiitLib(node):
+		return node.lib == 'BiitLib'
+
+	@staticmethod
+	def wasExecuted(node):
+		return getattr(node, 'executed', False)
+
+	@staticmethod
+	def getInputNodes(node):
+		return [outputPin.owningNode() for inputPin in node.inputs.values() for outputPin in inputPin.affected_by]
+
+	# The rows of a pipelined node are processed as its input node produces them (see executeStreamedNodes)
+	@staticmethod
+	def inputsWereExecuted(node):
+		if getattr(node, 'inputStream', None) is not None: return True
+		return len(node.inputs) == 0 or all([not ExecutionScheduler.isBiitLib(n) or ExecutionScheduler.wasExecuted(n) for n in ExecutionScheduler.getInputNodes(node)])
+
+	@staticmethod
+	def getEnvironmentName(node):
+		tool = getattr(node, 'Tool', None)
+		return getattr(tool, 'environment', None) or node.name
+
+	# Group the nodes in pipelines: a node follows the previous one in the pipeline if it is its only input node, and
+	# - if both can be fused and use the same environment (see BiitToolNode.canFuseRows): the pipeline is fused,
+	# - or if both can stream their rows (see BiitToolNode.canStreamRows and canProcessStreamedRows), and if it uses another environment.
+	# Without pipelineRows nor fuseNodes, each node is a pipeline on its own
+	def getPipelines(self):
+		pipelines = []
+		for node in self.nodes:
+			pipeline = next((p for p in pipelines if self.canFuse(p, node) or self.canFollow(p, node)), None)
+			if pipeline is not None:
+				pipeline.append(node)
+				continue
+			if self.pipelineRows:
+				previousPipeline = next((p for p in pipelines if self.getInputNodes(node) == [p[-1]]), None)
+				if previousPipeline is not None:
+					self.log(f'The rows of {node.name} cannot be pipelined with {previousPipeline[-1].name}: {node.name} will be executed once {previousPipeline[-1].name} is executed')
+			pipelines.append([node])
+		return pipelines
+
+	# A fused pipeline is a chain of nodes using the same environment (the nodes of a streamed pipeline use different environments)
+	def isFused(self, pipeline):
+		return len(pipeline) > 1 and len(set([self.getEnvironmentName(node) for node in pipeline])) == 1
+
+	def canFuse(self, pipeline, node):
+		previousNode = pipeline[-1]
+		if not self.fuseNodes or self.getInputNodes(node) != [previousNode] or self.getEnvironmentName(node) != self.getEnvironmentName(previousNode): return False
+		if len(pipeline) > 1 and not self.isFused(pipeline): return False
+		return all([callable(getattr(n, 'canFuseRows', None)) and n.canFuseRows() for n in [previousNode, node]])
+
+	def canFollow(self, pipeline, node):
+		previousNode = pipeline[-1]
+		if not self.pipelineRows or self.isFused(pipeline): return False
+		if self.getInputNodes(node) != [previousNode]: return False
+		if not callable(getattr(previousNode, 'canStreamRows', None)) or not previousNode.canStreamRows(): return False
+		if not callable(getattr(node, 'canProcessStreamedRows', None)) or not node.canProcessStreamedRows(): return False
+		return self.getEnvironmentName(node) not in [self.getEnvironmentName(n) for n in pipeline]
+
+	# A pipeline counts as a single running node, whatever the number of environments it uses: the pipelining of a chain is not limited by maxActiveEnvironments
+	def getReadyPipelines(self, pendingPipelines, activeEnvironments, nRunningPipelines=0):
+		readyPipelines = []
+		readyEnvironments = set()
+		for pipeline in pendingPipelines:
+			if nRunningPipelines + len(readyPipelines) >= self.maxActiveEnvironments: break
+			environments = set([self.getEnvironmentName(node) for node in pipeline])
+			if len(environments & (activeEnvironments | readyEnvironments)) > 0: continue
+			if self.inputsWereExecuted(pipeline[0]):
+				readyPipelines.append(pipeline)
+				readyEnvironments |= environments
+		return readyPipelines
+
+	# The nodes which cannot be fused or streamed once computed are executed afterwards, one after the other
+	def executePipeline(self, pipeline, n, nNodes):
+		if len(pipeline) == 1:
+			return self.executeNode(pipeline[0], n, nNodes)
+		nExecuted = self.executeFusedNodes(pipeline, n, nNodes) if self.isFused(pipeline) else self.executeStreamedNodes(pipeline, n, nNodes)
+		for i, node in enumerate(pipeline[nExecuted:]):
+			if self.cancelEvent.is_set(): return False
+			if not self.inputsWereExecuted(node):
+				with self.lock:
+					self.skippedNodes += pipeline[nExecuted+i:]
+				return False
+			self.executeNode(node, n+nExecuted+i, nNodes)
+		return True
+
+	# Execute the first node of the pipeline, it executes the nodes fused with it (see BiitToolNode.fuseNodes), returns the number of executed nodes
+	def executeFusedNodes(self, pipeline, n, nNodes):
+		nFused = 1 + pipeline[0].fuseNodes(pipeline[1:], self.skipIntermediateFiles)
+		if nFused > 1:
+			self.log(f'Fuse the nodes {", ".join([node.name for node in pipeline[:nFused]])}')
+		try:
+			self.executeNode(pipeline[0], n, nNodes)
+		finally:
+			pipeline[0].fuseNodes([])
+		return nFused
+
+	# Execute the nodes of the pipeline at the same time, each one processing the rows of the previous one as they are produced (see BiitToolNode.streamRowsFrom)
+	# Returns the number of executed nodes
+	def executeStreamedNodes(self, pipeline, n, nNodes):
+		nStreamed = 1
+		while nStreamed < len(pipeline) and pipeline[nStreamed].streamRowsFrom(pipeline[nStreamed-1]):
+			nStreamed += 1
+		if nStreamed > 1:
+			self.log(f'Pipeline the rows of {", ".join([node.name for node in pipeline[:nStreamed]])}')
+
+		def executeStreamedNode(node, n):
+			try:
+				return self.executeNode(node, n, nNodes)
+			finally:
+				node.closeStreams()
+
+		with ThreadPoolExecutor(max_workers=nStreamed) as executor:
+			futures = [executor.submit(executeStreamedNode, node, n+i) for i, node in enumerate(pipeline[:nStreamed])]
+		for future in futures:
+			future.result()
+		return nStreamed
+
+	# Returns True if all nodes were executed, False if the execution was canceled or some nodes could not be executed
+	# Exceptions raised by a node are raised again once the other running nodes are finished
+	def run(self):
+		self.skippedNodes = []
+		pendingPipelines = self.getPipelines()
+		running = {}    # future -> pipeline
+		nLaunched = 0
+		exception = None
+		with ThreadPoolExecutor(max_workers=self.maxActiveEnvironments) as executor:
+			while len(pendingPipelines) > 0 or len(running) > 0:
+				if not self.cancelEvent.is_set() and exception is None:
+					activeEnvironments = set([self.getEnvironmentName(node) for pipeline in running.values() for node in pipeline])
+					for pipeline in self.getReadyPipelines(pendingPipelines, activeEnvironments, len(running)):
+						pendingPipelines.remove(pipeline)
+						with self.lock:
+							self.runningNodes += pipeline
+						running[executor.submit(self.executePipeline, pipeline, nLaunched, len(self.nodes))] = pipeline
+						nLaunched += len(pipeline)
+				if len(running) == 0:
+					break
+				done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+				for future in done:
+					pipeline = running.pop(future)
+					with self.lock:
+						for node in pipeline:
+							self.runningNodes.remove(node)
+					try:
+						future.result()
+					except Exception as e:
+						# Do not launch new nodes, wait for the running ones and raise
+						if exception is None:
+							exception = e
+		if exception is not None:
+			raise exception
+		pendingNodes = self.skippedNodes + [node for pipeline in pendingPipelines for node in pipeline]
+		if len(pendingNodes) > 0 and not self.cancelEvent.is_set():
+			self.log(f'The following nodes could not be executed since their inputs were not executed: {", ".join([n.name for n in pendingNodes])}')
+		return len(pendingNodes) == 0 and not self.cancelEvent.is_set()
+
+	# Stop launching nodes and exit the environments of the running ones
+	def cancel(self):
+		self.cancelEvent.set()
+		with self.lock:
+			runningNodes = list(self.runningNodes)
+		for node in runningNodes:
+			if hasattr(node, 'exitTool'):
+				node.exitTool()
@@ -1,4 +1,6 @@
 import sys
+import cProfile
+import queue
 import logging
 import threading
 import traceback
@@ -54,19 +56,91 @@ def getMessage(connection):
 	logger.debug(f'Waiting for message...')
 	return connection.recv()
 
+def getFunction(message):
+	module = import_module(message['module'])
+	if not hasattr(module, message['function']):
+		raise Exception(f'Module {message["module"]} has no function {message["function"]}.')
+	return getattr(module, message['function'])
+
+# Profile the calls of the current thread with cProfile until stopProfiler() ; returns None if not enabled or if they are already profiled
+# (profilers cannot be nested: the outer one would stop receiving the calls, or enable() fails on Python >= 3.12)
+# Kept identical to EnvironmentManager.startProfiler: this module runs in the tool environments and cannot import PyFlow modules
+def startProfiler(enabled=True):
+	if not enabled or sys.getprofile() is not None: return None
+	profiler = cProfile.Profile()
+	try:
+		profiler.enable()
+	except ValueError:
+		return None
+	return profiler
+
+# Returns the raw stats of the profiler (see pstats.Stats), which can be pickled, or None if there is no profiler
+# Kept identical to EnvironmentManager.stopProfiler
+def stopProfiler(profiler):
+	if profiler is None: return None
+	profiler.disable()
+	profiler.create_stats()
+	return profiler.stats
+
+# Returns the result of the call and its profile (None if the message does not ask for it, or if it cannot be profiled)
+def callFunction(message, args):
+	profiler = startProfiler(message.get('profile', False))
+	try:
+		result = getFunction(message)(*args)
+	finally:
+		profile = stopProfiler(profiler)
+	return result, profile
+
 def functionExecutor(lock, connection, message):
 	try:
-		module = import_module(message['module'])
-		if not hasattr(module, message['function']):
-			raise Exception(f'Module {message["module"]} has no function {message["function"]}.')
-		result = getattr(module, message['function'])(*message['args'])
+		result, profile = callFunction(message, message['args'])
 		logger.info(f'Executed')
 		with lock:
-			connection.send(dict(action='execution finished', message='process execution done', result=result))
+			connection.send(dict(action='execution finished', message='process execution done', result=result, profile=profile))
 	except Exception as e:
 		with lock:
 			connection.send(dict(action='error', exception=str(e), traceback=traceback.format_tb(e.__traceback__)))
 
+# Processes the rows of the executeBatch messages one after the other, in a single thread
+# Each executeBatch message contains the function to call, its args, and a list of rows (index, rowArgs): rowArgs replaces args[rowArgIndex]
+# The result of each row is sent back as soon as it is computed (action 'row finished'), so that the client can send more rows
+# Once a row of a batch fails, the remaining rows of this batch are skipped
+class BatchExecutor:
+
+	def __init__(self, lock, connection) -> None:
+		self.lock = lock
+		self.connection = connection
+		self.rows = queue.Queue()
+		self.failedBatches = set()
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+	def add(self, message):
+		for index, rowArgs in message['rows']:
+			self.rows.put((message, index, rowArgs))
+	
+	def stop(self):
+		self.rows.put(None)
+
+	def run(self):
+		while (row := self.rows.get()) is not None:
+			message, index, rowArgs = row
+			if message['batchId'] in self.failedBatches: continue
+			try:
+				args = list(message['args'])
+				args[message['rowArgIndex']] = rowArgs
+				result, profile = callFunction(message, args)
+				logger.debug(f'Executed row {index}')
+				with self.lock:
+					self.connection.send(dict(action='row finished', batchId=message['batchId'], index=index, result=result, profile=profile))
+			except Exception as e:
+				self.failedBatches.add(message['batchId'])
+				try:
+					with self.lock:
+						self.connection.send(dict(action='error', batchId=message['batchId'], index=index, exception=str(e), traceback=traceback.format_tb(e.__traceback__)))
+				except OSError:
+					return
+
 def launchListener():
 	lock = threading.Lock()
 	with Listener(('localhost', 0)) as listener:
@@ -75,6 +149,7 @@ def launchListener():
 			print(f'Listening port {listener.address[1]}')
 			with listener.accept() as connection:
 				logger.debug(f'Connection accepted {listener.address}')
+				batchExecutor = None
 				try:
 					while message := getMessage(connection):
 						logger.debug(f'Got message: {message}')
@@ -87,8 +162,16 @@ def launchListener():
 								thread = threading.Thread(target=functionExecutor, args=(lock, connection, message))
 								thread.start()
 
+							if message['action'] == 'executeBatch':
+								logger.info(f'Execute {message["module"]}.{message["function"]} on {len(message["rows"])} rows')
+								if batchExecutor is None:
+									batchExecutor = BatchExecutor(lock, connection)
+								batchExecutor.add(message)
+
 							if message['action'] == 'exit':
 								logger.info(f'exit')
+								if batchExecutor is not None:
+									batchExecutor.stop()
 								with lock:
 									connection.send(dict(action='exited'))
 								connection.close()
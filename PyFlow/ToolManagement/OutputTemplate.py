@@ -0,0 +1,72 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+import pandas
+
+# Output path templates, evaluated on all rows of a DataFrame at once (see BiitToolNode.setOutputColumns):
+# - {input}, {input.stem}, {input.name}, {input.parent.name}, {input.ext}, {input.exts}: the input value, or its file stem, file name, parent folder name, extension, extensions
+# - (column): the value of the row at this column
+# - [workflow_folder], [node_folder]: the workflow and node data folders, [index]: the row index, [ext]: the output extension
+# The template is parsed once, then each part is evaluated column-wise: path operations are only computed once per unique input value
+class OutputTemplate:
+
+	tokenPattern = re.compile(r'\{([a-zA-Z0-9_-]+)(\.stem|\.name|\.parent\.name|\.exts|\.ext)?\}|\(([a-zA-Z0-9_-]+)\)')
+	folders = ['[workflow_folder]', '[node_folder]']
+	accessors = {
+		None: lambda value: value,
+		'.stem': lambda value: Path(value).stem,
+		'.name': lambda value: Path(value).name,
+		'.parent.name': lambda value: Path(value).parent.name,
+		'.ext': lambda value: Path(value).suffix,
+		'.exts': lambda value: ''.join(Path(value).suffixes),
+	}
+
+	def __init__(self, template:str) -> None:
+		self.template = template
+		self.parts = []     # list of ('text', text, None) | ('input', inputName, accessor) | ('column', columnName, None)
+		position = 0
+		for match in self.tokenPattern.finditer(template):
+			if match.start() > position:
+				self.parts.append(('text', template[position:match.start()], None))
+			if match.group(1) is not None:
+				self.parts.append(('input', match.group(1), match.group(2)))
+			else:
+				self.parts.append(('column', match.group(3), None))
+			position = match.end()
+		if position < len(template):
+			self.parts.append(('text', template[position:], None))
+
+	@staticmethod
+	def mapUniqueValues(values:pandas.Series, function):
+		return values.map({ value: function(value) for value in values.unique() })
+
+	# getInput(name) returns the values of the input as strings: a string if it is the same for all rows, a Series otherwise
+	def evaluate(self, data:pandas.DataFrame, getInput, workflowFolder:str, nodeFolder:str, extension:str|None=None) -> pandas.Series:
+		result = pandas.Series('', index=data.index, dtype=object)
+		for kind, name, accessor in self.parts:
+			if kind == 'text':
+				result = result + name
+			elif kind == 'input':
+				values = getInput(name)
+				result = result + (self.accessors[accessor](values) if isinstance(values, str) else self.mapUniqueValues(values, self.accessors[accessor]))
+			else:
+				result = result + (data[name].astype(str) if name in data.columns else f'({name})')
+
+		# If the value is relative but does not contain [workflow_folder] nor [node_folder]: make it relative to the node_folder
+		hasFolder = pandas.Series(False, index=data.index)
+		for folder in self.folders:
+			hasFolder = hasFolder | result.str.contains(folder, regex=False)
+		relative = ~hasFolder & ~self.mapUniqueValues(result, lambda value: Path(value).is_absolute())
+		result = result.where(~relative, '[node_folder]/' + result)
+
+		result = result.str.replace('[workflow_folder]', workflowFolder, regex=False)
+		result = result.str.replace('[node_folder]', nodeFolder, regex=False)
+		if result.str.contains('[index]', regex=False).any():
+			result = pandas.Series([value.replace('[index]', str(index)) for value, index in zip(result, data.index)], index=data.index, dtype=object)
+		if extension is not None:
+			result = result.str.replace('[ext]', extension, regex=False)
+		return result
+
+@lru_cache(maxsize=256)
+def getOutputTemplate(template:str) -> OutputTemplate:
+	return OutputTemplate(template)
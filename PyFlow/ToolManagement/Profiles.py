@@ -0,0 +1,120 @@
+import json
+import pstats
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from PyFlow.ToolManagement.EnvironmentManager import startProfiler, stopProfiler
+
+# The cProfile stats of a node execution, saved in Metadata/<node>/ when the node is executed with profileNextExecution (see BiitToolNode):
+# - host: the BioImageIT side of the execution (the last compute and execute: pandas bookkeeping, row cache, etc., and the tools running in BioImageIT),
+# - tool: the calls executed by the tool environment (ModuleCaller), merged over all rows and workers.
+# Each source is saved as profile_<source>.pstats (open it with python -m pstats, snakeviz, etc.),
+# and all sources are saved in profile.speedscope.json (open it on https://www.speedscope.app).
+class Profile:
+
+	speedscopeName = 'profile.speedscope.json'
+	minWeight = 1e-4 # The call paths taking less than this fraction of the total time are not exported to speedscope
+	maxDepth = 128
+
+	def __init__(self, folder:Path, name:str) -> None:
+		self.folder = Path(folder)
+		self.name = name
+		self.stats: dict[str, pstats.Stats] = {}
+		self.lock = threading.Lock()
+
+	# Merge the raw stats (see stopProfiler) of a call in the given source
+	def add(self, source:str, stats:dict|None):
+		if stats is None or len(stats) == 0: return
+		with self.lock:
+			if source in self.stats:
+				self.stats[source].add(RawStats(stats))
+			else:
+				self.stats[source] = pstats.Stats(RawStats(stats))
+
+	# The onProfiled callback of the environment calls
+	def getRecorder(self, source:str):
+		return lambda stats: self.add(source, stats)
+
+	# Profile the block in the current thread
+	@contextmanager
+	def capture(self, source:str):
+		stats = {}
+		try:
+			with capture() as stats:
+				yield
+		finally:
+			self.add(source, stats)
+
+	# Returns the paths of the saved files
+	def save(self) -> list[Path]:
+		if len(self.stats) == 0: return []
+		self.folder.mkdir(exist_ok=True, parents=True)
+		paths = []
+		with self.lock:
+			for source, stats in self.stats.items():
+				paths.append(self.folder / f'profile_{source}.pstats')
+				stats.dump_stats(paths[-1])
+			speedscope = toSpeedscope({ source: stats.stats for source, stats in self.stats.items() }, self.name, self.minWeight, self.maxDepth)
+		paths.append(self.folder / self.speedscopeName)
+		with open(paths[-1], 'w') as f:
+			json.dump(speedscope, f)
+		return paths
+
+# Wraps raw stats so that pstats.Stats can load them
+class RawStats:
+
+	def __init__(self, stats:dict) -> None:
+		self.stats = stats
+
+	def create_stats(self):
+		return
+
+# Yields a dict which receives the raw stats once the block is executed (it stays empty if the thread is already profiled)
+@contextmanager
+def capture(enabled:bool=True):
+	stats = {}
+	profiler = startProfiler(enabled)
+	try:
+		yield stats
+	finally:
+		stats.update(stopProfiler(profiler) or {})
+
+# Convert raw stats to the speedscope format (https://github.com/jlfwong/speedscope/wiki/Importing-from-custom-sources), one sampled profile per source
+# cProfile only records the caller -> callee edges: the call tree is rebuilt from the roots (the functions without caller),
+# the time of a function being split between its callers proportionally to the time spent on each edge. Recursive calls are cut.
+def toSpeedscope(sources:dict[str, dict], name:str, minWeight:float=1e-4, maxDepth:int=128) -> dict:
+	frames = []
+	frameIndices = {}
+
+	def getFrame(function):
+		if function not in frameIndices:
+			frameIndices[function] = len(frames)
+			file, line, functionName = function
+			frames.append(dict(name=functionName, file=file, line=line))
+		return frameIndices[function]
+
+	profiles = []
+	for source, stats in sources.items():
+		callees = {}
+		for function, (_, _, _, _, callers) in stats.items():
+			for caller, callerStats in callers.items():
+				# callerStats: (primitive calls, calls, self time, cumulative time) of the function when called by caller
+				callees.setdefault(caller, []).append((function, callerStats[2], callerStats[3]))
+		roots = [function for function, functionStats in stats.items() if len(functionStats[4]) == 0]
+		totalTime = sum([stats[function][3] for function in roots])
+		minTime = totalTime * minWeight
+		samples, weights = [], []
+		paths = [(function, [getFrame(function)], stats[function][2], stats[function][3]) for function in roots]
+		while len(paths) > 0:
+			function, stack, selfTime, cumulativeTime = paths.pop()
+			if selfTime > 0:
+				samples.append(stack)
+				weights.append(selfTime)
+			if len(stack) >= maxDepth or stats[function][3] <= 0: continue
+			ratio = cumulativeTime / stats[function][3]
+			for callee, calleeSelfTime, calleeCumulativeTime in callees.get(function, []):
+				frame = getFrame(callee)
+				if frame in stack or calleeCumulativeTime * ratio < minTime: continue
+				paths.append((callee, stack + [frame], calleeSelfTime * ratio, calleeCumulativeTime * ratio))
+		profiles.append(dict(type='sampled', name=f'{name} ({source})', unit='seconds', startValue=0, endValue=sum(weights), samples=samples, weights=weights))
+	return { '$schema': 'https://www.speedscope.app/file-format-schema.json', 'shared': dict(frames=frames), 'profiles': profiles, 'name': name, 'exporter': 'BioImageIT' }
@@ -0,0 +1,146 @@
+import json
+import pickle
+import hashlib
+from pathlib import Path
+from send2trash import send2trash
+
+# Content-addressed cache of the rows processed by a node.
+# The key of a row is built from the tool identity (module import path and version), the row arguments,
+# and the content hashes of the input files of the row.
+# When the key of a row matches an entry whose outputs still exist and were not modified, the row is not processed again:
+# its previous result is reused.
+# The cache is stored in the node metadata folder: the index in row_cache.json and the row results in row_cache/<key>.pkl
+# Each row is also appended to row_cache.journal as soon as it is finished, and the journal is merged in the index by save():
+# when an execution is interrupted (crash, killed process), the rows finished before are reused by the next execution.
+# Only the nodes processing their rows one by one use the cache (see BiitToolNode.usesRowCache):
+# the tools processing all rows at once (processAllData) and the fused nodes are executed again from the start.
+class RowCache:
+
+	indexName = 'row_cache.json'
+	journalName = 'row_cache.journal'
+	resultsFolderName = 'row_cache'
+
+	def __init__(self, folder:Path) -> None:
+		self.folder = Path(folder)
+		self.entries: dict[str, dict] = {}          # key -> dict(outputs={path: signature}, result=bool)
+		self.fileHashes: dict[str, list] = {}       # path -> [signature, hash] to avoid hashing unchanged files twice
+		self.usedKeys = set()
+		self.journal = None
+		self.load()
+
+	def load(self):
+		indexPath = self.folder / self.indexName
+		if indexPath.exists():
+			with open(indexPath, 'r') as f:
+				try:
+					index = json.load(f)
+					self.entries = index.get('entries', {})
+					self.fileHashes = index.get('fileHashes', {})
+				except json.JSONDecodeError:
+					pass
+		self.loadJournal()
+
+	# Add the rows finished since the last save, the last line may be truncated if the execution was interrupted while writing it
+	def loadJournal(self):
+		journalPath = self.folder / self.journalName
+		if not journalPath.exists(): return
+		with open(journalPath, 'r') as f:
+			for line in f:
+				try:
+					row = json.loads(line)
+				except json.JSONDecodeError:
+					break
+				self.entries[row['key']] = dict(outputs=row['outputs'], result=row['result'])
+
+	def appendToJournal(self, key:str):
+		if self.journal is None:
+			self.folder.mkdir(exist_ok=True, parents=True)
+			self.journal = open(self.folder / self.journalName, 'a')
+		self.journal.write(json.dumps(dict(key=key, **self.entries[key])) + '\n')
+		self.journal.flush()
+
+	# Write the index (replaced atomically), then remove the journal which is now merged in it
+	def save(self):
+		self.folder.mkdir(exist_ok=True, parents=True)
+		indexPath = self.folder / self.indexName
+		with open(indexPath.with_suffix('.tmp'), 'w') as f:
+			json.dump(dict(entries=self.entries, fileHashes=self.fileHashes), f)
+		indexPath.with_suffix('.tmp').replace(indexPath)
+		if self.journal is not None:
+			self.journal.close()
+			self.journal = None
+		(self.folder / self.journalName).unlink(missing_ok=True)
+
+	@staticmethod
+	def getSignature(path:Path):
+		if not path.exists(): return None
+		stat = path.stat()
+		return [stat.st_size, stat.st_mtime_ns]
+
+	def hashFile(self, path:Path):
+		signature = self.getSignature(path)
+		if signature is None: return None
+		if path.is_dir():
+			return [signature] + sorted([[child.name] + self.getSignature(child) for child in path.iterdir()])
+		pathString = str(path)
+		if pathString in self.fileHashes and self.fileHashes[pathString][0] == signature:
+			return self.fileHashes[pathString][1]
+		fileHash = hashlib.sha1()
+		with open(path, 'rb') as f:
+			while chunk := f.read(1024 * 1024):
+				fileHash.update(chunk)
+		self.fileHashes[pathString] = [signature, fileHash.hexdigest()]
+		return self.fileHashes[pathString][1]
+
+	@staticmethod
+	def serializeArg(value):
+		return value.to_json(default_handler=str) if callable(getattr(value, 'to_json', None)) else str(value)
+
+	def getKey(self, toolId:dict, args:dict, inputFileNames:list[str]):
+		inputHashes = { name: self.hashFile(Path(args[name])) for name in inputFileNames if args.get(name) is not None }
+		content = json.dumps(dict(tool=toolId, args=args, inputs=inputHashes), sort_keys=True, default=self.serializeArg)
+		return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+	def getResultPath(self, key:str):
+		return self.folder / self.resultsFolderName / f'{key}.pkl'
+
+	# Returns (True, result) if the row with this key was already processed and its outputs are unchanged, (False, None) otherwise
+	def get(self, key:str):
+		entry = self.entries.get(key)
+		if entry is None: return False, None
+		for path, signature in entry['outputs'].items():
+			if self.getSignature(Path(path)) != signature:
+				return False, None
+		result = None
+		if entry['result']:
+			resultPath = self.getResultPath(key)
+			if not resultPath.exists(): return False, None
+			with open(resultPath, 'rb') as f:
+				result = pickle.load(f)
+		self.usedKeys.add(key)
+		return True, result
+
+	# The result is written before the journal line, so that a row in the journal always has its result
+	def set(self, key:str, outputPaths:list[Path], result):
+		self.entries[key] = dict(outputs={ str(path): self.getSignature(Path(path)) for path in outputPaths }, result=result is not None)
+		if result is not None:
+			resultPath = self.getResultPath(key)
+			resultPath.parent.mkdir(exist_ok=True, parents=True)
+			with open(resultPath.with_suffix('.tmp'), 'wb') as f:
+				pickle.dump(result, f)
+			resultPath.with_suffix('.tmp').replace(resultPath)
+		self.appendToJournal(key)
+		self.usedKeys.add(key)
+
+	# Remove the entries which were not used by the last execution, and send their outputs to the trash (unless they are outputs of a used entry)
+	def prune(self):
+		usedOutputs = set([path for key in self.usedKeys for path in self.entries[key]['outputs']])
+		unusedOutputs = set()
+		for key in [key for key in self.entries if key not in self.usedKeys]:
+			unusedOutputs.update([path for path in self.entries[key]['outputs'] if path not in usedOutputs and Path(path).is_file()])
+			self.getResultPath(key).unlink(missing_ok=True)
+			del self.entries[key]
+		if len(unusedOutputs) > 0:
+			send2trash(sorted(unusedOutputs))
+		self.fileHashes = { path: value for path, value in self.fileHashes.items() if Path(path).exists() }
+		self.usedKeys = set()
@@ -0,0 +1,79 @@
+import queue
+import threading
+
+# The rows flowing from a node to the next one when their executions are pipelined (see ExecutionScheduler.executePipeline):
+# the producer puts the index of each row it processed, the consumer processes the row as soon as it gets it.
+# The stream is bounded: the producer waits (reserve) while capacity rows are waiting for the consumer.
+# If a row of the producer returns a DataFrame, the input of the consumer changes: the stream is invalidated,
+# the consumer stops taking rows and is executed normally once the producer is finished (closed).
+class RowStream:
+
+	def __init__(self, nRows:int, capacity:int=64) -> None:
+		self.nRows = nRows
+		self.rows = queue.Queue()
+		self.slots = threading.Semaphore(max(1, capacity))
+		self.closed = threading.Event()         # the producer is finished
+		self.stopped = threading.Event()        # the consumer does not take rows anymore
+		self.invalid = False
+
+	def __len__(self):
+		return self.nRows
+
+	def __iter__(self):
+		return iter(self.get, None)
+
+	# Called by the producer before processing a row, returns immediately if the consumer is not waiting for rows anymore
+	def reserve(self):
+		while not self.invalid and not self.closed.is_set() and not self.stopped.is_set():
+			if self.slots.acquire(timeout=0.1): return
+
+	def put(self, index):
+		if self.invalid or self.closed.is_set(): return
+		self.rows.put(index)
+
+	def invalidate(self):
+		self.invalid = True
+		self.rows.put(None)
+
+	def close(self):
+		self.closed.set()
+		self.rows.put(None)
+
+	def stop(self):
+		self.stopped.set()
+
+	# Wait until the producer is finished
+	def wait(self):
+		self.closed.wait()
+
+	# Returns the index of the next row, or None once the producer is finished or the stream is invalid or stopEvent is set
+	def get(self, stopEvent:threading.Event|None=None):
+		while True:
+			try:
+				index = self.rows.get(timeout=0.1)
+				break
+			except queue.Empty:
+				if stopEvent is not None and stopEvent.is_set(): return None
+		if index is None or self.invalid:
+			# Let the other consumers (the workers of the consumer) know that the stream is finished
+			self.rows.put(None)
+			return None
+		self.slots.release()
+		return index
+
+	# Wait for the next row, then also return the rows which are already available (at most maxRows)
+	def take(self, maxRows:int, stopEvent:threading.Event|None=None):
+		index = self.get(stopEvent)
+		if index is None: return []
+		rows = [index]
+		while len(rows) < maxRows:
+			try:
+				index = self.rows.get_nowait()
+			except queue.Empty:
+				break
+			if index is None or self.invalid:
+				self.rows.put(None)
+				break
+			self.slots.release()
+			rows.append(index)
+		return rows
@@ -0,0 +1,72 @@
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+import pandas
+from PyFlow.ToolManagement.EnvironmentManager import ResourceMonitor, hostMonitor
+
+# The execution telemetry of a node, appended to Metadata/<node>/timings.jsonl (one json record per line) while the node is executed:
+# - the node lifecycle: compute, launchEnvironment, execute, thumbnails,
+# - the calls to the tool: processAllData, and processData (or processFusedData) for each row (see Environment.execute and executeBatch).
+# Each record has the event name, the execution (the time at which the execution started), the time at which the event finished,
+# and the resources used by the process which executed it (the tool environment, or BioImageIT itself, see ResourceMonitor):
+# wall, cpu [s], peakRss, readBytes, writtenBytes [bytes]. The records of the rows also have the row index.
+# Use loadTimings() (or WorkflowManager.getTimings()) to query the records of a workflow.
+class Timings:
+
+	fileName = 'timings.jsonl'
+
+	def __init__(self, folder:Path, execution:float|None=None) -> None:
+		self.path = Path(folder) / self.fileName
+		self.execution = execution if execution is not None else time.time()
+		self.lock = threading.Lock()
+
+	def record(self, event:str, **fields):
+		record = dict(event=event, execution=self.execution, time=time.time(), **fields)
+		with self.lock:
+			self.path.parent.mkdir(exist_ok=True, parents=True)
+			with open(self.path, 'a') as f:
+				f.write(json.dumps(record, default=str) + '\n')
+
+	# The onMeasured callback of Environment.execute and executeBatch: the event is the called function
+	def recordCall(self, measurement:dict, **fields):
+		measurement = dict(measurement, **fields)
+		self.record(measurement.pop('function'), **measurement)
+
+	# Yields a dict which receives the measurement once the block is executed
+	@staticmethod
+	@contextmanager
+	def capture(monitor:ResourceMonitor|None=None):
+		monitor = monitor or hostMonitor
+		result = {}
+		measurement = monitor.start()
+		try:
+			yield result
+		finally:
+			result.update(monitor.stop(measurement))
+
+	# Record the resources used by the block, in the BioImageIT process by default
+	@contextmanager
+	def measure(self, event:str, monitor:ResourceMonitor|None=None, **fields):
+		monitor = monitor or hostMonitor
+		measurement = monitor.start()
+		try:
+			yield
+		finally:
+			self.record(event, **fields, **monitor.stop(measurement))
+
+# The records of the given nodes (all nodes by default) as a DataFrame, with a node column
+def loadTimings(workflowPath:Path, nodeNames:list[str]|None=None) -> pandas.DataFrame:
+	metadataPath = Path(workflowPath) / 'Metadata'
+	paths = [metadataPath / name / Timings.fileName for name in nodeNames] if nodeNames is not None else sorted(metadataPath.glob(f'*/{Timings.fileName}'))
+	records = []
+	for path in paths:
+		if not path.exists(): continue
+		with open(path, 'r') as f:
+			for line in f:
+				try:
+					records.append(dict(node=path.parent.name, **json.loads(line)))
+				except json.JSONDecodeError:
+					continue
+	return pandas.DataFrame.from_records(records)
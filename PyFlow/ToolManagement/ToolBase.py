@@ -13,6 +13,91 @@ class DictToObject(object):
             else:
                 setattr(self, key, value)
 
+# The arguments of all the rows of a node, stored by parameter rather than by row:
+# constants holds the arguments which are the same for all rows, columns holds one list of values (one value per row) for the others.
+# It can be used like the list of the row arguments (len(argsList), argsList[i], for args in argsList): the rows are lazy views (ArgsRow),
+# and tools which process all rows at once can get the values of all rows with argsList.getColumn(name).
+# The input DataFrame (when the tool sets setRowInArgs) is kept as is, each row gets its DataFrame row in args.idf_row.
+class ColumnarArgs(object):
+    def __init__(self, constants: dict, columns: dict, length: int, dataFrame=None):
+        self.constants = constants
+        self.columns = columns
+        self.length = length
+        self.dataFrame = dataFrame
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ArgsRow(self, i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError('ColumnarArgs index out of range')
+        return ArgsRow(self, index)
+
+    def __iter__(self):
+        return (ArgsRow(self, i) for i in range(self.length))
+
+    def names(self):
+        return list(self.constants) + list(self.columns) + (['idf_row'] if self.dataFrame is not None else [])
+
+    def getValue(self, name, index):
+        if name in self.columns:
+            return self.columns[name][index]
+        if name in self.constants:
+            return self.constants[name]
+        if name == 'idf_row' and self.dataFrame is not None:
+            return self.dataFrame.iloc[index]
+        raise KeyError(name)
+
+    # The values of the parameter for all rows
+    def getColumn(self, name):
+        return self.columns[name] if name in self.columns else [self.getValue(name, i) for i in range(self.length)]
+
+    # The arguments of the row as a dict
+    def getRow(self, index):
+        return { name: self.getValue(name, index) for name in self.names() }
+
+    def toList(self):
+        return [self.getRow(i) for i in range(self.length)]
+
+# The arguments of the rows of fused nodes (see processFusedData): row i is the list of the args of row i of each node
+class FusedArgs(object):
+    def __init__(self, argsLists: list):
+        self.argsLists = argsLists
+
+    def __len__(self):
+        return len(self.argsLists[0])
+
+    def getRow(self, index):
+        return [argsList.getRow(index) for argsList in self.argsLists]
+
+    def toList(self):
+        return [self.getRow(i) for i in range(len(self))]
+
+class ArgsRow(object):
+    def __init__(self, columnarArgs: ColumnarArgs, index: int):
+        object.__setattr__(self, '_columnarArgs', columnarArgs)
+        object.__setattr__(self, '_index', index)
+        object.__setattr__(self, '_overrides', {})
+
+    def __getattr__(self, name):
+        if name.startswith('__'): raise AttributeError(name)
+        if name in self._overrides: return self._overrides[name]
+        try:
+            value = self._columnarArgs.getValue(name, self._index)
+        except KeyError:
+            raise AttributeError(f"'ArgsRow' object has no attribute '{name}'")
+        return DictToObject(value) if isinstance(value, dict) else value
+    
+    def __setattr__(self, name, value):
+        self._overrides[name] = value
+
+    def __dir__(self):
+        return sorted(set(self._columnarArgs.names()) | set(self._overrides))
+
 @contextmanager
 def safe_chdir(path):
     currentPath = os.getcwd()
@@ -22,18 +107,21 @@ def safe_chdir(path):
     finally:
         os.chdir(currentPath)
 
+def createTool(moduleImportPath: str, args: dict, nodeOutputPath:Path, toolsPath:Path):
+    if toolsPath not in sys.path:
+        sys.path.append(str(toolsPath))
+    module = import_module(moduleImportPath)
+    newTool = module.Tool()
+    if hasattr(newTool, 'initialize') and callable(newTool.initialize):
+        with safe_chdir(nodeOutputPath):
+            newTool.initialize(args)
+    return newTool
+
 def initialize(newModuleImportPath: str, args: dict, nodeOutputPath:Path, toolsPath:Path):
     global tool, moduleImportPath
-    toolMustBeImported = moduleImportPath != newModuleImportPath
-    if toolMustBeImported:
-        if toolsPath not in sys.path:
-            sys.path.append(str(toolsPath))
-        module = import_module(newModuleImportPath)
-        tool = module.Tool()
+    if moduleImportPath != newModuleImportPath:
+        tool = createTool(newModuleImportPath, args, nodeOutputPath, toolsPath)
         moduleImportPath = newModuleImportPath
-    if toolMustBeImported and hasattr(tool, 'initialize') and callable(tool.initialize):
-        with safe_chdir(nodeOutputPath):
-            tool.initialize(args)
     return tool, args
 
 def processData(moduleImportPath: str, args: dict, nodeOutputPath:Path, toolsPath:Path):
@@ -45,14 +133,39 @@ def processData(moduleImportPath: str, args: dict, nodeOutputPath:Path, toolsPat
             result = tool.processData(args)
     return result
 
-def processAllData(moduleImportPath: str, argsList: list[dict], nodeOutputPath:Path, toolsPath:Path):
+def processAllData(moduleImportPath: str, argsList: ColumnarArgs, nodeOutputPath:Path, toolsPath:Path):
     # Initialize with the args of the first row, convert them to a list of string before use
     result = None
     if len(argsList) == 0: return result
-    argsList = [DictToObject(args) for args in argsList]
+    if not isinstance(argsList, ColumnarArgs):
+        argsList = [DictToObject(args) for args in argsList]
     tool, _ = initialize(moduleImportPath, argsList[0], nodeOutputPath, toolsPath)
     nodeOutputPath.mkdir(exist_ok=True, parents=True)
     if hasattr(tool, 'processAllData') and callable(tool.processAllData):
         with safe_chdir(nodeOutputPath):
             result = tool.processAllData(argsList)
-    return result
\ No newline at end of file
+    return result
+# The tools of the fused nodes, they are all kept since the steps of each row alternate between them
+fusedTools = {}
+
+# Process one row through a chain of fused nodes using the same environment (see BiitToolNode.executeFused):
+# the outputs of each step are passed in memory to the next steps instead of being read back from the disk.
+# steps[k] describes the step k: dict(moduleImportPath, nodeOutputPath, inputs, savedOutputs)
+# - inputs: { inputName: (stepIndex, outputName) } the inputs which are the in-memory outputs of a previous step,
+# - savedOutputs: the names of the outputs which must be written (the others are only used in memory by the next steps).
+# rowArgs[k] are the args of the row for the step k.
+# Returns None: the tools returning a DataFrame for each row are not fused (see BiitToolNode.canFuseRows)
+def processFusedData(steps: list, rowArgs: list, toolsPath:Path):
+    outputs = []
+    for step, args in zip(steps, rowArgs):
+        args = DictToObject(args)
+        if step['moduleImportPath'] not in fusedTools:
+            fusedTools[step['moduleImportPath']] = createTool(step['moduleImportPath'], args, step['nodeOutputPath'], toolsPath)
+        stepTool = fusedTools[step['moduleImportPath']]
+        inputs = { inputName: outputs[stepIndex][outputName] for inputName, (stepIndex, outputName) in step['inputs'].items() }
+        with safe_chdir(step['nodeOutputPath']):
+            stepOutputs = stepTool.processDataInMemory(args, inputs, step['savedOutputs'])
+        if stepOutputs is not None and not isinstance(stepOutputs, dict):
+            raise Exception(f'Error: {step["moduleImportPath"]}.processDataInMemory must return a dict of outputs, not {type(stepOutputs).__name__} (tools returning a DataFrame must set returnsDataFrames = True).')
+        outputs.append(stepOutputs or {})
+    return None
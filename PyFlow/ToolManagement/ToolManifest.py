@@ -0,0 +1,196 @@
+import ast
+import inspect
+import json
+import threading
+from pathlib import Path
+from importlib import import_module
+
+# Static description of the tools, extracted from their source code without importing them (see BiitLib.loadTools and LazyTool)
+# For each tool file, the manifest stores:
+# - attributes: the class attributes of Tool which could be evaluated statically (name, description, inputs, outputs, etc.),
+# - dynamic: the names of the class attributes which could not be evaluated (they require to import the tool),
+# - methods: the names of the methods of Tool,
+# - complete: False if some base classes of Tool could not be analysed (then any unknown attribute requires to import the tool).
+# The manifest is saved in a json file, an entry is recomputed when the tool file (or the files of its base classes) is modified.
+class ToolManifest:
+
+	def __init__(self, path:Path) -> None:
+		self.path = Path(path)
+		self.entries: dict[str, dict] = {}
+		self.modified = False
+		if self.path.exists():
+			try:
+				with open(self.path, 'r') as f:
+					self.entries = json.load(f)
+			except (OSError, json.JSONDecodeError):
+				self.entries = {}
+
+	def save(self):
+		if not self.modified: return
+		try:
+			with open(self.path, 'w') as f:
+				json.dump(self.entries, f)
+			self.modified = False
+		except OSError as e:
+			print(f'Warning: could not save the tool manifest {self.path}: {e}')
+
+	@staticmethod
+	def getModificationTime(path:Path):
+		return path.stat().st_mtime_ns if path.exists() else None
+
+	# Returns the description of the tool defined in toolPath, or None if the file does not define a Tool class
+	# Raises SyntaxError if the file cannot be parsed
+	def getToolInfo(self, toolPath:Path):
+		key = str(toolPath)
+		entry = self.entries.get(key)
+		if entry is not None and all([self.getModificationTime(Path(path)) == mtime for path, mtime in entry['files'].items()]):
+			return entry['info']
+		files = {}
+		info = self.parseClass(toolPath, 'Tool', files)
+		self.entries[key] = dict(files={ str(path): self.getModificationTime(path) for path in files }, info=info)
+		self.modified = True
+		return info
+
+	def parseClass(self, path:Path, className:str, files:dict):
+		files[path] = True
+		module = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+		classDefinition = next((node for node in module.body if isinstance(node, ast.ClassDef) and node.name == className), None)
+		if classDefinition is None: return None
+		info = dict(attributes={}, dynamic=[], methods=[], complete=True)
+		for base in classDefinition.bases:
+			baseInfo = self.parseBase(path, module, base, files)
+			if baseInfo is None:
+				info['complete'] = False
+				continue
+			self.update(info, baseInfo)
+		self.update(info, self.parseBody(classDefinition))
+		return info
+
+	# Only the base classes defined in the same file, or imported from a module of the same package ("from .module import Base")
+	# or from a module located in a parent folder ("from PyFlow.Tools.Package.module import Base") can be analysed
+	def parseBase(self, path:Path, module:ast.Module, base:ast.expr, files:dict):
+		if not isinstance(base, ast.Name): return None
+		if base.id == 'object': return dict(attributes={}, dynamic=[], methods=[], complete=True)
+		if any([isinstance(node, ast.ClassDef) and node.name == base.id for node in module.body]):
+			return self.parseClass(path, base.id, files)
+		for node in module.body:
+			if not isinstance(node, ast.ImportFrom) or node.module is None or not any([alias.name == base.id and alias.asname is None for alias in node.names]): continue
+			modulePath = f'{node.module.replace(".", "/")}.py'
+			if node.level == 1:
+				basePaths = [path.parent / modulePath]
+			elif node.level == 0:
+				basePaths = [parent / modulePath for parent in path.resolve().parents]
+			else:
+				return None
+			basePath = next((basePath for basePath in basePaths if basePath.exists()), None)
+			return self.parseClass(basePath, base.id, files) if basePath is not None else None
+		return None
+
+	@staticmethod
+	def update(info:dict, newInfo:dict):
+		for name in newInfo['attributes']:
+			info['dynamic'] = [n for n in info['dynamic'] if n != name]
+			info['methods'] = [n for n in info['methods'] if n != name]
+		for name in newInfo['dynamic'] + newInfo['methods']:
+			info['attributes'].pop(name, None)
+		info['attributes'].update(newInfo['attributes'])
+		info['dynamic'] = sorted(set(info['dynamic'] + newInfo['dynamic']))
+		info['methods'] = sorted(set(info['methods'] + newInfo['methods']))
+		info['complete'] = info['complete'] and newInfo['complete']
+
+	def parseBody(self, classDefinition:ast.ClassDef):
+		info = dict(attributes={}, dynamic=[], methods=[], complete=True)
+		for node in classDefinition.body:
+			if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+				info['methods'].append(node.name)
+				continue
+			if isinstance(node, ast.Assign):
+				targets, value = node.targets, node.value
+			elif isinstance(node, ast.AnnAssign) and node.value is not None:
+				targets, value = [node.target], node.value
+			else:
+				continue
+			for target in targets:
+				if not isinstance(target, ast.Name): continue
+				try:
+					info['attributes'][target.id] = self.evaluate(value)
+					info['dynamic'] = [n for n in info['dynamic'] if n != target.id]
+				except ValueError:
+					info['attributes'].pop(target.id, None)
+					info['dynamic'].append(target.id)
+		return info
+
+	# Evaluate literals, and the dict() / list() calls with literal arguments, which are used to describe the tool inputs and outputs
+	def evaluate(self, node:ast.expr):
+		if isinstance(node, ast.Constant):
+			return node.value
+		if isinstance(node, (ast.List, ast.Tuple)):
+			return [self.evaluate(element) for element in node.elts]
+		if isinstance(node, ast.Dict):
+			keys = [self.evaluate(key) if key is not None else None for key in node.keys]
+			if not all([isinstance(key, str) for key in keys]): raise ValueError('Only dicts with string keys are supported.')
+			return { key: self.evaluate(value) for key, value in zip(keys, node.values) }
+		if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'dict' and len(node.args) == 0 and all([keyword.arg is not None for keyword in node.keywords]):
+			return { keyword.arg: self.evaluate(keyword.value) for keyword in node.keywords }
+		if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ['list', 'tuple'] and len(node.args) <= 1 and len(node.keywords) == 0:
+			return self.evaluate(node.args[0]) if len(node.args) == 1 else []
+		if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+			value = self.evaluate(node.operand)
+			if not isinstance(value, (int, float)): raise ValueError('Unsupported unary operation.')
+			return -value if isinstance(node.op, ast.USub) else value
+		if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+			left, right = self.evaluate(node.left), self.evaluate(node.right)
+			if type(left) != type(right) or not isinstance(left, (str, list, int, float)): raise ValueError('Unsupported addition.')
+			return left + right
+		raise ValueError(f'Cannot evaluate {ast.dump(node)} statically.')
+
+# Stands for the Tool class of a tool module which is not imported yet (see BiitToolNode.createLazyNode)
+# The attributes found in the manifest are returned without importing the module, which is imported when the tool is instantiated,
+# or when another attribute (a method, a dynamic attribute) is requested. The overrides are set on the real Tool class once imported.
+class LazyTool:
+
+	def __init__(self, moduleImportPath:str, info:dict, overrides:dict) -> None:
+		self._moduleImportPath = moduleImportPath
+		self._info = info
+		self._overrides = overrides
+		self._tool = None
+		self._lock = threading.Lock()
+
+	def _load(self):
+		with self._lock:
+			if self._tool is None:
+				tool = import_module(self._moduleImportPath).Tool
+				tool.moduleImportPath = self._moduleImportPath
+				for name, value in self._overrides.items():
+					if not hasattr(tool, name):
+						setattr(tool, name, value)
+				self._tool = tool
+		return self._tool
+
+	def __getattr__(self, name):
+		if name in ['_moduleImportPath', '_info', '_overrides', '_tool', '_lock']:
+			raise AttributeError(name)
+		if self._tool is not None:
+			return getattr(self._tool, name)
+		if name == 'moduleImportPath':
+			return self._moduleImportPath
+		if name in self._info['attributes']:
+			return self._info['attributes'][name]
+		if name in self._info['dynamic'] or name in self._info['methods'] or not self._info['complete'] or name.startswith('__'):
+			return getattr(self._load(), name)
+		if name in self._overrides:
+			return self._overrides[name]
+		raise AttributeError(f"type object 'Tool' has no attribute '{name}'")
+
+	def __call__(self, *args, **kwargs):
+		return self._load()(*args, **kwargs)
+
+# Whether the Tool class (or one of its base classes) defines the method itself, as opposed to inheriting a callable from somewhere else
+# The lazy tools are not imported when their manifest is complete
+def definesMethod(tool, name:str) -> bool:
+	if isinstance(tool, LazyTool):
+		if tool._tool is None and tool._info['complete']:
+			return name in tool._info['methods']
+		tool = tool._load()
+	toolClass = tool if inspect.isclass(tool) else type(tool)
+	return any([callable(vars(c).get(name)) for c in inspect.getmro(toolClass) if c is not object])
@@ -17,6 +17,16 @@ class Tool():
     # - the conda packages which will be installed with 'conda install packageName'
     # - the pip packages which will be installed with 'pip install packageName'
     dependencies = dict(python='==3.10', conda=[], pip=[])
+    # The default number of rows processed in parallel (optional, default is 1)
+    # Each row is processed by a separate process of the tool environment, so the tool must support concurrent processData calls
+    # This can be changed for each node in the Execution panel of the node properties
+    nWorkers = 1
+    # Whether the rows already processed with the same tool version, arguments and input files are reused instead of being processed again (optional, default is True)
+    # Set it to False if processData depends on something else than its arguments and input files (a remote server, the current time, etc.)
+    cacheRows = True
+    # Whether processData returns a DataFrame for its row (optional, default is False)
+    # The nodes of such tools are never fused with other nodes, since processDataInMemory only returns the in-memory outputs
+    returnsDataFrames = False
     # The inputs
     inputs = [dict(name='input_image', help='The input image path.', 
                    required=True, type='Path', autoColumn=True)]
@@ -39,6 +49,8 @@ class Tool():
         return dataFrame
     
     # Process the entire DataFrame
+    # argsList contains the args of all rows: iterate over it to get the args of each row,
+    # or use argsList.getColumn('input_image') to get the values of a parameter for all rows at once
     def processAllData(self, argsList):
         return 
     
@@ -46,4 +58,16 @@ class Tool():
     def processData(self, args):
         return
     
+    # Process one row in memory (optional), used when the node is fused with the nodes using the same environment
+    # inputs contains the in-memory outputs of the previous fused node (e.g. inputs['input_image'] instead of reading args.input_image)
+    # Only the outputs listed in savedOutputs must be written, the others are only used in memory by the next fused nodes
+    # It must return a dict of the in-memory outputs { outputName: value } (not a DataFrame, see returnsDataFrames)
+    # Only define it if it really processes the row: a tool defining it is executed with it when its node is fused
+    # def processDataInMemory(self, args, inputs, savedOutputs):
+    #     image = inputs['input_image'] if 'input_image' in inputs else read(args.input_image)
+    #     ...
+    #     if 'output_image' in savedOutputs:
+    #         write(outputImage, args.output_image)
+    #     return dict(output_image=outputImage)
+    
 
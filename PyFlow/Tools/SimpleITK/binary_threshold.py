@@ -55,12 +55,20 @@ class Tool:
     ]
 
     def processData(self, args):
-        if not args.image.exists():
-            raise Exception(f'Error: input image {args.image} does not exist.')
-        inputImage = sitk.ReadImage(args.image)
+        self.processDataInMemory(args, {}, ['thresholded_image'])
+        return
+
+    def processDataInMemory(self, args, inputs, savedOutputs):
+        if 'image' in inputs:
+            inputImage = inputs['image']
+        else:
+            if not args.image.exists():
+                raise Exception(f'Error: input image {args.image} does not exist.')
+            inputImage = sitk.ReadImage(args.image)
         if 'vector' in inputImage.GetPixelIDTypeAsString():
             inputImage = inputImage.ToScalarImage()[args.channel, :, :]
-        thresholdedImage = sitk.BinaryThreshold(inputImage, args.lowerThreshold, args.upperThreshold, args.insideValue, args.outsideValue)
+        thresholdedImage = sitk.Cast(sitk.BinaryThreshold(inputImage, args.lowerThreshold, args.upperThreshold, args.insideValue, args.outsideValue), sitk.sitkUInt8)
         
-        sitk.WriteImage(sitk.Cast(thresholdedImage, sitk.sitkUInt8), args.thresholded_image)
-        return
\ No newline at end of file
+        if 'thresholded_image' in savedOutputs:
+            sitk.WriteImage(thresholdedImage, args.thresholded_image)
+        return dict(thresholded_image=thresholdedImage)
\ No newline at end of file
@@ -31,10 +31,20 @@ class Tool:
     ]
 
     def processData(self, args):
-        if not args.image.exists():
-            raise Exception(f'Error: input image {args.image} does not exist.')
-        inputImage = sitk.ReadImage(args.image)
+        self.processDataInMemory(args, {}, ['labeled_image', 'labeled_image_rgb'])
+
+    def processDataInMemory(self, args, inputs, savedOutputs):
+        if 'image' in inputs:
+            inputImage = inputs['image']
+        else:
+            if not args.image.exists():
+                raise Exception(f'Error: input image {args.image} does not exist.')
+            inputImage = sitk.ReadImage(args.image)
         labeledImage = sitk.ConnectedComponent(inputImage)
-        sitk.WriteImage(sitk.Cast(labeledImage, sitk.sitkUInt16), args.labeled_image)
+        labeledImageUInt16 = sitk.Cast(labeledImage, sitk.sitkUInt16)
+        if 'labeled_image' in savedOutputs:
+            sitk.WriteImage(labeledImageUInt16, args.labeled_image)
         labeledImageRGB = sitk.LabelToRGB(labeledImage)
-        sitk.WriteImage(labeledImageRGB, args.labeled_image_rgb)
\ No newline at end of file
+        if 'labeled_image_rgb' in savedOutputs:
+            sitk.WriteImage(labeledImageRGB, args.labeled_image_rgb)
+        return dict(labeled_image=labeledImageUInt16, labeled_image_rgb=labeledImageRGB)
\ No newline at end of file
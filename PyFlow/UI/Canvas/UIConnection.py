@@ -231,12 +231,13 @@ class UIConnection(QGraphicsPathItem):
             if self.thickness != 2:
                 self.thickness = 2
                 self.pen.setWidthF(self.thickness)
+                self.update()
 
-        if self.isSelected():
-            self.pen.setColor(self.selectedColor)
-        else:
-            self.pen.setColor(self.color)
-        self.update()
+        # Only repaint when the color changes: repainting all connections at each tick keeps the editor busy even when idle
+        color = self.selectedColor if self.isSelected() else self.color
+        if self.pen.color() != color:
+            self.pen.setColor(color)
+            self.update()
 
     def contextMenuEvent(self, event):
         self._menu.exec_(event.screenPos())
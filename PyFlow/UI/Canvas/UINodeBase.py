@@ -275,7 +275,6 @@ class UINodeBase(QGraphicsWidget, IPropertiesViewSupport, IUINode):
         self._rawNode = raw_node
         self._rawNode.setWrapper(self)
         self._rawNode.killed.connect(self.kill)
-        self._rawNode.tick.connect(self.Tick)
         self._rawNode.errorOccurred.connect(self.onNodeErrorOccurred)
         self._rawNode.errorCleared.connect(self.onNodeErrorCleared)
         self._rawNode.setDirty.connect(self.setDirty)
@@ -909,6 +908,10 @@ class UINodeBase(QGraphicsWidget, IPropertiesViewSupport, IUINode):
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionChange:
             self._rawNode.setPosition(value.x(), value.y())
+            # The connections are not repainted periodically anymore (see UIConnection.Tick)
+            for pin in self.UIPins.values():
+                for wire in pin.uiConnectionList:
+                    wire.update()
         if change == QGraphicsItem.ItemVisibleChange:
             if self.owningCommentNode is not None:
                 if self.owningCommentNode.collapsed:
@@ -1454,6 +1457,9 @@ class UINodeBase(QGraphicsWidget, IPropertiesViewSupport, IUINode):
     def createOutputCollapsibleFormWidget(self, propertiesWidget):
         pass
 
+    def createExecutionCollapsibleFormWidget(self, propertiesWidget):
+        pass
+
     def createPropertiesWidget(self, propertiesWidget):
         self.createBaseWidgets(propertiesWidget)
 
@@ -1464,6 +1470,7 @@ class UINodeBase(QGraphicsWidget, IPropertiesViewSupport, IUINode):
 
         self.createAdvancedCollapsibleFormWidget(propertiesWidget)
         self.createOutputCollapsibleFormWidget(propertiesWidget)
+        self.createExecutionCollapsibleFormWidget(propertiesWidget)
 
         # self.noPadding(inputsCategory)
 
@@ -1608,6 +1615,13 @@ class UINodeBase(QGraphicsWidget, IPropertiesViewSupport, IUINode):
         for pin in self.UIPins.values():
             pin.heartBeat()
 
+    # The node is only ticked while the value of one of its pins is watched (the heart beat moves the watch widgets)
+    def updateTickConnection(self):
+        if any([getattr(pin, "watchWidget", None) is not None for pin in self.UIPins.values()]):
+            self._rawNode.connectTick(self.Tick)
+        else:
+            self._rawNode.disconnectTick(self.Tick)
+
     def Tick(self, delta, *args, **kwargs):
         # NOTE: Do not call wrapped raw node Tick method here!
         # this ui node tick called from underlined raw node's emitted signal
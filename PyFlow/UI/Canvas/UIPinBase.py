@@ -140,6 +140,7 @@ class UIPinBase(QGraphicsWidget):
             self.watchWidget.setZValue(NodeDefaults().Z_LAYER + 1)
             self.updateWatchWidget()
             self.updateWatchWidgetValue(self.currentData())
+        self.owningNode().updateTickConnection()
 
     def path(self):
         return self._rawPin.path()
@@ -13,6 +13,8 @@
 ## limitations under the License.
 
 
+import json
+
 from blinker import Signal
 
 from PyFlow.Core.Common import *
@@ -22,14 +24,31 @@ from PyFlow.ConfigManager import ConfigManager
 
 
 class _EditorState(object):
-    """docstring for _EditorState."""
+    """A state of the editor history.
+
+    The graph is stored as its graph data (variables, active graph, etc.) and the serialized nodes.
+    The nodes which did not change since the previous state share their serialized data with it,
+    so that a state only stores the nodes which were modified.
+    """
 
-    def __init__(self, text, modify):
+    def __init__(self, text, modify, previousState=None):
         super(_EditorState, self).__init__()
         self.text = text
-        self.editorState = GraphManagerSingleton().get().serialize()
+        graphData = GraphManagerSingleton().get().serialize()
+        previousNodes = previousState.nodes if previousState is not None else {}
+        self.nodes = {}
+        for nodeJson in graphData.pop("nodes"):
+            previousNodeJson = previousNodes.get(nodeJson["uuid"])
+            self.nodes[nodeJson["uuid"]] = previousNodeJson if previousNodeJson == nodeJson else nodeJson
+        self.graphData = graphData
         self._modify = modify
 
+    @property
+    def editorState(self):
+        editorState = dict(self.graphData)
+        editorState["nodes"] = list(self.nodes.values())
+        return editorState
+
     def modifiesData(self):
         return self._modify
 
@@ -37,6 +56,165 @@ class _EditorState(object):
         return self.text
 
 
+class _EditorStateDelta(object):
+    """The changes between two editor states: added and removed nodes, modified nodes and connections.
+
+    The delta can be applied to the graph without reloading it: only the modified nodes are updated,
+    and the nodes whose parameters or input connections changed are set dirty (with their downstream nodes).
+    applicable is False when the states differ in a way which is not handled here
+    (variables, compound graphs, renamed nodes, etc.), then the other state must be loaded entirely.
+    """
+
+    # The serialized node keys which can change between the two states
+    nodeKeys = ["x", "y", "inputs", "outputs", "parameters", "nWorkers", "profileNextExecution", "executed", "outputDataFramePath"]
+    # The serialized pin keys which can change between the two states
+    pinKeys = ["linkedTo", "value", "wrapper"]
+
+    def __init__(self, state, otherState, nodes):
+        self.nodes = nodes
+        self.applicable = state.graphData == otherState.graphData
+        self.addedNodes = []
+        self.removedNodes = []
+        self.changedNodes = []
+        links = set()
+        otherLinks = set()
+        uids = list(state.nodes) + [uid for uid in otherState.nodes if uid not in state.nodes]
+        for uid in uids:
+            nodeJson = state.nodes.get(uid)
+            otherNodeJson = otherState.nodes.get(uid)
+            if nodeJson is otherNodeJson or nodeJson == otherNodeJson:
+                continue
+            links.update(self.getLinks(nodeJson))
+            otherLinks.update(self.getLinks(otherNodeJson))
+            if nodeJson is None:
+                self.addedNodes.append(otherNodeJson)
+            elif otherNodeJson is None:
+                self.removedNodes.append(nodeJson)
+            else:
+                self.changedNodes.append((nodeJson, otherNodeJson))
+        self.removedLinks = links - otherLinks
+        self.addedLinks = otherLinks - links
+        self.applicable = self.applicable and self.canApply(state)
+
+    @staticmethod
+    def getLinks(nodeJson):
+        if nodeJson is None:
+            return []
+        return [
+            (link["lhsNodeUid"], link["outPinId"], link["rhsNodeUid"], link["inPinId"])
+            for pinJson in nodeJson["inputs"] + nodeJson["outputs"]
+            for link in pinJson["linkedTo"]
+        ]
+
+    @staticmethod
+    def getPins(nodeJson):
+        return {(pinJson["direction"], pinJson["name"]): pinJson for pinJson in nodeJson["inputs"] + nodeJson["outputs"]}
+
+    def canApply(self, state):
+        activeGraphName = state.graphData["activeGraph"]
+        for nodeJson in self.addedNodes + self.removedNodes + [n for changedNode in self.changedNodes for n in changedNode]:
+            if nodeJson["owningGraphName"] != activeGraphName or "graphData" in nodeJson or nodeJson["type"] in ("getVar", "setVar"):
+                return False
+        for nodeJson in self.removedNodes:
+            if nodeJson["uuid"] not in self.nodes:
+                return False
+        for nodeJson, otherNodeJson in self.changedNodes:
+            node = self.nodes.get(nodeJson["uuid"])
+            if node is None or node.getWrapper() is None:
+                return False
+            keys = set(nodeJson) | set(otherNodeJson)
+            if any([nodeJson.get(key) != otherNodeJson.get(key) for key in keys if key not in self.nodeKeys]):
+                return False
+            # The output DataFrame of an execution cannot be restored once the node was set unexecuted
+            if otherNodeJson.get("executed") and not getattr(node, "executed", False):
+                return False
+            if nodeJson.get("parameters") != otherNodeJson.get("parameters") or nodeJson.get("nWorkers") != otherNodeJson.get("nWorkers"):
+                if not callable(getattr(node, "setSerializedParameters", None)):
+                    return False
+            pins, otherPins = self.getPins(nodeJson), self.getPins(otherNodeJson)
+            if set(pins) != set(otherPins):
+                return False
+            for key, pinJson in pins.items():
+                otherPinJson = otherPins[key]
+                if any([pinJson.get(k) != otherPinJson.get(k) for k in set(pinJson) | set(otherPinJson) if k not in self.pinKeys]):
+                    return False
+        return True
+
+    def getPin(self, nodeUid, pinIndex, outputs):
+        node = self.nodes.get(nodeUid)
+        if node is None:
+            return None
+        pins = node.orderedOutputs if outputs else node.orderedInputs
+        return pins.get(pinIndex)
+
+    def apply(self, canvas):
+        from PyFlow.Core.PathsRegistry import PathsRegistry
+
+        # Disconnect the removed connections
+        for lhsNodeUid, outPinId, rhsNodeUid, inPinId in self.removedLinks:
+            lhsPin = self.getPin(lhsNodeUid, outPinId, True)
+            rhsPin = self.getPin(rhsNodeUid, inPinId, False)
+            if lhsPin is None or rhsPin is None:
+                continue
+            uiLhsPin = lhsPin.getWrapper()()
+            connection = next((c for c in uiLhsPin.uiConnectionList if c.destination()._rawPin is rhsPin), None)
+            if connection is not None:
+                canvas.removeConnection(connection)
+            else:
+                disconnectPins(lhsPin, rhsPin)
+
+        for nodeJson in self.removedNodes:
+            self.nodes.pop(nodeJson["uuid"]).kill()
+
+        for nodeJson in self.addedNodes:
+            uiNode = canvas._createNode(nodeJson)
+            self.nodes[nodeJson["uuid"]] = uiNode._rawNode
+
+        modifiedNodes = []
+        for nodeJson, otherNodeJson in self.changedNodes:
+            node = self.nodes[otherNodeJson["uuid"]]
+            if (nodeJson["x"], nodeJson["y"]) != (otherNodeJson["x"], otherNodeJson["y"]):
+                node.getWrapper().setPos(otherNodeJson["x"], otherNodeJson["y"])
+            pins = self.getPins(nodeJson)
+            for key, otherPinJson in self.getPins(otherNodeJson).items():
+                if pins[key]["value"] == otherPinJson["value"] or otherPinJson["value"] is None:
+                    continue
+                pin = node.getPinSG(otherPinJson["name"], PinSelectionGroup.Inputs if otherPinJson["direction"] == int(PinDirection.Input) else PinSelectionGroup.Outputs)
+                pin.setData(json.loads(otherPinJson["value"], cls=pin.jsonDecoderClass()))
+            if nodeJson.get("nWorkers") != otherNodeJson.get("nWorkers"):
+                node.nWorkers = otherNodeJson["nWorkers"]
+            if nodeJson.get("profileNextExecution") != otherNodeJson.get("profileNextExecution"):
+                node.profileNextExecution = otherNodeJson.get("profileNextExecution", False)
+            parametersChanged = nodeJson.get("parameters") != otherNodeJson.get("parameters")
+            if parametersChanged:
+                node.setSerializedParameters(otherNodeJson["parameters"])
+            if parametersChanged or (getattr(node, "executed", False) and not otherNodeJson.get("executed", True)):
+                # Only the node and its downstream nodes are set dirty and unexecuted
+                node.setNodeDirty()
+                modifiedNodes.append(node)
+
+        # Connect the added connections (the destination nodes are set dirty when their input is plugged)
+        for lhsNodeUid, outPinId, rhsNodeUid, inPinId in self.addedLinks:
+            lhsPin = self.getPin(lhsNodeUid, outPinId, True)
+            rhsPin = self.getPin(rhsNodeUid, inPinId, False)
+            if lhsPin is None or rhsPin is None or arePinsConnected(lhsPin, rhsPin):
+                continue
+            canvas.connectPinsInternal(lhsPin.getWrapper()(), rhsPin.getWrapper()())
+            modifiedNodes.append(rhsPin.owningNode())
+
+        if len(self.addedNodes) > 0:
+            PathsRegistry().rebuild()
+
+        # Refresh the properties and the table of the selected node if it was modified
+        selectedNodes = canvas.selectedNodes()
+        if len(selectedNodes) > 0 and selectedNodes[0]._rawNode in modifiedNodes + [self.nodes[n[1]["uuid"]] for n in self.changedNodes]:
+            canvas.tryFillPropertiesView(selectedNodes[0])
+            canvas.tryFillTableView(selectedNodes[0])
+        elif len(self.removedNodes) > 0:
+            canvas.requestClearProperties.emit()
+            canvas.requestClearTable.emit()
+
+
 @SingletonDecorator
 class EditorHistory(object):
 
@@ -85,6 +263,7 @@ class EditorHistory(object):
 
     def clear(self):
         clearList(self.stack)
+        self.activeState = None
 
     def stateIndex(self, state):
         if state in self.stack:
@@ -119,12 +298,8 @@ class EditorHistory(object):
         self.stateSelected.send(edState)
 
     def selectState(self, state):
-        for st in self.stack:
-            if state == st:
-                self.app.loadFromData(st.editorState)
-                self.activeState = st
-                self.stateSelected.send(st)
-                break
+        if state in self.stack:
+            self.select(self.stack.index(state))
 
     def select(self, index):
         index = clamp(index, 0, self.count() - 1)
@@ -135,16 +310,27 @@ class EditorHistory(object):
         if len(self.stack) == 0:
             return
 
-        stateData = self.stack[index].editorState
+        state = self.stack[index]
 
-        self.app.loadFromData(stateData)
+        # Apply the changes between the active state and the selected one when possible, reload the whole graph otherwise
+        if not self.applyDelta(self.activeState, state):
+            self.app.loadFromData(state.editorState)
 
-        state = self.stack[index]
         self.activeState = state
         self.stateSelected.send(state)
 
+    def applyDelta(self, activeState, state):
+        if activeState is None:
+            return False
+        nodes = {str(node.uid): node for node in GraphManagerSingleton().get().getAllNodes()}
+        delta = _EditorStateDelta(activeState, state, nodes)
+        if not delta.applicable:
+            return False
+        delta.apply(self.app.getCanvas())
+        return True
+
     def saveState(self, text, modify=False):
-        self.push(_EditorState(text, modify))
+        self.push(_EditorState(text, modify, self.activeState))
 
     def undo(self):
         if self.currentIndex > 0:
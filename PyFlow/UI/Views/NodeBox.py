@@ -138,7 +138,7 @@ class NodeBoxTreeWidget(QTreeWidget):
             #  you may need to call invalidate_caches() in order for the new module to be noticed by the import system.
             invalidate_caches()
             nodes = [n for n in self.canvas.getApp().graphManager.get().getAllNodes() if n.__class__.name() == nodeName]
-            nodeClass = createNode(nodePath, moduleImportPath, reload(sys.modules[moduleImportPath]))
+            nodeClass = createNode(nodePath, moduleImportPath, reload(sys.modules[moduleImportPath]) if moduleImportPath in sys.modules else import_module(moduleImportPath))
             for node in nodes:
                 node.__class__ = nodeClass
                 node.Tool = nodeClass.Tool
@@ -403,6 +403,9 @@ class BlueprintCanvas(CanvasBase):
     def OnDoubleClick(self, pos):
         pass
 
+    def isAnimating(self):
+        return self.autoPanController.isActive()
+
     def Tick(self, deltaTime):
         if self.autoPanController.isActive():
             delta = self.autoPanController.getDelta() * -1
@@ -1065,6 +1068,7 @@ class BlueprintCanvas(CanvasBase):
                     )
                     self._drawRealtimeLine = True
                     self.autoPanController.start()
+                    self.pyFlowInstance.wakeMainLoop()
                 elif (
                     event.button() == QtCore.Qt.LeftButton
                     and modifiers == QtCore.Qt.ControlModifier
@@ -2142,6 +2146,9 @@ class BlueprintCanvasWidget(QWidget):
     def Tick(self, delta):
         self.canvas.Tick(delta)
 
+    def isAnimating(self):
+        return self.canvas.isAnimating()
+
     def onFileBeenLoaded(self):
         for graph in self.manager.getAllGraphs():
             self.canvas.createWrappersForGraph(graph)
@@ -1,10 +1,16 @@
 from pathlib import Path
+import json
+import time
 import uuid
 from PyFlow import INITIALIZE, GET_PACKAGES
 from PyFlow.Core.Common import connectPins
 from PyFlow.Core.GraphManager import GraphManagerSingleton
 from PyFlow.Core.NodeBase import NodeBase
+from PyFlow.Core.EvaluationEngine import EvaluationEngine
 from PyFlow.ThumbnailManagement.ThumbnailGenerator import ThumbnailGenerator
+from PyFlow.ToolManagement.ExecutionScheduler import ExecutionScheduler
+from PyFlow.ToolManagement.Timings import loadTimings
+from PyFlow.Packages.PyFlowBase.FunctionLibraries.BiitToolNode import prelaunchEnvironments
 
 class WorkflowManager:
     def __init__(self, workflowPath:Path):
@@ -19,6 +25,43 @@ class WorkflowManager:
         self.nodeClasses = package.GetNodeClasses()
 
         self.graphManager.activeGraph().populating = True
+        self.scheduler = None
+        self.nodeReports = {}   # node name -> dict(status, duration) of the last execution
+
+    # Load a workflow saved by the GUI (its data is in the folder of the .pygraph file, like in PyFlow.loadFromFile)
+    def loadGraph(self, graphPath:Path):
+        with open(graphPath, 'r') as f:
+            data = json.load(f)
+        data['workflowPath'] = str(Path(graphPath).parent)
+        self.graphManager.deserialize(data)
+        self.graphManager.selectGraphByName(data['activeGraph'])
+        ThumbnailGenerator.get().setWorkflowPathAndLoadImageToThumbnail(Path(graphPath).parent)
+
+    def saveGraph(self, graphPath:Path):
+        data = self.graphManager.serialize()
+        del data['workflowPath']
+        with open(graphPath, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def getNode(self, name):
+        return next((node for node in self.graphManager.getAllNodes() if node.name == name), None)
+
+    # Select the nodes to execute: the given nodes (only), or the given nodes and all their downstream nodes (fromNodes)
+    # The selected nodes are set unexecuted so that they are executed again, which also sets their downstream nodes unexecuted
+    def selectNodes(self, only=None, fromNodes=None):
+        selectedNodes = []
+        for node in (only or []) + (fromNodes or []):
+            if node not in selectedNodes:
+                selectedNodes.append(node)
+        for node in fromNodes or []:
+            for nextNode in EvaluationEngine()._impl.getEvaluationOrderIterative(node, forward=True):
+                if nextNode not in selectedNodes:
+                    selectedNodes.append(nextNode)
+        selectedNodes = [node for node in selectedNodes if self.isBiitLib(node)]
+        for node in selectedNodes:
+            if self.wasExecuted(node):
+                node.setExecuted(False)
+        return selectedNodes
     
     def initializeNode(self, nodeClassName):
         id = str(uuid.uuid4())
@@ -52,11 +95,11 @@ class WorkflowManager:
             node.dirty = True
             node.compute()
         
-    def isBiitLib(self, node):
-        return node.lib == 'BiitLib'
-
-    def wasExecuted(self, node):
-        return hasattr(node, 'executed') and node.executed
+    # The readiness helpers are shared with the ExecutionScheduler
+    isBiitLib = staticmethod(ExecutionScheduler.isBiitLib)
+    wasExecuted = staticmethod(ExecutionScheduler.wasExecuted)
+    getInputNodes = staticmethod(ExecutionScheduler.getInputNodes)
+    inputsWereExecuted = staticmethod(ExecutionScheduler.inputsWereExecuted)
 
     def isPlanned(self, node):
         return hasattr(node, 'planned') and node.planned
@@ -67,12 +110,6 @@ class WorkflowManager:
     def getNodesToExecute(self, nodes):
         return [ node for node in nodes if self.mustExecute(node) ]
 
-    def getInputNodes(self, node):
-        return [outputPin.owningNode() for inputPin in node.inputs.values() for outputPin in inputPin.affected_by]
-
-    def inputsWereExecuted(self, node):
-        return len(node.inputs) == 0 or all([not self.isBiitLib(n) or self.wasExecuted(n) for n in self.getInputNodes(node)])
-
     def inputsArePlannedOrExecuted(self, node):
         return len(node.inputs) == 0 or all([not self.isBiitLib(n) or (self.isPlanned(n) or self.wasExecuted(n)) for n in self.getInputNodes(node)])
 
@@ -83,16 +120,67 @@ class WorkflowManager:
 
     def executeNode(self, node):
         if not self.inputsWereExecuted(node): return False
+        node.compute()
         node.execute()
         return True
 
-    def executeWorkflow(self):
+    def executeNodeAndLog(self, node, n, nNodes):
+        print(f'Process node [[{n}/{nNodes}]]: {node.name}')
+        start = time.perf_counter()
+        try:
+            executed = self.executeNode(node)
+        except Exception:
+            self.nodeReports[node.name] = dict(status='failed', duration=time.perf_counter() - start)
+            raise
+        status = 'executed' if executed and self.wasExecuted(node) else 'in memory' if executed and getattr(node, 'outputsInMemory', False) else 'skipped'
+        self.nodeReports[node.name] = dict(status=status, duration=time.perf_counter() - start)
+        return executed
+
+    # The nodes which cannot be executed because one of their input nodes is not executed and will not be
+    def getBlockedNodes(self, nodesToExecute):
+        blockedNodes = set()
+        changed = True
+        while changed:
+            changed = False
+            for node in nodesToExecute - blockedNodes:
+                if any([self.isBiitLib(n) and not self.wasExecuted(n) and (n not in nodesToExecute or n in blockedNodes) for n in self.getInputNodes(node)]):
+                    blockedNodes.add(node)
+                    changed = True
+        return blockedNodes
+
+    # The status of each node after executeWorkflow: executed, failed, skipped (its inputs were not executed, or the execution stopped before it),
+    # in memory (a fused node whose outputs were not written, see skipIntermediateFiles), or up to date / not executed for the nodes which were not to execute.
+    # The nodes executed with a fused node are executed without being reported.
+    def getExecutionSummary(self, executedNodes):
+        summary = []
+        for node in self.graphManager.getAllNodes():
+            if not self.isBiitLib(node): continue
+            report = self.nodeReports.get(node.name)
+            if node in executedNodes:
+                status = report['status'] if report is not None else 'executed' if self.wasExecuted(node) else 'in memory' if getattr(node, 'outputsInMemory', False) else 'skipped'
+            else:
+                status = 'up to date' if self.wasExecuted(node) else 'not executed'
+            summary.append(dict(name=node.name, status=status, duration=report['duration'] if report is not None and node in executedNodes else None))
+        return summary
+
+    # maxActiveEnvironments is the maximum number of nodes executed at the same time (independent branches are executed concurrently)
+    # pipelineRows: process the rows of a node as soon as the previous node produced them (see ExecutionScheduler.executePipeline)
+    # fuseNodes: execute the chains of nodes using the same environment with a single call per row (see ExecutionScheduler.executeFusedNodes)
+    # nodes: the nodes to execute (see selectNodes), all the unexecuted nodes by default ; the nodes whose inputs cannot be executed are skipped
+    # Returns True if all nodes were executed
+    def executeWorkflow(self, maxActiveEnvironments=1, pipelineRows=False, fuseNodes=False, skipIntermediateFiles=False, nodes=None):
 
         # workflow()
 
-        nodes = self.graphManager.getAllNodes()
+        nodes = self.graphManager.getAllNodes() if nodes is None else nodes
         
         nodesToExecute = set(self.getNodesToExecute(nodes))
+        self.nodeReports = {}
+
+        blockedNodes = self.getBlockedNodes(nodesToExecute)
+        if len(blockedNodes) > 0:
+            print(f'The following nodes cannot be executed since their inputs are not executed: {", ".join([n.name for n in blockedNodes])}')
+        nodesToExecute -= blockedNodes
 
         for node in nodesToExecute:
             node.planned = False
@@ -107,8 +195,20 @@ class WorkflowManager:
             if len(nodesToExecute) == lastN:
                 raise Exception('Error: there is a cycle in the graph, some nodes cannot be executed.')
 
-        for n, node in enumerate(plannedNodes):
-            print(f'Process node [[{n}/{len(plannedNodes)}]]: {node.name}')
-            self.executeNode(node)
+        # Launch the environments of the next nodes while the first ones are executed
+        prelaunchEnvironments(plannedNodes)
+
+        self.scheduler = ExecutionScheduler(plannedNodes, self.executeNodeAndLog, maxActiveEnvironments, pipelineRows=pipelineRows, fuseNodes=fuseNodes, skipIntermediateFiles=skipIntermediateFiles)
+        allExecuted = self.scheduler.run()
 
         print('All node processed')
+        return allExecuted and len(blockedNodes) == 0
+
+    # The execution telemetry of the given nodes (all nodes by default) as a DataFrame, see Timings
+    # For example: workflowManager.getTimings().groupby(['node', 'event'])[['wall', 'cpu', 'peakRss']].describe()
+    def getTimings(self, nodeNames=None):
+        return loadTimings(self.graphManager.getWorkflowPath(), nodeNames)
+
+    def cancelExecution(self):
+        if self.scheduler is not None:
+            self.scheduler.cancel()
@@ -51,6 +51,7 @@ __HASHABLE_TYPES = []
 
 PARAMETERS_PATH = 'parameters.json'
 OUTPUT_DATAFRAME_PATH = 'output_data_frame.csv'
+OUTPUT_DATAFRAME_PARQUET_PATH = 'output_data_frame.parquet'
 
 
 def sourcesFolderHasVersion(sourcesPath:Path):
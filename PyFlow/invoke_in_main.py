@@ -86,7 +86,8 @@ def inmain(fn, *args, **kwargs):
     Returns:
         The result of executing :code:`fn(*args, **kwargs)`
     """
-    if threading.current_thread().name == 'MainThread':
+    # Without Qt application (headless execution, see PyFlow.RunWorkflow) there is no event loop to post the call to
+    if threading.current_thread().name == 'MainThread' or QCoreApplication.instance() is None:
         return fn(*args, **kwargs)
     return get_inmain_result(_in_main_later(fn, False, *args, **kwargs))
 
@@ -65,4 +65,8 @@ def main(instance=None):
 	app.exec_()
 
 if __name__ == "__main__":
+	# python pyflow.py run workflow.pygraph executes the workflow without the graphical interface (see PyFlow.RunWorkflow)
+	if len(sys.argv) > 1 and sys.argv[1] == "run":
+		from PyFlow.RunWorkflow import run
+		sys.exit(run(sys.argv[2:]))
 	main()